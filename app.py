@@ -11,9 +11,11 @@ from dotenv import load_dotenv
 import logging
 from datetime import datetime
 
-# Загрузка переменных окружения
+# Загрузка переменных окружения: до импорта services, константы которых читаются из окружения
 load_dotenv()
 
+from services import jobs, metrics, profiling
+
 # Настройка логирования
 logging.basicConfig(
     level=logging.INFO,
@@ -37,12 +39,28 @@ app = dash.Dash(
     meta_tags=[
         {"name": "viewport", "content": "width=device-width, initial-scale=1"}
     ],
-    title=f'Социально-экономический дашборд {REGION_NAME}'
+    title=f'Социально-экономический дашборд {REGION_NAME}',
+    background_callback_manager=jobs.create_manager()
 )
 
 server = app.server
+celery_app = jobs.celery_app
 app.config.suppress_callback_exceptions = True
 
+# Метрики производительности: /metrics
+metrics.init_app(server)
+
+# Профилирование по PROFILE=1 или заголовку X-Profile
+profiling.init_app(server)
+
+# Выгрузка данных: /export
+from services import export
+server.register_blueprint(export.blueprint)
+
+# Геометрия муниципалитетов для карт: /geo
+from services import geo
+server.register_blueprint(geo.blueprint)
+
 # Навигационная панель
 navbar = dbc.Navbar(
     dbc.Container(
@@ -155,26 +173,27 @@ app.layout = html.Div(
     ]
 )
 
-# Импорт страниц после создания app для избежания циклических импортов
-from pages import overview, labor, demographics, economy
+# Страницы импортируются при первом запросе или в фоновом потоке прогрева
+import pages
+pages.init_app(server)
 
 # Callback для навигации
 @app.callback(
     Output('page-content', 'children'),
-    [Input('url', 'pathname')]
+    [Input('url', 'pathname')],
+    [dash.dependencies.State('session-store', 'data')]
 )
-def display_page(pathname):
-    """Отображение соответствующей страницы"""
+def display_page(pathname, session):
+    """Отображение соответствующей страницы с сохраненным состоянием фильтров"""
     logger.info(f"Navigating to: {pathname}")
     
-    if pathname == '/labor':
-        return labor.create_layout(app)
-    elif pathname == '/demographics':
-        return demographics.create_layout(app)
-    elif pathname == '/economy':
-        return economy.create_layout(app)
-    else:
-        return overview.create_layout(app)
+    page = pages.resolve(pathname)
+    if page is None:
+        with metrics.LAYOUT_SECONDS.time(page='not_found'):
+            return pages.not_found_layout(pathname)
+    
+    with metrics.LAYOUT_SECONDS.time(page=page.name):
+        return pages.render(page, app, session)
 
 # Callback для сворачивания навбара на мобильных
 @app.callback(
@@ -0,0 +1 @@
+# Бенчмарки страниц, колбэков и построителей графиков
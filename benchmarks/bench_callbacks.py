@@ -0,0 +1,21 @@
+"""
+Колбэки страниц на данных разного масштаба
+"""
+
+import pytest
+
+from pages import overview
+
+# Доля периода данных, попадающая в фильтр дат
+DATE_FRACTIONS = [0.1, 0.5, 1.0]
+
+
+@pytest.mark.parametrize('fraction', DATE_FRACTIONS, ids=[f'{int(f * 100)}pct' for f in DATE_FRACTIONS])
+def bench_update_charts(benchmark, sample_data, fraction):
+    benchmark.group = 'callbacks'
+
+    dates = sample_data['date']
+    start = dates.iloc[-max(int(len(dates) * fraction), 1)]
+    end = dates.iloc[-1]
+    # Построение без кэша результатов update_charts
+    benchmark(overview.build_charts, sample_data, str(start), str(end), 'all')
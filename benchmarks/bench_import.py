@@ -0,0 +1,64 @@
+"""
+Время старта воркера: импорт app в отдельном интерпретаторе.
+
+Отчет python -X importtime по самым медленным модулям сохраняется
+в extra_info бенчмарка; его же можно напечатать отдельно:
+
+    python -m benchmarks.bench_import
+"""
+
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Сколько модулей показывать в отчете
+TOP_MODULES = 15
+
+
+def importtime(module='app'):
+    """
+    Импорт module в новом процессе с -X importtime.
+
+    Возвращает список (модуль, собственное время мкс, накопленное мкс)
+    в порядке завершения импорта.
+    """
+    env = dict(os.environ, WARMUP_PAGES='False')
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def report(rows, top=TOP_MODULES):
+    """Самые медленные модули верхнего уровня и по собственному времени"""
+    total = max(cumulative for _, _, cumulative in rows)
+    lines = [f"total: {total / 1000:.1f} ms", "by cumulative time:"]
+    for name, _, cumulative in sorted(rows, key=lambda r: r[2], reverse=True)[:top]:
+        lines.append(f"  {cumulative / 1000:>8.1f} ms  {name}")
+    lines.append("by self time:")
+    for name, self_us, _ in sorted(rows, key=lambda r: r[1], reverse=True)[:top]:
+        lines.append(f"  {self_us / 1000:>8.1f} ms  {name}")
+    return '\n'.join(lines)
+
+
+def bench_import_app(benchmark):
+    benchmark.group = 'startup'
+    rows = benchmark.pedantic(importtime, rounds=3, iterations=1)
+    benchmark.extra_info['total_ms'] = round(max(r[2] for r in rows) / 1000, 1)
+    benchmark.extra_info['top_modules'] = [
+        [name, round(cumulative / 1000, 1)]
+        for name, _, cumulative in sorted(rows, key=lambda r: r[2], reverse=True)[:TOP_MODULES]
+    ]
+
+
+if __name__ == '__main__':
+    print(report(importtime(sys.argv[1] if len(sys.argv) > 1 else 'app')))
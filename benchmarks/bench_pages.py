@@ -0,0 +1,56 @@
+"""
+Сборка лейаутов страниц и построители графиков
+"""
+
+import inspect
+
+import pytest
+
+from pages import demographics, economy, labor, overview
+
+PAGES = {
+    'overview': overview,
+    'labor': labor,
+    'demographics': demographics,
+    'economy': economy,
+}
+
+
+def _static_builders():
+    """Построители create_* без обязательных аргументов со всех страниц"""
+    for page, module in PAGES.items():
+        for name, func in vars(module).items():
+            if not name.startswith('create_') or name == 'create_layout' or not callable(func):
+                continue
+            if getattr(func, '__module__', None) != module.__name__:
+                continue
+            params = inspect.signature(func).parameters.values()
+            if all(p.default is not p.empty for p in params):
+                yield pytest.param(func, id=f'{page}.{name}')
+
+
+@pytest.mark.parametrize('page', list(PAGES))
+def bench_create_layout(benchmark, page):
+    benchmark.group = 'layout'
+    benchmark(PAGES[page].create_layout, None)
+
+
+@pytest.mark.parametrize('builder', list(_static_builders()))
+def bench_builder(benchmark, builder):
+    benchmark.group = 'builders'
+    benchmark(builder)
+
+
+def bench_trend_chart(benchmark, sample_data):
+    benchmark.group = 'builders-scaled'
+    benchmark(overview.create_trend_chart, sample_data)
+
+
+def bench_heatmap(benchmark, sample_data):
+    benchmark.group = 'builders-scaled'
+    benchmark(overview.create_heatmap, sample_data)
+
+
+def bench_calculate_stats(benchmark, sample_data):
+    benchmark.group = 'builders-scaled'
+    benchmark(overview.calculate_stats, sample_data)
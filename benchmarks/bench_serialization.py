@@ -0,0 +1,26 @@
+"""
+Время и объем JSON-сериализации лейаутов и ответов колбэков
+"""
+
+import pytest
+from dash._utils import to_json
+
+from pages import overview
+from benchmarks.bench_pages import PAGES
+
+
+@pytest.mark.parametrize('page', list(PAGES))
+def bench_serialize_layout(benchmark, page):
+    benchmark.group = 'serialization'
+    layout = PAGES[page].create_layout(None)
+    payload = benchmark(to_json, layout)
+    benchmark.extra_info['bytes'] = len(payload)
+
+
+def bench_serialize_update_charts(benchmark, sample_data):
+    benchmark.group = 'serialization'
+    figures = overview.build_charts(
+        sample_data, str(sample_data['date'].iloc[0]), str(sample_data['date'].iloc[-1]), 'all'
+    )
+    payload = benchmark(to_json, figures)
+    benchmark.extra_info['bytes'] = len(payload)
@@ -0,0 +1,176 @@
+"""
+Хранилище архива показателей, пакетная подгонка трендов, прогноз населения,
+матрица миграционных потоков, реестр предприятий, сравнение регионов,
+поток вакансий, эскизы зарплат, сезонная корректировка и поиск по каталогу показателей
+"""
+
+import numpy as np
+import pytest
+
+from services import cache, catalog, enterprises, migration, projection, regions, salaries, seasonal, trends, vacancies
+from services.archive import IndicatorArchive
+
+QUERIES = {
+    'page': ('', None),
+    'sort': ('', [{'column_id': 'salary', 'direction': 'desc'}]),
+    'filter-sort': (
+        '{municipality} contains "тул" && {unemployment} > 3',
+        [{'column_id': 'date', 'direction': 'desc'}, {'column_id': 'gdp', 'direction': 'asc'}]
+    ),
+}
+
+
+@pytest.fixture(scope='session')
+def archive(archive_frame):
+    return IndicatorArchive.from_frame(archive_frame)
+
+
+def bench_build_archive(benchmark, archive_frame):
+    benchmark.group = 'archive'
+    benchmark(IndicatorArchive.from_frame, archive_frame)
+
+
+@pytest.mark.parametrize('query', list(QUERIES))
+def bench_archive_page(benchmark, archive, query):
+    benchmark.group = 'archive'
+    filter_query, sort_by = QUERIES[query]
+
+    # Замер без кэша представлений: каждый раунд выполняет запрос заново
+    benchmark.pedantic(
+        archive.page, args=(3, 10, filter_query, sort_by),
+        setup=lambda: cache.clear('archive-views'), rounds=20
+    )
+
+
+@pytest.mark.parametrize('model', trends.MODELS)
+def bench_fit_trends(benchmark, sample_data, model):
+    benchmark.group = 'trends'
+    values = sample_data.drop(columns='date').to_numpy().T
+    benchmark(trends.fit_models, values, model, 12)
+
+
+@pytest.mark.parametrize('scenario', list(projection.SCENARIOS))
+def bench_projection(benchmark, scenario):
+    benchmark.group = 'projection'
+    # Все муниципалитеты на полный горизонт, без кэша прогнозов
+    benchmark(projection._project, scenario, projection.HORIZON)
+
+
+@pytest.mark.parametrize('scope', ['all', 'internal', 'external'])
+def bench_migration_top_flows(benchmark, scope):
+    benchmark.group = 'migration'
+    matrix = migration.get_matrix()
+    benchmark(matrix.top_flows, matrix.years[-1], scope, 12)
+
+
+def bench_migration_add_year(benchmark):
+    benchmark.group = 'migration'
+    matrix = migration.MigrationMatrix()
+    flows = migration.generate_flows(migration.YEARS[-1])
+    benchmark(matrix.add_year, migration.YEARS[-1], *flows)
+
+
+ENTERPRISE_QUERIES = {
+    'all': ([], []),
+    'sector': ([2], []),
+    'sectors': ([2, 3, 6], []),
+    'sector-municipality': ([2], [0, 1]),
+}
+
+
+@pytest.mark.parametrize('query', list(ENTERPRISE_QUERIES))
+def bench_enterprises_top(benchmark, query):
+    benchmark.group = 'enterprises'
+    registry = enterprises.get_registry()
+    benchmark(registry.top, 10, *ENTERPRISE_QUERIES[query])
+
+
+@pytest.mark.parametrize('node', [None, 'C', '24'])
+def bench_okved_subtree(benchmark, node):
+    benchmark.group = 'enterprises'
+    tree = enterprises.get_sector_tree()
+    benchmark(tree.subtree, node, 2, 'revenue')
+
+
+@pytest.fixture(scope='session')
+def russia_values():
+    """85 регионов × 300 показателей × 10 лет, 5% пропусков"""
+    rng = np.random.default_rng(0)
+    values = rng.lognormal(0, 1, (300, 10, 85))
+    values[rng.random(values.shape) < 0.05] = np.nan
+    return values
+
+
+def bench_region_ranks(benchmark, russia_values):
+    benchmark.group = 'regions'
+    benchmark(
+        regions.RegionComparison, range(85), [f'i{i}' for i in range(300)], range(10),
+        russia_values, np.full((10, 85), 1000.0)
+    )
+
+
+@pytest.mark.parametrize('measure', regions.MEASURES)
+def bench_region_lookup(benchmark, measure):
+    benchmark.group = 'regions'
+    comparison = regions.get_comparison()
+    benchmark(comparison.lookup, 'grp', regions.YEARS[-1], measure)
+
+
+@pytest.fixture(scope='session')
+def vacancy_batches():
+    """Месяц сгенерированной ленты: 30 дневных пакетов по 10 тыс. вакансий"""
+    rng = np.random.default_rng(0)
+    batches, previous = [], None
+    for day in range(30):
+        batches.append(vacancies.generate_batch(day, 10000, rng, previous))
+        previous = batches[-1][3]
+    return batches
+
+
+def bench_vacancy_ingest(benchmark, vacancy_batches):
+    benchmark.group = 'vacancies'
+
+    def ingest():
+        stream = vacancies.VacancyStream('')
+        for batch in vacancy_batches:
+            stream.ingest(*batch)
+    benchmark.pedantic(ingest, rounds=3)
+
+
+def bench_vacancy_counts(benchmark):
+    benchmark.group = 'vacancies'
+    stream = vacancies.get_stream()
+    benchmark(stream.counts, 30, [0, 1, 2])
+
+
+def bench_salary_sketch_add(benchmark):
+    benchmark.group = 'salaries'
+    records = salaries.generate_records(0, 200000, np.random.default_rng(0))
+    benchmark(salaries.SalarySketches().add, *records)
+
+
+@pytest.mark.parametrize('keep', [(), ('municipality',)])
+def bench_salary_summary(benchmark, keep):
+    benchmark.group = 'salaries'
+    sketches = salaries.get_sketches()
+    benchmark(sketches.summary, [0, 3, 5] if not keep else None, None, [len(salaries.YEARS) - 1], keep)
+
+
+@pytest.mark.parametrize('multiplicative', [False, True])
+def bench_seasonal_decompose(benchmark, multiplicative):
+    benchmark.group = 'seasonal'
+    # 100 показателей по всем территориям, 5 лет помесячно
+    values = np.random.default_rng(0).lognormal(1, 0.2, (100 * len(seasonal.AREAS), 60))
+    benchmark(seasonal.decompose, values, seasonal.PERIOD, multiplicative)
+
+
+def bench_catalog_index(benchmark):
+    benchmark.group = 'catalog'
+    entries = catalog.build_catalog()
+    benchmark(catalog.IndicatorCatalog, entries)
+
+
+@pytest.mark.parametrize('query', ['безраб', 'зарплата тула', 'lab.sal.tula.c', 'п'])
+def bench_catalog_search(benchmark, query):
+    benchmark.group = 'catalog'
+    benchmark(catalog.get_catalog().search, query, 20)
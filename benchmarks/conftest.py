@@ -0,0 +1,78 @@
+"""
+Бенчмарки дашборда (pytest-benchmark).
+
+Запуск из корня репозитория:
+
+    pip install -r benchmarks/requirements.txt
+    python -m pytest benchmarks
+
+Результаты сохраняются в .benchmarks с идентификатором коммита. Сравнение
+с предыдущим прогоном и провал при регрессии медианы больше 10%:
+
+    python -m pytest benchmarks --benchmark-compare --benchmark-compare-fail=median:10%
+
+Масштабы данных задаются опцией --scales (кратность размера
+generate_sample_data), по умолчанию 1, 100 и 10000.
+"""
+
+import os
+
+# Бенчмарки замеряют вычисления в процессе, без общего кэша воркеров
+os.environ.setdefault('SHARED_CACHE', 'none')
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.data import build_archive_frame, generate_sample_data
+
+DEFAULT_SCALES = '1,100,10000'
+
+# Архив показателей больше этого числа строк в бенчмарках не строится
+MAX_ARCHIVE_ROWS = 2000000
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        '--scales', default=DEFAULT_SCALES,
+        help='Кратности размера тестовых данных через запятую'
+    )
+
+
+def pytest_generate_tests(metafunc):
+    if 'scale' in metafunc.fixturenames:
+        scales = [int(s) for s in metafunc.config.getoption('scales').split(',') if s.strip()]
+        metafunc.parametrize('scale', scales, ids=[f'x{s}' for s in scales], scope='session')
+
+
+def make_sample_data(scale):
+    """Региональные ряды, увеличенные в scale раз по числу наблюдений"""
+    base = generate_sample_data()
+    if scale == 1:
+        return base
+
+    n = len(base) * scale
+    rng = np.random.default_rng(scale)
+    data = {'date': pd.date_range('2020-01-01', periods=n, freq='h')}
+    for col in base.columns.drop('date'):
+        data[col] = np.tile(base[col].to_numpy(), scale) * (1 + rng.normal(0, 0.01, n))
+    return pd.DataFrame(data)
+
+
+_data_cache = {}
+
+
+@pytest.fixture(scope='session')
+def sample_data(scale):
+    if scale not in _data_cache:
+        _data_cache[scale] = make_sample_data(scale)
+    return _data_cache[scale]
+
+
+@pytest.fixture(scope='session')
+def archive_frame(sample_data):
+    from services.municipalities import CODES
+
+    if len(sample_data) * len(CODES) > MAX_ARCHIVE_ROWS:
+        pytest.skip(f'архив больше {MAX_ARCHIVE_ROWS} строк')
+    return build_archive_frame(sample_data)
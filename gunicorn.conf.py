@@ -0,0 +1,48 @@
+"""
+Конфигурация gunicorn для дашборда.
+
+Часть запросов ждет внешние API (лента вакансий) и блокировки общего кэша,
+а не процессор, поэтому по умолчанию используется gthread: каждый воркер
+обслуживает несколько запросов в потоках, и медленный внешний запрос не
+занимает процесс целиком.
+Переменные окружения:
+
+- GUNICORN_WORKER_CLASS - gthread (по умолчанию), gevent или sync;
+- WEB_CONCURRENCY - число процессов-воркеров;
+- GUNICORN_THREADS - потоков на воркер для gthread;
+- GUNICORN_CONNECTIONS - одновременных соединений на воркер для gevent;
+- GUNICORN_TIMEOUT - таймаут запроса, секунд.
+
+Размер пула HTTP-соединений (services.clients) подстраивается под число
+потоков воркера, чтобы потоки не ждали свободного соединения.
+
+Запуск: gunicorn -c gunicorn.conf.py app:server
+"""
+
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', os.getenv('APP_PORT', 8050))}"
+
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+workers = int(os.getenv('WEB_CONCURRENCY', min(multiprocessing.cpu_count() * 2 + 1, 4)))
+threads = int(os.getenv('GUNICORN_THREADS', 8))
+worker_connections = int(os.getenv('GUNICORN_CONNECTIONS', 100))
+
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 60))
+graceful_timeout = 30
+keepalive = 5
+
+# Перезапуск воркеров сглаживает рост памяти кэшей
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = 100
+
+accesslog = '-'
+loglevel = os.getenv('GUNICORN_LOG_LEVEL', 'info')
+
+if worker_class == 'gevent':
+    # Каждое соединение - гринлет; пулы клиентов рассчитываются на них
+    os.environ.setdefault('CLIENT_POOL_SIZE', str(worker_connections))
+else:
+    os.environ.setdefault('CLIENT_POOL_SIZE', str(threads))
+
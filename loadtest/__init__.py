@@ -0,0 +1 @@
+# Нагрузочное тестирование HTTP API Dash
@@ -0,0 +1,131 @@
+"""
+Сценарий нагрузки Locust для HTTP API Dash.
+
+Пользователь открывает дашборд (/, _dash-layout, _dash-dependencies), затем
+переходит между страницами и меняет фильтры обзора. Запросы колбэков
+строятся по описанию из _dash-dependencies, поэтому сценарий не зависит
+от того, какие свойства объявлены в колбэке Input, а какие State.
+
+Запуск против работающего сервера:
+
+    locust -f loadtest/locustfile.py --host http://127.0.0.1:8050
+"""
+
+import random
+
+from locust import HttpUser, between, task
+
+PAGES = ['/', '/labor', '/demographics', '/economy']
+
+MUNICIPALITIES = ['all', 'tula', 'novomoskovsk', 'aleksin', 'shchekino']
+
+# Начальные значения свойств компонентов обзора
+OVERVIEW_VALUES = {
+    ('date-range', 'start_date'): '2020-01-31',
+    ('date-range', 'end_date'): '2024-12-31',
+    ('municipality-select', 'value'): 'all',
+    ('indicators-select', 'value'): 'all',
+    ('apply-filters', 'n_clicks'): None,
+    ('auto-apply-timer', 'n_intervals'): 0,
+    ('data-table', 'page_current'): 0,
+    ('data-table', 'page_size'): 10,
+    ('data-table', 'sort_by'): [],
+    ('data-table', 'filter_query'): '',
+}
+
+
+def _outputs(output):
+    """Разбор строки output из _dash-dependencies в список {id, property}"""
+    if output.startswith('..'):
+        parts = output.strip('.').split('...')
+    else:
+        parts = [output]
+    specs = []
+    for part in parts:
+        component_id, prop = part.rsplit('.', 1)
+        specs.append({'id': component_id, 'property': prop})
+    return specs if output.startswith('..') else specs[0]
+
+
+class DashUser(HttpUser):
+    """Сессия пользователя дашборда"""
+
+    wait_time = between(1, 5)
+
+    def on_start(self):
+        self.client.get('/', name='index')
+        self.client.get('/_dash-layout', name='_dash-layout')
+        dependencies = self.client.get('/_dash-dependencies', name='_dash-dependencies').json()
+        self.callbacks = {
+            dep['output']: dep for dep in dependencies
+            if not dep.get('clientside_function')
+        }
+        self.values = dict(OVERVIEW_VALUES)
+        self.navigate('/')
+
+    def _find(self, component_id, prop):
+        for output, dep in self.callbacks.items():
+            if f'{component_id}.{prop}' in output:
+                return dep
+        return None
+
+    def fire(self, component_id, prop, changed):
+        """Вызов колбэка, выводящего component_id.prop, через _dash-update-component"""
+        dep = self._find(component_id, prop)
+        if dep is None or dep.get('long'):
+            return
+
+        def fill(items):
+            return [
+                {'id': i['id'], 'property': i['property'],
+                 'value': self.values.get((i['id'], i['property']))}
+                for i in items
+            ]
+
+        payload = {
+            'output': dep['output'],
+            'outputs': _outputs(dep['output']),
+            'inputs': fill(dep['inputs']),
+            'state': fill(dep['state']),
+            'changedPropIds': changed,
+        }
+        with self.client.post(
+            '/_dash-update-component', json=payload,
+            name=f'callback {component_id}.{prop}', catch_response=True
+        ) as response:
+            # 204 - колбэк вернул PreventUpdate, это штатный ответ
+            if response.status_code in (200, 204):
+                response.success()
+
+    def navigate(self, pathname):
+        self.values[('url', 'pathname')] = pathname
+        self.fire('page-content', 'children', ['url.pathname'])
+        if pathname == '/':
+            self.fire('data-table', 'data', [])
+            self.fire('export-csv', 'href', [])
+
+    @task(4)
+    def open_overview(self):
+        self.navigate('/')
+
+    @task(6)
+    def open_other_page(self):
+        self.navigate(random.choice(PAGES[1:]))
+
+    @task(5)
+    def change_filters(self):
+        year = random.randint(2020, 2024)
+        self.values[('date-range', 'start_date')] = f'{year}-01-31'
+        self.values[('date-range', 'end_date')] = '2024-12-31'
+        self.values[('municipality-select', 'value')] = random.choice(MUNICIPALITIES)
+        clicks = (self.values.get(('apply-filters', 'n_clicks')) or 0) + 1
+        self.values[('apply-filters', 'n_clicks')] = clicks
+        self.fire('main-trend-chart', 'figure', ['apply-filters.n_clicks'])
+
+    @task(3)
+    def page_table(self):
+        self.values[('data-table', 'page_current')] = random.randint(0, 50)
+        self.values[('data-table', 'sort_by')] = random.choice([
+            [], [{'column_id': 'salary', 'direction': 'desc'}]
+        ])
+        self.fire('data-table', 'data', ['data-table.page_current'])
@@ -0,0 +1,122 @@
+"""
+Прогон нагрузочного сценария по набору конфигураций gunicorn.
+
+Для каждой конфигурации (класс воркера, число воркеров, число потоков)
+запускается gunicorn app:server, затем Locust в headless-режиме; по итогам
+печатается пропускная способность и перцентили задержки по каждому
+типу запроса.
+
+    python -m loadtest.run_matrix --configs sync:2:1,gthread:2:4,gthread:4:8 \
+        --users 50 --spawn-rate 10 --duration 60s
+"""
+
+import argparse
+import csv
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LOCUSTFILE = os.path.join(ROOT, 'loadtest', 'locustfile.py')
+
+DEFAULT_CONFIGS = 'sync:2:1,gthread:2:4,gthread:4:4'
+
+
+def parse_config(value):
+    """Строка класс:воркеры:потоки"""
+    worker_class, workers, threads = value.split(':')
+    return worker_class, int(workers), int(threads)
+
+
+def wait_ready(url, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=2):
+                return
+        except OSError:
+            time.sleep(0.5)
+    raise RuntimeError(f"Сервер не ответил за {timeout} с: {url}")
+
+
+def run_config(config, args, workdir):
+    worker_class, workers, threads = config
+    name = f"{worker_class}-w{workers}-t{threads}"
+    host = f"http://127.0.0.1:{args.port}"
+
+    # Параметры передаются через окружение gunicorn.conf.py, чтобы пулы
+    # соединений получили тот же размер, что и в боевом запуске
+    env = dict(
+        os.environ,
+        GUNICORN_WORKER_CLASS=worker_class,
+        WEB_CONCURRENCY=str(workers),
+        GUNICORN_THREADS=str(threads),
+        GUNICORN_LOG_LEVEL='warning',
+    )
+    server = subprocess.Popen(
+        [
+            sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'app:server',
+            '--bind', f'127.0.0.1:{args.port}',
+            '--access-logfile', os.devnull,
+        ],
+        cwd=ROOT, env=env
+    )
+    try:
+        wait_ready(host + '/')
+        prefix = os.path.join(workdir, name)
+        subprocess.run(
+            [
+                sys.executable, '-m', 'locust', '-f', LOCUSTFILE, '--headless',
+                '--host', host,
+                '--users', str(args.users),
+                '--spawn-rate', str(args.spawn_rate),
+                '--run-time', args.duration,
+                '--csv', prefix,
+                '--only-summary',
+            ],
+            cwd=ROOT, check=False
+        )
+        return name, read_stats(prefix + '_stats.csv')
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def read_stats(path):
+    with open(path, encoding='utf-8') as f:
+        return list(csv.DictReader(f))
+
+
+def print_report(results):
+    header = f"{'config':<20} {'request':<40} {'req/s':>8} {'p50':>7} {'p95':>7} {'p99':>7} {'fail':>6}"
+    print(header)
+    print('-' * len(header))
+    for name, rows in results:
+        for row in rows:
+            print(
+                f"{name:<20} {row['Name'][:40]:<40} {float(row['Requests/s']):>8.1f} "
+                f"{row['50%']:>7} {row['95%']:>7} {row['99%']:>7} {row['Failure Count']:>6}"
+            )
+        print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--configs', default=DEFAULT_CONFIGS, help='класс:воркеры:потоки через запятую')
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--spawn-rate', type=float, default=10)
+    parser.add_argument('--duration', default='60s')
+    parser.add_argument('--port', type=int, default=8060)
+    args = parser.parse_args()
+
+    configs = [parse_config(c) for c in args.configs.split(',') if c.strip()]
+    with tempfile.TemporaryDirectory(prefix='loadtest-') as workdir:
+        results = [run_config(config, args, workdir) for config in configs]
+    print_report(results)
+
+
+if __name__ == '__main__':
+    main()
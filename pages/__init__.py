@@ -1,2 +1,219 @@
-# Инициализация пакета pages
-from . import overview, labor, demographics, economy
\ No newline at end of file
+# Инициализация пакета pages: реестр страниц дашборда
+
+import copy
+import importlib
+import logging
+import os
+import threading
+import time
+
+import dash_bootstrap_components as dbc
+from dash import html
+from dash.development.base_component import Component
+
+from services import cache
+
+logger = logging.getLogger(__name__)
+
+# Импорт модулей страниц в фоновом потоке сразу после старта воркера
+WARMUP_PAGES = os.getenv('WARMUP_PAGES', 'True').lower() in ('1', 'true')
+
+_load_lock = threading.RLock()
+_loaded = set()
+
+
+class Page:
+    """
+    Описание страницы: адрес, модуль с фабрикой лейаута и политика кэша.
+
+    cache_policy:
+    - 'static' - лейаут не зависит от данных и строится один раз на процесс;
+    - 'data' - лейаут кэшируется по версиям источников из dependencies;
+    - 'none' - лейаут строится при каждом переходе.
+    """
+
+    def __init__(self, path, module, title, cache_policy='none', dependencies=(), factory='create_layout'):
+        self.path = path
+        self.module = module
+        self.title = title
+        self.cache_policy = cache_policy
+        self.dependencies = tuple(dependencies)
+        self.factory = factory
+
+    @property
+    def name(self):
+        return self.module.rsplit('.', 1)[-1]
+
+    def load(self):
+        """
+        Модуль страницы; при первом обращении импортируется и получает
+        замеры времени построения графиков.
+        """
+        if self.module in _loaded:
+            return importlib.import_module(self.module)
+        with _load_lock:
+            module = importlib.import_module(self.module)
+            if self.module not in _loaded:
+                from services import metrics
+                metrics.instrument_builders(module)
+                _loaded.add(self.module)
+        return module
+
+
+def _sample_data_version():
+    from services.data import data_version
+    return data_version()
+
+
+def _migration_version():
+    from services import migration
+    return migration.get_matrix().version
+
+
+def _vacancies_version():
+    from services import vacancies
+    return vacancies.get_stream().version
+
+
+# Версии источников данных, от которых зависят лейауты
+DATA_VERSIONS = {
+    'sample-data': _sample_data_version,
+    'vacancies': _vacancies_version,
+    'migration': _migration_version,
+}
+
+PAGES = [
+    Page('/', 'pages.overview', 'Главная', cache_policy='data', dependencies=['sample-data']),
+    Page('/labor', 'pages.labor', 'Рынок труда', cache_policy='data', dependencies=['sample-data', 'vacancies']),
+    Page('/demographics', 'pages.demographics', 'Демография', cache_policy='data', dependencies=['migration']),
+    Page('/economy', 'pages.economy', 'Экономика', cache_policy='static'),
+    Page('/all-indicators', 'pages.indicators', 'Все показатели', cache_policy='static'),
+]
+
+ROUTES = {page.path: page for page in PAGES}
+
+# Разделы из меню, которые еще не реализованы
+PLANNED = {
+    '/social': 'Социальная сфера',
+    '/industry': 'Промышленность',
+    '/investments': 'Инвестиции',
+}
+
+
+def normalize_path(pathname):
+    """Адрес без завершающего слэша; пустой адрес - главная"""
+    if not pathname:
+        return '/'
+    return pathname.rstrip('/') or '/'
+
+
+def resolve(pathname):
+    """Страница по адресу или None"""
+    return ROUTES.get(normalize_path(pathname))
+
+
+def _version(page):
+    if page.cache_policy == 'static':
+        return 'static'
+    return tuple(DATA_VERSIONS[name]() for name in page.dependencies)
+
+
+def set_props(node, props):
+    """
+    Лейаут с измененными свойствами компонентов: {id: {свойство: значение}}.
+
+    Копируются только компоненты на пути к изменяемым, остальное дерево
+    общее с исходным, поэтому закэшированный лейаут не меняется.
+    """
+    if isinstance(node, (list, tuple)):
+        items = [set_props(item, props) for item in node]
+        if all(new is old for new, old in zip(items, node)):
+            return node
+        return items
+    if not isinstance(node, Component):
+        return node
+
+    updates = props.get(getattr(node, 'id', None))
+    children = getattr(node, 'children', None)
+    new_children = set_props(children, props) if children is not None else None
+    if not updates and new_children is children:
+        return node
+
+    node = copy.copy(node)
+    for name, value in (updates or {}).items():
+        setattr(node, name, value)
+    if new_children is not children:
+        node.children = new_children
+    return node
+
+
+def render(page, app, session=None):
+    """
+    Лейаут страницы с учетом ее политики кэширования.
+
+    Если модуль страницы объявляет restore_state(layout, state), в лейаут
+    подставляется сохраненное в session-store состояние страницы.
+    """
+    build = lambda: getattr(page.load(), page.factory)(app)
+    if page.cache_policy == 'none':
+        layout = build()
+    else:
+        layout = cache.get_or_compute('layouts', (page.path, _version(page)), build, maxsize=32)
+
+    state = (session or {}).get(page.name)
+    restore = getattr(page.load(), 'restore_state', None)
+    if state and restore is not None:
+        layout = restore(layout, state)
+    return layout
+
+
+def load_all():
+    """Импорт всех модулей страниц (идемпотентно)"""
+    if len(_loaded) == len(PAGES):
+        return
+    started = time.perf_counter()
+    for page in PAGES:
+        page.load()
+    logger.info(f"Pages loaded in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+
+def _warmup():
+    try:
+        load_all()
+    except Exception:
+        logger.exception("Не удалось загрузить модули страниц")
+
+
+def init_app(server):
+    """
+    Отложенная загрузка страниц.
+
+    Колбэки страниц объявлены через dash.callback и попадают в приложение
+    при первом запросе, когда Dash отдает _dash-dependencies. Поэтому
+    загрузка страниц ставится первой в before_request - раньше обработчика
+    Dash; при WARMUP_PAGES модули импортируются заранее в фоновом потоке,
+    и первый запрос не ждет импорта.
+    """
+    server.before_request_funcs.setdefault(None, []).insert(0, load_all)
+    if WARMUP_PAGES:
+        threading.Thread(target=_warmup, name='pages-warmup', daemon=True).start()
+
+
+def not_found_layout(pathname):
+    """Легкая страница для неизвестных и еще не реализованных адресов"""
+    section = PLANNED.get(normalize_path(pathname))
+    if section:
+        title = f"Раздел «{section}» в разработке"
+        text = "Данные для этого раздела пока готовятся."
+    else:
+        title = "Страница не найдена"
+        text = f"Адрес {pathname} не существует."
+
+    return html.Div([
+        html.H1(
+            [html.I(className="fas fa-compass me-3 text-primary"), title],
+            className="display-6 mb-4"
+        ),
+        html.P(text, className="lead text-muted"),
+        dbc.Button("На главную", href="/", color="primary"),
+    ], className="py-5")
@@ -2,13 +2,16 @@
 Страница демографии
 """
 
-from dash import dcc, html
+from dash import dcc, html, Input, Output, callback
 import dash_bootstrap_components as dbc
 import plotly.graph_objects as go
-import plotly.express as px
-import pandas as pd
 import numpy as np
 
+from services import cache, migration, projection, trends
+
+# Горизонт прогноза численности населения, лет
+FORECAST_YEARS = 3
+
 def create_layout(app):
     """Создание лейаута страницы демографии"""
     
@@ -80,7 +83,32 @@ def create_layout(app):
                         html.H5("Возрастно-половая пирамида", className="mb-0"),
                     ]),
                     dbc.CardBody([
+                        dbc.Row([
+                            dbc.Col([
+                                dcc.Dropdown(
+                                    id='projection-area',
+                                    options=[
+                                        {'label': name, 'value': area}
+                                        for area, name in projection.AREA_NAMES.items()
+                                    ],
+                                    value='region',
+                                    clearable=False
+                                ),
+                            ], md=7),
+                            dbc.Col([
+                                dcc.Dropdown(
+                                    id='projection-scenario',
+                                    options=[
+                                        {'label': params['label'], 'value': name}
+                                        for name, params in projection.SCENARIOS.items()
+                                    ],
+                                    value='base',
+                                    clearable=False
+                                ),
+                            ], md=5),
+                        ], className="mb-2"),
                         dcc.Graph(
+                            id='age-pyramid',
                             figure=create_age_pyramid(),
                             config={'displayModeBar': True}
                         )
@@ -103,6 +131,77 @@ def create_layout(app):
             ], md=6)
         ]),
         
+        dbc.Row([
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardHeader([
+                        dbc.Row([
+                            dbc.Col(html.H5("Откуда и куда переезжают", className="mb-0")),
+                            dbc.Col(
+                                dcc.Dropdown(
+                                    id='migration-year',
+                                    options=[{'label': str(year), 'value': year} for year in migration.get_matrix().years],
+                                    value=migration.get_matrix().years[-1],
+                                    clearable=False
+                                ),
+                                md=2
+                            ),
+                            dbc.Col(
+                                dbc.RadioItems(
+                                    id='migration-scope',
+                                    options=[
+                                        {'label': 'Все', 'value': 'all'},
+                                        {'label': 'Внутри области', 'value': 'internal'},
+                                        {'label': 'Межрегиональные', 'value': 'external'},
+                                    ],
+                                    value='all',
+                                    inline=True
+                                ),
+                                md=5
+                            ),
+                        ], align="center")
+                    ]),
+                    dbc.CardBody([
+                        dbc.Row([
+                            dbc.Col(
+                                dcc.Graph(
+                                    id='migration-flows',
+                                    figure=create_migration_flows(),
+                                    config={'displayModeBar': False}
+                                ),
+                                md=8
+                            ),
+                            dbc.Col(
+                                dcc.Graph(
+                                    id='migration-balance',
+                                    figure=create_migration_balance(),
+                                    config={'displayModeBar': False}
+                                ),
+                                md=4
+                            ),
+                        ])
+                    ])
+                ], className="shadow-sm mb-4")
+            ])
+        ]),
+        
+        dbc.Row([
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardHeader([
+                        html.H5("Прогноз численности населения", className="mb-0"),
+                    ]),
+                    dbc.CardBody([
+                        dcc.Graph(
+                            id='projection-chart',
+                            figure=create_projection_chart(),
+                            config={'displayModeBar': True}
+                        )
+                    ])
+                ], className="shadow-sm mb-4")
+            ])
+        ]),
+        
         dbc.Row([
             dbc.Col([
                 dbc.Card([
@@ -136,17 +235,10 @@ def create_population_chart():
         hovertemplate='Год: %{x}<br>Население: %{y} тыс.<extra></extra>'
     ))
     
-    # Добавим линию тренда
-    z = np.polyfit(range(len(population)), population, 1)
-    p = np.poly1d(z)
-    fig.add_trace(go.Scatter(
-        x=years,
-        y=p(range(len(population))),
-        mode='lines',
-        line=dict(color='red', width=2, dash='dash'),
-        name='Тренд',
-        hovertemplate='Тренд: %{y:.0f} тыс.<extra></extra>'
-    ))
+    # Добавим линию тренда с прогнозом
+    trend = trends.get_trends({'population': population}, horizon=FORECAST_YEARS)['population']
+    future_years = [str(int(years[-1]) + h) for h in range(1, FORECAST_YEARS + 1)]
+    trends.add_forecast_traces(fig, years, future_years, trend, unit=' тыс.')
     
     fig.update_layout(
         title='Динамика численности населения (тыс. чел.)',
@@ -224,62 +316,149 @@ def create_death_rate_chart():
     
     return fig
 
-def create_age_pyramid():
-    """Возрастно-половая пирамида"""
-    age_groups = ['0-4', '5-9', '10-14', '15-19', '20-24', '25-29', '30-34', 
-                  '35-39', '40-44', '45-49', '50-54', '55-59', '60-64', 
-                  '65-69', '70-74', '75-79', '80-84', '85+']
-    
-    male = [35, 38, 40, 42, 45, 48, 52, 55, 58, 60, 58, 55, 50, 45, 38, 30, 20, 12]
-    female = [33, 36, 38, 41, 44, 47, 51, 54, 57, 62, 62, 62, 60, 58, 55, 50, 45, 38]
-    
-    # Создаем пирамиду (мужчины - отрицательные значения)
-    y = age_groups
-    x_male = [-m for m in male]
-    x_female = female
-    
-    fig = go.Figure()
+def create_age_pyramid(area='region', scenario='base'):
+    """
+    Возрастно-половая пирамида по годам прогноза.
+
+    Все годы заранее собраны в кадры анимации Plotly, поэтому ползунок
+    и проигрывание работают в браузере без запросов к серверу.
+    """
+    cube, y = projection.pyramid_cube(scenario)
+    values = cube[:, projection.area_index(area)] / 1000
+    years = projection.BASE_YEAR + np.arange(len(values))
+    title = f'Возрастно-половая структура: {projection.AREA_NAMES[area]}'
+    
+    def bars(index):
+        # Мужчины - отрицательные значения
+        male, female = np.round(values[index], 1)
+        return [
+            go.Bar(x=-male, customdata=male, text=[f"{m} тыс." for m in male]),
+            go.Bar(x=female, customdata=female, text=[f"{f} тыс." for f in female]),
+        ]
+    
+    fig = go.Figure(
+        data=bars(0),
+        frames=[
+            go.Frame(name=str(year), data=bars(i), traces=[0, 1], layout=dict(title_text=f'{title}, {year}'))
+            for i, year in enumerate(years)
+        ]
+    )
     
-    fig.add_trace(go.Bar(
+    fig.update_traces(
         y=y,
-        x=x_male,
-        name='Мужчины',
         orientation='h',
-        marker=dict(color='#1f77b4'),
-        hovertemplate='Возраст: %{y}<br>Мужчины: %{customdata} тыс.<extra></extra>',
-        customdata=male,
-        text=[f"{m} тыс." for m in male],
         textposition='inside',
         textangle=0,
         insidetextanchor='middle'
-    ))
-    
-    fig.add_trace(go.Bar(
-        y=y,
-        x=x_female,
+    )
+    fig.data[0].update(
+        name='Мужчины',
+        marker=dict(color='#1f77b4'),
+        hovertemplate='Возраст: %{y}<br>Мужчины: %{customdata} тыс.<extra></extra>'
+    )
+    fig.data[1].update(
         name='Женщины',
-        orientation='h',
         marker=dict(color='#ff7f0e'),
-        hovertemplate='Возраст: %{y}<br>Женщины: %{customdata} тыс.<extra></extra>',
-        customdata=female,
-        text=[f"{f} тыс." for f in female],
-        textposition='inside',
-        textangle=0,
-        insidetextanchor='middle'
-    ))
+        hovertemplate='Возраст: %{y}<br>Женщины: %{customdata} тыс.<extra></extra>'
+    )
+    
+    # Контур структуры на начало прогноза для сравнения с любым годом
+    for sex, sign, color in ((projection.MALE, -1, '#0d3d66'), (projection.FEMALE, 1, '#8a4200')):
+        fig.add_trace(go.Scatter(
+            y=y,
+            x=sign * values[0, sex],
+            name=f'{years[0]} год',
+            mode='lines',
+            line=dict(color=color, width=2, shape='vh'),
+            customdata=np.round(values[0, sex], 1),
+            hovertemplate=f'Возраст: %{{y}}<br>{years[0]}: %{{customdata}} тыс.<extra></extra>',
+            showlegend=sex == projection.MALE
+        ))
+    
+    # Симметричная шкала с круглым шагом, общая для всех лет
+    peak = values.max()
+    step = 10 ** np.floor(np.log10(peak))
+    if peak / step > 5:
+        step *= 2
+    count = int(np.ceil(peak / step))
+    ticks = np.arange(-count, count + 1) * step
+    
+    frame_args = lambda duration: {
+        'frame': {'duration': duration, 'redraw': False},
+        'transition': {'duration': 0},
+        'mode': 'immediate',
+    }
     
     fig.update_layout(
-        title='Возрастно-половая структура населения',
+        title=f'{title}, {years[0]}',
         xaxis_title='Тыс. человек',
         yaxis_title='Возрастные группы',
         barmode='overlay',
         template='plotly_white',
-        height=500,
+        height=560,
         bargap=0.1,
         xaxis=dict(
-            tickvals=[-80, -60, -40, -20, 0, 20, 40, 60, 80],
-            ticktext=['80', '60', '40', '20', '0', '20', '40', '60', '80']
+            range=[ticks[0], ticks[-1]],
+            tickvals=ticks,
+            ticktext=[f'{abs(t):.6g}' for t in ticks]
         ),
+        legend=dict(
+            orientation="h",
+            yanchor="bottom",
+            y=1.02,
+            xanchor="center",
+            x=0.5
+        ),
+        updatemenus=[dict(
+            type='buttons',
+            direction='left',
+            showactive=False,
+            x=0, y=-0.12,
+            xanchor='left', yanchor='top',
+            buttons=[
+                dict(label='▶', method='animate', args=[None, dict(frame_args(300), fromcurrent=True)]),
+                dict(label='❚❚', method='animate', args=[[None], frame_args(0)]),
+            ]
+        )],
+        sliders=[dict(
+            active=0,
+            x=0.1, y=-0.12,
+            len=0.9,
+            xanchor='left', yanchor='top',
+            currentvalue=dict(prefix='Год: '),
+            steps=[
+                dict(label=str(year), method='animate', args=[[str(year)], frame_args(0)])
+                for year in years
+            ]
+        )],
+        margin=dict(b=120)
+    )
+    
+    return fig
+
+def create_projection_chart(area='region'):
+    """Численность населения по сценариям прогноза"""
+    colors = {'base': '#1f77b4', 'low': '#d62728', 'high': '#2ca02c'}
+    
+    fig = go.Figure()
+    for scenario, params in projection.SCENARIOS.items():
+        result = projection.project(scenario)
+        fig.add_trace(go.Scatter(
+            x=result['years'],
+            y=projection.totals(result, area) / 1000,
+            name=params['label'],
+            mode='lines',
+            line=dict(color=colors.get(scenario), width=3 if scenario == 'base' else 2),
+            hovertemplate=f"{params['label']}<br>Год: %{{x}}<br>Население: %{{y:.1f}} тыс.<extra></extra>"
+        ))
+    
+    fig.update_layout(
+        title=f'Прогноз численности: {projection.AREA_NAMES[area]} (тыс. чел.)',
+        xaxis_title='Год',
+        yaxis_title='Тыс. человек',
+        template='plotly_white',
+        height=400,
+        hovermode='x unified',
         legend=dict(
             orientation="h",
             yanchor="bottom",
@@ -292,10 +471,12 @@ def create_age_pyramid():
     return fig
 
 def create_migration_chart():
-    """График миграции"""
-    years = ['2019', '2020', '2021', '2022', '2023', '2024']
-    arrival = [28.5, 24.2, 26.8, 29.4, 31.2, 32.5]
-    departure = [26.8, 23.5, 25.2, 27.8, 29.5, 30.8]
+    """График миграции: межрегиональные потоки области по матрице переездов"""
+    matrix = migration.get_matrix()
+    years = [str(year) for year in matrix.years]
+    totals = np.array([matrix.external_totals(year) for year in matrix.years]) / 1000
+    arrival = np.round(totals[:, 0], 1).tolist()
+    departure = np.round(totals[:, 1], 1).tolist()
     
     fig = go.Figure()
     
@@ -353,6 +534,72 @@ def create_migration_chart():
     
     return fig
 
+def create_migration_flows(year=None, scope='all', limit=12):
+    """Диаграмма Санкея крупнейших миграционных потоков года"""
+    matrix = migration.get_matrix()
+    year = year or matrix.years[-1]
+    flows = matrix.top_flows(year, scope, limit)
+    
+    # Отправители слева, получатели справа: встречные потоки не образуют циклов
+    sources = sorted({o for o, _, _ in flows}, key=lambda i: (i is None, i))
+    targets = sorted({d for _, d, _ in flows}, key=lambda i: (i is None, i))
+    labels = [migration.area_label(i) for i in sources] + [migration.area_label(i) for i in targets]
+    source_index = {area: n for n, area in enumerate(sources)}
+    target_index = {area: n + len(sources) for n, area in enumerate(targets)}
+    
+    fig = go.Figure(go.Sankey(
+        arrangement='snap',
+        node=dict(
+            label=labels,
+            pad=12,
+            thickness=14,
+            color=['#1f77b4'] * len(sources) + ['#2ca02c'] * len(targets)
+        ),
+        link=dict(
+            source=[source_index[o] for o, _, _ in flows],
+            target=[target_index[d] for _, d, _ in flows],
+            value=[c for _, _, c in flows],
+            color='rgba(160, 160, 160, 0.35)',
+            hovertemplate='%{source.label} → %{target.label}: %{value} чел.<extra></extra>'
+        )
+    ))
+    
+    fig.update_layout(
+        title=f'Миграционные потоки за {year} год',
+        template='plotly_white',
+        height=520,
+        margin=dict(l=20, r=20, t=50, b=20)
+    )
+    
+    return fig
+
+def create_migration_balance(year=None):
+    """Миграционное сальдо муниципалитетов за год (все переезды, включая внутриобластные)"""
+    matrix = migration.get_matrix()
+    year = year or matrix.years[-1]
+    net = matrix.balance(year)['net'][:migration.N_LOCAL]
+    order = np.argsort(net)
+    names = [migration.area_label(i) for i in order.tolist()]
+    values = net[order].astype(int).tolist()
+    
+    fig = go.Figure(go.Bar(
+        x=values,
+        y=names,
+        orientation='h',
+        marker_color=['#2ca02c' if v > 0 else '#d62728' for v in values],
+        hovertemplate='%{y}: %{x:+d} чел.<extra></extra>'
+    ))
+    
+    fig.update_layout(
+        title=f'Миграционное сальдо, {year}',
+        xaxis_title='Человек',
+        template='plotly_white',
+        height=520,
+        margin=dict(l=20, r=20, t=50, b=40)
+    )
+    
+    return fig
+
 def create_demographic_trends():
     """Демографические тренды"""
     years = ['2015', '2016', '2017', '2018', '2019', '2020', '2021', '2022', '2023']
@@ -415,4 +662,43 @@ def create_demographic_trends():
         )
     )
     
-    return fig
\ No newline at end of file
+    return fig
+
+@callback(
+    [Output('age-pyramid', 'figure'),
+     Output('projection-chart', 'figure')],
+    [Input('projection-area', 'value'),
+     Input('projection-scenario', 'value')],
+    prevent_initial_call=True
+)
+def update_projection(area, scenario):
+    """Пирамида и прогноз для выбранной территории и сценария"""
+    pyramid = cache.get_or_compute(
+        'age-pyramids', (area, scenario), lambda: create_age_pyramid(area, scenario), maxsize=64
+    )
+    return pyramid, create_projection_chart(area)
+
+@callback(
+    Output('migration-flows', 'figure'),
+    [Input('migration-year', 'value'),
+     Input('migration-scope', 'value')],
+    prevent_initial_call=True
+)
+def update_migration_flows(year, scope):
+    """Потоки за выбранный год; фигура кэшируется по версии матрицы"""
+    matrix = migration.get_matrix()
+    return cache.get_or_compute(
+        'migration-flows', (matrix.version, year, scope), lambda: create_migration_flows(year, scope), maxsize=64
+    )
+
+@callback(
+    Output('migration-balance', 'figure'),
+    [Input('migration-year', 'value')],
+    prevent_initial_call=True
+)
+def update_migration_balance(year):
+    """Сальдо муниципалитетов за выбранный год"""
+    matrix = migration.get_matrix()
+    return cache.get_or_compute(
+        'migration-balance', (matrix.version, year), lambda: create_migration_balance(year), maxsize=16
+    )
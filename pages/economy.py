@@ -2,12 +2,18 @@
 Страница экономики
 """
 
-from dash import dcc, html
+import dash
+from dash import dcc, html, Input, Output, State, callback
 import dash_bootstrap_components as dbc
 import plotly.graph_objects as go
-import plotly.express as px
-import pandas as pd
-import numpy as np
+
+from services import enterprises, municipalities, okved
+
+# Предприятий в рейтинге
+TOP_ENTERPRISES = 10
+
+# Уровней дерева ОКВЭД, отображаемых и подгружаемых за раз
+TREE_DEPTH = 2
 
 def create_layout(app):
     """Создание лейаута страницы экономики"""
@@ -81,9 +87,11 @@ def create_layout(app):
                     ]),
                     dbc.CardBody([
                         dcc.Graph(
+                            id='economy-structure',
                             figure=create_economy_structure(),
                             config={'displayModeBar': True}
-                        )
+                        ),
+                        dcc.Store(id='economy-structure-expanded', data=[])
                     ])
                 ], className="shadow-sm mb-4")
             ], md=6),
@@ -94,7 +102,29 @@ def create_layout(app):
                         html.H5("Ключевые предприятия", className="mb-0"),
                     ]),
                     dbc.CardBody([
+                        dbc.Row([
+                            dbc.Col([
+                                dcc.Dropdown(
+                                    id='enterprise-sector',
+                                    options=[
+                                        {'label': f"{code}. {name}", 'value': code}
+                                        for code, name in okved.SECTION_NAMES.items()
+                                    ],
+                                    multi=True,
+                                    placeholder="Все виды деятельности"
+                                ),
+                            ], md=6),
+                            dbc.Col([
+                                dcc.Dropdown(
+                                    id='enterprise-municipality',
+                                    options=municipalities.dropdown_options(include_all=False),
+                                    multi=True,
+                                    placeholder="Все муниципалитеты"
+                                ),
+                            ], md=6),
+                        ], className="mb-2"),
                         dcc.Graph(
+                            id='top-enterprises-chart',
                             figure=create_top_enterprises(),
                             config={'displayModeBar': True}
                         )
@@ -243,48 +273,51 @@ def create_industry_chart():
     return fig
 
 def create_economy_structure():
-    """Структура экономики"""
-    sectors = ['Обрабатывающие производства', 'Торговля', 'Транспорт', 
-               'Строительство', 'Сельское хозяйство', 'Добыча полезных',
-               'Энергетика', 'Образование', 'Здравоохранение', 'Прочее']
-    
-    shares = [32.5, 15.2, 8.8, 7.5, 6.2, 5.8, 5.5, 4.8, 4.2, 9.5]
+    """
+    Структура выручки предприятий по ОКВЭД: разделы и классы.
+
+    Подклассы и группы (несколько тысяч узлов) в фигуру не входят и
+    подгружаются по щелчку на узел, см. expand_economy_structure.
+    """
+    tree = enterprises.get_sector_tree()
+    nodes = tree.subtree(None, TREE_DEPTH, 'revenue')
     
-    # Создадим treemap для лучшей визуализации структуры
     fig = go.Figure(go.Treemap(
-        labels=sectors,
-        parents=[''] * len(sectors),
-        values=shares,
-        textinfo="label+percent entry",
-        hovertemplate='<b>%{label}</b><br>Доля: %{percentRoot:.1%}<br>ВРП: %{value}%<extra></extra>',
-        marker=dict(
-            colors=shares,
-            colorscale='Blues',
-            showscale=True,
-            colorbar=dict(title="Доля, %")
+        ids=nodes['ids'],
+        labels=nodes['labels'],
+        parents=nodes['parents'],
+        values=nodes['values'],
+        customdata=nodes['customdata'],
+        branchvalues='total',
+        maxdepth=TREE_DEPTH,
+        textinfo="label+percent root",
+        hovertemplate=(
+            '<b>%{label}</b><br>Выручка: %{value:,.0f} млн ₽<br>Доля: %{percentRoot:.1%}'
+            '<br>Предприятий: %{customdata[0]:,.0f}<br>Работников: %{customdata[2]:,.0f}<extra></extra>'
         )
     ))
     
     fig.update_layout(
-        title='Структура ВРП по видам деятельности',
+        title='Структура выручки предприятий по видам деятельности',
         height=500,
-        margin=dict(l=20, r=20, t=50, b=20)
+        margin=dict(l=20, r=20, t=50, b=20),
+        uirevision='economy-structure'
     )
     
     return fig
 
-def create_top_enterprises():
-    """Топ предприятий"""
-    enterprises = ['Тулачермет', 'Щекиноазот', 'АК ТУЛАМАШЗАВОД', 
-                   'Новомосковская ГРЭС', 'ЕВРАЗ Ванадий Тула',
-                   'Тульский патронный завод', 'Полипласт', 
-                   'Косогорский металлургический завод']
-    
-    revenue = [85.2, 72.5, 45.8, 38.2, 32.5, 28.9, 25.4, 22.1]
+def create_top_enterprises(sectors=None, municipality_codes=None, n=TOP_ENTERPRISES):
+    """Топ предприятий по выручке из реестра с фильтрами по разделу ОКВЭД и муниципалитету"""
+    registry = enterprises.get_registry()
+    indices = registry.top(
+        n,
+        [okved.SECTION_CODES.index(code) for code in sectors or []],
+        [municipalities.CODES.index(code) for code in municipality_codes or []]
+    )
     
-    # Сортируем по убыванию
-    sorted_data = sorted(zip(enterprises, revenue), key=lambda x: x[1], reverse=True)
-    ent_sorted, rev_sorted = zip(*sorted_data)
+    # Выручка в реестре в млн ₽; порядок - по убыванию, крупнейшее сверху
+    ent_sorted = [str(name) for name in registry.names[indices]][::-1]
+    rev_sorted = (registry.revenue[indices] / 1000)[::-1]
     
     fig = go.Figure()
     fig.add_trace(go.Bar(
@@ -297,7 +330,7 @@ def create_top_enterprises():
             showscale=True,
             colorbar=dict(title="Млрд ₽")
         ),
-        text=[f"{r:.1f} млрд ₽" for r in rev_sorted],
+        text=[f"{r:.2f} млрд ₽" if r < 1 else f"{r:.1f} млрд ₽" for r in rev_sorted],
         textposition='outside',
         hovertemplate='<b>%{y}</b><br>Выручка: %{x:.1f} млрд ₽<extra></extra>'
     ))
@@ -400,4 +433,45 @@ def create_investment_by_sector():
         margin=dict(l=50, r=50, t=50, b=100)
     )
     
-    return fig
\ No newline at end of file
+    return fig
+
+@callback(
+    Output('top-enterprises-chart', 'figure'),
+    [Input('enterprise-sector', 'value'),
+     Input('enterprise-municipality', 'value')],
+    prevent_initial_call=True
+)
+def update_top_enterprises(sectors, municipality_codes):
+    """Рейтинг предприятий по выбранным разделам и муниципалитетам"""
+    return create_top_enterprises(sectors, municipality_codes)
+
+@callback(
+    [Output('economy-structure', 'figure'),
+     Output('economy-structure-expanded', 'data')],
+    [Input('economy-structure', 'clickData')],
+    [State('economy-structure-expanded', 'data')],
+    prevent_initial_call=True
+)
+def expand_economy_structure(click_data, expanded):
+    """Подгрузка потомков узла дерева ОКВЭД, на который щелкнули"""
+    tree = enterprises.get_sector_tree()
+    node_id = (click_data or {}).get('points', [{}])[0].get('id')
+    expanded = expanded or []
+    if node_id not in tree or node_id in expanded:
+        raise dash.exceptions.PreventUpdate
+    
+    # Уже переданные узлы: начальные уровни и ранее раскрытые поддеревья
+    loaded = set(tree.subtree(None, TREE_DEPTH)['ids'])
+    for expanded_id in expanded:
+        loaded.update(tree.subtree(expanded_id, TREE_DEPTH)['ids'])
+    
+    nodes = tree.subtree(node_id, TREE_DEPTH, 'revenue')
+    new = [i for i, child_id in enumerate(nodes['ids']) if child_id not in loaded]
+    if not new:
+        return dash.no_update, expanded + [node_id]
+    
+    patch = dash.Patch()
+    for field in ('ids', 'labels', 'parents', 'values', 'customdata'):
+        patch['data'][0][field].extend([nodes[field][i] for i in new])
+    patch['data'][0]['level'] = node_id
+    return patch, expanded + [node_id]
@@ -0,0 +1,166 @@
+"""
+Страница «Все показатели»: каталог с поиском
+"""
+
+import dash
+from dash import dcc, html, Input, Output, State, callback
+import dash_bootstrap_components as dbc
+
+import pages
+from services import catalog
+
+# Подсказок в выпадающем списке
+SUGGESTION_LIMIT = 20
+
+# Строк в таблице результатов
+RESULTS_LIMIT = 50
+
+def create_layout(app):
+    """Создание лейаута страницы каталога показателей"""
+    indicators = catalog.get_catalog()
+
+    return html.Div([
+        dbc.Row([
+            dbc.Col([
+                html.H1(
+                    [
+                        html.I(className="fas fa-list me-3 text-primary"),
+                        "Все показатели"
+                    ],
+                    className="display-4 mb-4"
+                ),
+                html.P(
+                    f"Каталог из {len(indicators):,} показателей по {len(indicators.sources)} источникам: "
+                    "поиск по названию, коду, единице измерения и источнику".replace(',', ' '),
+                    className="lead text-muted mb-5"
+                ),
+            ])
+        ]),
+
+        dbc.Row([
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardBody([
+                        # Подсказки приходят с сервера по мере набора: options не содержит каталог
+                        dcc.Dropdown(
+                            id='indicator-search',
+                            options=[],
+                            placeholder="Начните вводить название, код или источник показателя",
+                            searchable=True,
+                            clearable=True
+                        ),
+                        html.Div(id='indicator-details', className="mt-3"),
+                    ])
+                ], className="shadow-sm mb-4")
+            ])
+        ]),
+
+        dbc.Row([
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardHeader([
+                        html.H5("Результаты поиска", className="mb-0"),
+                    ]),
+                    dbc.CardBody(
+                        id='indicator-results',
+                        children=create_results_table('')
+                    )
+                ], className="shadow-sm")
+            ])
+        ])
+    ])
+
+def _option(entry, query=''):
+    """
+    Опция подсказки. Dropdown дополнительно фильтрует опции по вхождению
+    строки поиска; в search добавляется запрос, чтобы найденное по основам
+    слов («зарплата» -> «заработная плата») не отсеивалось в браузере.
+    """
+    label = f"{entry['name']} ({entry['code']})"
+    return {'label': label, 'value': entry['code'], 'search': f"{label} {query}"}
+
+def create_results_table(query):
+    """Таблица найденных показателей (не больше RESULTS_LIMIT строк)"""
+    if not query:
+        return html.P("Введите запрос в строку поиска.", className="text-muted mb-0")
+
+    results, total = catalog.get_catalog().search(query, RESULTS_LIMIT)
+    if not total:
+        return html.P(f"По запросу «{query}» ничего не найдено.", className="text-muted mb-0")
+
+    shown = f"Найдено: {total}" + (f", показаны первые {len(results)}" if total > len(results) else "")
+    header = html.Thead(html.Tr([
+        html.Th("Код"), html.Th("Показатель"), html.Th("Единица"),
+        html.Th("Периодичность"), html.Th("Источник"),
+    ]))
+    rows = [
+        html.Tr([
+            html.Td(html.Code(entry['code'])),
+            html.Td(entry['name']),
+            html.Td(entry['unit']),
+            html.Td(entry['periodicity']),
+            html.Td(entry['source']),
+        ])
+        for entry in results
+    ]
+    return html.Div([
+        html.P(shown, className="text-muted"),
+        dbc.Table([header, html.Tbody(rows)], striped=True, hover=True, size="sm", responsive=True),
+    ])
+
+def create_indicator_details(code):
+    """Карточка выбранного показателя"""
+    entry = catalog.get_catalog().get(code)
+    if entry is None:
+        return None
+
+    items = [
+        ("Код", html.Code(entry['code'])),
+        ("Разрез", entry['breakdown']),
+        ("Единица измерения", entry['unit']),
+        ("Периодичность", entry['periodicity']),
+        ("Источник", entry['source']),
+    ]
+    page = pages.resolve(entry['page']) if entry['page'] else None
+    return dbc.Alert([
+        html.H5(entry['name'], className="alert-heading"),
+        html.Dl(
+            [element for name, value in items for element in (html.Dt(name, className="col-sm-3"), html.Dd(value, className="col-sm-9"))],
+            className="row mb-0"
+        ),
+        dbc.Button(f"Открыть раздел «{page.title}»", href=page.path, color="primary", size="sm", className="mt-2")
+        if page else None,
+    ], color="light", className="mb-0")
+
+@callback(
+    [Output('indicator-search', 'options'),
+     Output('indicator-results', 'children')],
+    [Input('indicator-search', 'search_value')],
+    [State('indicator-search', 'value')],
+    prevent_initial_call=True
+)
+def search_indicators(search_value, value):
+    """
+    Подсказки по мере набора: на сервере ищется по индексу, в браузер
+    уходят только первые SUGGESTION_LIMIT совпадений.
+    """
+    if not search_value:
+        # Строка поиска очищается и при выборе значения: результаты остаются прежними
+        raise dash.exceptions.PreventUpdate
+
+    results, _ = catalog.get_catalog().search(search_value, SUGGESTION_LIMIT)
+    options = [_option(entry, search_value) for entry in results]
+    # Выбранное значение должно оставаться среди опций
+    selected = catalog.get_catalog().get(value) if value else None
+    if selected is not None and all(option['value'] != value for option in options):
+        options.append(_option(selected))
+    return options, create_results_table(search_value)
+
+@callback(
+    Output('indicator-details', 'children'),
+    [Input('indicator-search', 'value')],
+    prevent_initial_call=True
+)
+def show_indicator(code):
+    """Карточка показателя, выбранного в поиске"""
+    return create_indicator_details(code) if code else None
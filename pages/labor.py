@@ -2,13 +2,14 @@
 Страница рынка труда
 """
 
-from dash import dcc, html
+from dash import dcc, html, Input, Output, callback
 import dash_bootstrap_components as dbc
 import plotly.graph_objects as go
-import plotly.express as px
-import pandas as pd
+from plotly.colors import qualitative
 import numpy as np
 
+from services import municipalities, salaries, seasonal, vacancies
+
 def create_layout(app):
     """Создание лейаута страницы рынка труда"""
     
@@ -36,7 +37,28 @@ def create_layout(app):
                         html.H4("Уровень безработицы", className="card-title"),
                         html.H2("3.4%", className="text-primary"),
                         html.P("↓ 0.5% за год", className="text-success"),
+                        dbc.Row([
+                            dbc.Col(
+                                dcc.Dropdown(
+                                    id='unemployment-area',
+                                    options=[{'label': 'Тульская область', 'value': 'region'}]
+                                    + municipalities.dropdown_options(include_all=False),
+                                    value='region',
+                                    clearable=False
+                                ),
+                                md=7
+                            ),
+                            dbc.Col(
+                                dbc.Switch(
+                                    id='unemployment-adjusted',
+                                    label="Без сезонности",
+                                    value=False
+                                ),
+                                md=5
+                            ),
+                        ], align="center"),
                         dcc.Graph(
+                            id='unemployment-chart',
                             figure=create_unemployment_chart(),
                             config={'displayModeBar': False}
                         )
@@ -94,7 +116,21 @@ def create_layout(app):
                         html.H5("Вакансии по сферам", className="mb-0"),
                     ]),
                     dbc.CardBody([
+                        dbc.RadioItems(
+                            id='vacancies-window',
+                            options=[{'label': f"{days} дн.", 'value': days} for days in vacancies.WINDOWS],
+                            value=30,
+                            inline=True
+                        ),
+                        dcc.Dropdown(
+                            id='vacancies-municipality',
+                            options=municipalities.dropdown_options(include_all=False),
+                            multi=True,
+                            placeholder="Все муниципалитеты",
+                            className="mt-2"
+                        ),
                         dcc.Graph(
+                            id='vacancies-chart',
                             figure=create_vacancies_chart(),
                             config={'displayModeBar': True}
                         )
@@ -113,24 +149,54 @@ def create_layout(app):
                         dcc.Graph(
                             figure=create_municipality_salary_chart(),
                             config={'displayModeBar': True}
-                        )
+                        ),
+                        dbc.Row([
+                            dbc.Col([
+                                dcc.Dropdown(
+                                    id='salary-municipalities',
+                                    options=municipalities.dropdown_options(include_all=False),
+                                    multi=True,
+                                    placeholder="Выберите муниципалитеты для сравнения с областью"
+                                ),
+                                html.Div(
+                                    id='salary-summary',
+                                    children=create_salary_summary(),
+                                    className="mt-3"
+                                ),
+                            ], md=4),
+                            dbc.Col([
+                                dcc.Graph(
+                                    id='salary-distribution',
+                                    figure=create_salary_distribution_chart(),
+                                    config={'displayModeBar': False}
+                                )
+                            ], md=8),
+                        ], className="mt-3")
                     ])
                 ], className="shadow-sm")
             ])
         ])
     ])
 
-def create_unemployment_chart():
-    """График безработицы"""
+def create_unemployment_chart(area='region', adjusted=False):
+    """
+    График безработицы: помесячно за два последних года. С adjusted -
+    ряд без сезонной составляющей из services.seasonal.
+    """
     months = ['Янв', 'Фев', 'Мар', 'Апр', 'Май', 'Июн', 
               'Июл', 'Авг', 'Сен', 'Окт', 'Ноя', 'Дек']
+    dates, values = seasonal.series('unemployment', area, 'adjusted' if adjusted else 'observed')
+    _, trend = seasonal.series('unemployment', area, 'trend')
+    years = dates.astype('datetime64[Y]').astype(int) + 1970
+    last_year = years.max()
+    current, previous = years == last_year, years == last_year - 1
     
     fig = go.Figure()
     fig.add_trace(go.Scatter(
         x=months,
-        y=[3.8, 3.7, 3.6, 3.5, 3.4, 3.3, 3.2, 3.1, 3.2, 3.3, 3.4, 3.4],
+        y=values[current],
         mode='lines+markers',
-        name='2024',
+        name=str(last_year),
         line=dict(color='#1f77b4', width=3),
         fill='tozeroy',
         fillcolor='rgba(31, 119, 180, 0.1)'
@@ -138,14 +204,23 @@ def create_unemployment_chart():
     
     fig.add_trace(go.Scatter(
         x=months,
-        y=[4.2, 4.1, 4.0, 3.9, 3.8, 3.7, 3.6, 3.5, 3.6, 3.7, 3.8, 3.9],
+        y=values[previous],
         mode='lines+markers',
-        name='2023',
+        name=str(last_year - 1),
         line=dict(color='#ff7f0e', width=2, dash='dash')
     ))
     
+    if adjusted:
+        fig.add_trace(go.Scatter(
+            x=months,
+            y=trend[current],
+            mode='lines',
+            name=f'Тренд {last_year}',
+            line=dict(color='#2ca02c', width=2, dash='dot')
+        ))
+    
     fig.update_layout(
-        title='Динамика уровня безработицы (%)',
+        title='Безработица без сезонности (%)' if adjusted else 'Динамика уровня безработицы (%)',
         xaxis_title='Месяц',
         yaxis_title='%',
         hovermode='x unified',
@@ -158,22 +233,38 @@ def create_unemployment_chart():
     return fig
 
 def create_salary_chart():
-    """График зарплат"""
-    years = ['2020', '2021', '2022', '2023', '2024']
+    """График зарплат: средняя, медиана и границы 1-го и 9-го дециля"""
+    summary = salaries.get_sketches().summary(keep=('year',))
+    years = [str(year) for year in salaries.YEARS]
+    deciles = summary['deciles']
     
     fig = go.Figure()
     fig.add_trace(go.Bar(
         x=years,
-        y=[42300, 45800, 49200, 52100, 54280],
+        y=summary['mean'],
         name='Средняя зарплата',
         marker_color='#1f77b4',
-        text=[f"{v:,.0f} ₽".replace(',', ' ') for v in [42300, 45800, 49200, 52100, 54280]],
+        text=[f"{v:,.0f} ₽".replace(',', ' ') for v in summary['mean']],
         textposition='outside',
         textfont=dict(size=10)
     ))
+    fig.add_trace(go.Scatter(
+        x=years,
+        y=summary['median'],
+        name='Медиана',
+        mode='lines+markers',
+        line=dict(color='#ff7f0e', width=2),
+        error_y=dict(
+            type='data', symmetric=False,
+            array=deciles[:, -1] - summary['median'],
+            arrayminus=summary['median'] - deciles[:, 0],
+            color='rgba(255, 127, 14, 0.5)'
+        ),
+        hovertemplate='Медиана: %{y:,.0f} ₽<extra></extra>'
+    ))
     
     fig.update_layout(
-        title='Динамика средней зарплаты',
+        title='Средняя и медианная зарплата (P10-P90)',
         xaxis_title='Год',
         yaxis_title='Рублей',
         template='plotly_white',
@@ -255,24 +346,25 @@ def create_industry_employment_chart():
     
     return fig
 
-def create_vacancies_chart():
-    """Вакансии по сферам"""
-    sectors = ['Продажи', 'Рабочие', 'IT', 'Производство', 'Строительство', 
-               'Транспорт', 'Медицина', 'Образование']
-    vacancies = [2450, 2100, 1850, 1650, 1200, 980, 750, 620]
+def create_vacancies_chart(window=30, municipality_codes=None):
+    """Вакансии по сферам за последние window дней из счетчиков потока вакансий"""
+    municipality_ids = [municipalities.CODES.index(code) for code in municipality_codes or []]
+    counts = vacancies.get_stream().counts(window, municipality_ids)
+    sectors = [vacancies.SPHERE_NAMES[code] for code in vacancies.SPHERE_CODES]
+    vacancies_count = counts.tolist()
     
     fig = go.Figure(data=[go.Pie(
         labels=sectors,
-        values=vacancies,
+        values=vacancies_count,
         hole=.3,
-        marker=dict(colors=px.colors.qualitative.Set3),
+        marker=dict(colors=qualitative.Set3),
         textinfo='label+percent',
         textposition='auto',
         hovertemplate='<b>%{label}</b><br>Вакансий: %{value}<br>Доля: %{percent}<extra></extra>'
     )])
     
     fig.update_layout(
-        title='Структура вакансий',
+        title=f'Структура вакансий за {window} дн. (всего {sum(vacancies_count):,})'.replace(',', ' '),
         height=500,
         showlegend=False,
         margin=dict(l=20, r=20, t=50, b=20)
@@ -281,35 +373,138 @@ def create_vacancies_chart():
     return fig
 
 def create_municipality_salary_chart():
-    """Зарплаты по муниципалитетам"""
-    cities = ['Тула', 'Новомосковск', 'Алексин', 'Щекино', 'Ефремов', 
-              'Узловая', 'Донской', 'Кимовск', 'Богородицк', 'Суворов']
-    salaries = [58900, 51200, 47800, 49500, 44200, 45800, 42100, 43500, 44800, 41200]
-    
-    # Сортируем по убыванию
-    sorted_data = sorted(zip(cities, salaries), key=lambda x: x[1], reverse=True)
-    cities_sorted, salaries_sorted = zip(*sorted_data)
+    """Зарплаты по муниципалитетам: медиана, средняя и разброс P10-P90 за последний год"""
+    summary = salaries.get_sketches().summary(year_ids=[len(salaries.YEARS) - 1], keep=('municipality',))
+    order = np.argsort(-summary['median'])
+    cities_sorted = [municipalities.NAMES[municipalities.CODES[i]] for i in order]
+    medians = summary['median'][order]
+    deciles = summary['deciles'][order]
     
     fig = go.Figure()
     fig.add_trace(go.Bar(
         x=cities_sorted,
-        y=salaries_sorted,
-        marker_color=salaries_sorted,
+        y=medians,
+        marker_color=medians,
         marker_colorscale='Viridis',
-        text=[f"{s:,.0f} ₽".replace(',', ' ') for s in salaries_sorted],
-        textposition='outside',
-        textangle=0,
-        hovertemplate='<b>%{x}</b><br>Средняя зарплата: %{y:,.0f} ₽<extra></extra>'
+        error_y=dict(
+            type='data', symmetric=False,
+            array=deciles[:, -1] - medians,
+            arrayminus=medians - deciles[:, 0],
+            color='rgba(0, 0, 0, 0.3)'
+        ),
+        customdata=np.column_stack([
+            summary['mean'][order], deciles[:, 0], deciles[:, -1],
+            summary['decile_ratio'][order], summary['gini'][order]
+        ]),
+        hovertemplate=(
+            '<b>%{x}</b><br>Медиана: %{y:,.0f} ₽<br>Средняя: %{customdata[0]:,.0f} ₽'
+            '<br>P10-P90: %{customdata[1]:,.0f} - %{customdata[2]:,.0f} ₽'
+            '<br>Децильный коэффициент: %{customdata[3]:.2f}<br>Джини: %{customdata[4]:.3f}<extra></extra>'
+        )
     ))
     
     fig.update_layout(
-        title='Среднемесячная зарплата по муниципалитетам',
+        title=f'Медианная зарплата по муниципалитетам ({salaries.YEARS[-1]})',
         xaxis_title='',
         yaxis_title='Рублей',
         template='plotly_white',
         height=400,
         xaxis_tickangle=-45,
-        margin=dict(l=50, r=50, t=50, b=100)
+        margin=dict(l=50, r=50, t=50, b=120)
     )
     
-    return fig
\ No newline at end of file
+    return fig
+
+def _selection_summary(municipality_codes):
+    municipality_ids = [municipalities.CODES.index(code) for code in municipality_codes or []]
+    return salaries.get_sketches().summary(municipality_ids, None, [len(salaries.YEARS) - 1])
+
+def create_salary_summary(municipality_codes=None):
+    """Показатели распределения зарплат выбранных муниципалитетов (или области)"""
+    summary = _selection_summary(municipality_codes)
+    rub = lambda value: f"{value:,.0f} ₽".replace(',', ' ')
+    rows = [
+        ("Медиана", rub(summary['median'])),
+        ("Средняя", rub(summary['mean'])),
+        ("1-й дециль (P10)", rub(summary['deciles'][0])),
+        ("9-й дециль (P90)", rub(summary['deciles'][-1])),
+        ("Децильный коэффициент", f"{summary['decile_ratio']:.2f}"),
+        ("Индекс Джини", f"{summary['gini']:.3f}"),
+    ]
+    return html.Div([
+        html.H6(
+            ", ".join(municipalities.NAMES[code] for code in municipality_codes) if municipality_codes
+            else "Тульская область"
+        ),
+        dbc.Table(
+            [html.Tbody([html.Tr([html.Td(name), html.Td(value, className="text-end")]) for name, value in rows])],
+            size="sm", borderless=True, className="mb-0"
+        )
+    ])
+
+def create_salary_distribution_chart(municipality_codes=None):
+    """Децили зарплат выбранных муниципалитетов в сравнении с областью"""
+    region = _selection_summary(None)
+    percents = [f"P{int(q * 100)}" for q in salaries.DECILES]
+    
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=percents,
+        y=region['deciles'],
+        name='Тульская область',
+        mode='lines+markers',
+        line=dict(color='#a9a9a9', width=2, dash='dash'),
+        hovertemplate='%{x}: %{y:,.0f} ₽<extra>Область</extra>'
+    ))
+    if municipality_codes:
+        selection = _selection_summary(municipality_codes)
+        fig.add_trace(go.Scatter(
+            x=percents,
+            y=selection['deciles'],
+            name='Выбранные муниципалитеты',
+            mode='lines+markers',
+            line=dict(color='#1f77b4', width=3),
+            hovertemplate='%{x}: %{y:,.0f} ₽<extra>Выбранные</extra>'
+        ))
+    
+    fig.update_layout(
+        title=f'Децили зарплаты ({salaries.YEARS[-1]})',
+        xaxis_title='',
+        yaxis_title='Рублей',
+        template='plotly_white',
+        height=300,
+        margin=dict(l=50, r=20, t=50, b=40),
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+    )
+    
+    return fig
+
+@callback(
+    Output('unemployment-chart', 'figure'),
+    [Input('unemployment-area', 'value'),
+     Input('unemployment-adjusted', 'value')],
+    prevent_initial_call=True
+)
+def update_unemployment_chart(area, adjusted):
+    """Безработица территории: исходный или сезонно скорректированный ряд"""
+    return create_unemployment_chart(area, adjusted)
+
+@callback(
+    Output('vacancies-chart', 'figure'),
+    [Input('vacancies-window', 'value'),
+     Input('vacancies-municipality', 'value')],
+    prevent_initial_call=True
+)
+def update_vacancies_chart(window, municipality_codes):
+    """Вакансии за выбранное окно и муниципалитеты"""
+    return create_vacancies_chart(window, municipality_codes)
+
+@callback(
+    [Output('salary-summary', 'children'),
+     Output('salary-distribution', 'figure')],
+    [Input('salary-municipalities', 'value')],
+    prevent_initial_call=True
+)
+def update_salary_distribution(municipality_codes):
+    """Распределение зарплат выбранных муниципалитетов: объединение их эскизов"""
+    return create_salary_summary(municipality_codes), create_salary_distribution_chart(municipality_codes)
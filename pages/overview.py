@@ -3,34 +3,34 @@
 """
 
 import dash
-from dash import dcc, html, Input, Output, callback
+from dash import dcc, html, Input, Output, State, callback, clientside_callback
 import dash_bootstrap_components as dbc
 import plotly.graph_objects as go
-import plotly.express as px
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 import random
+from urllib.parse import urlencode
 
-# Генерация тестовых данных для демонстрации
-def generate_sample_data():
-    """Генерирует пример данных для демонстрации"""
-    dates = pd.date_range(start='2020-01-01', end='2024-12-31', freq='ME')
-    
-    # Основные показатели
-    data = {
-        'date': dates,
-        'unemployment': 4.5 - 0.3 * np.sin(np.linspace(0, 4*np.pi, len(dates))) + np.random.normal(0, 0.1, len(dates)),
-        'salary': 35000 + 5000 * np.linspace(0, 1, len(dates)) + np.random.normal(0, 500, len(dates)),
-        'population': 1.48e6 - 2000 * np.linspace(0, 1, len(dates)) + np.random.normal(0, 1000, len(dates)),
-        'investment': 80e9 + 10e9 * np.linspace(0, 1, len(dates)) + np.random.normal(0, 2e9, len(dates)),
-        'gdp': 500e9 + 30e9 * np.linspace(0, 1, len(dates)) + np.random.normal(0, 5e9, len(dates))
-    }
-    
-    df = pd.DataFrame(data)
-    return df
+import pages
+from services import cache, geo, jobs, municipalities, regions, trends
+from services.data import COLUMN_LABELS, data_version, frame_version, get_archive, get_sample_data
+
+# Размер страницы таблицы архива
+TABLE_PAGE_SIZE = 10
+
+# Муниципалитетов в одной порции фонового расчета
+COMPARISON_CHUNK = 5
+
+# Форматы выгрузки: (код, подпись кнопки)
+EXPORT_FORMATS = [('csv', 'CSV'), ('xlsx', 'Excel'), ('parquet', 'Parquet')]
 
-df_sample = generate_sample_data()
+# Пауза после последнего изменения фильтра до автоприменения, мс
+AUTO_APPLY_DELAY_MS = 800
+
+# Фильтры применяются кнопкой или таймером автоприменения; сами виджеты - State
+APPLY_TRIGGERS = [Input('apply-filters', 'n_clicks'), Input('auto-apply-timer', 'n_intervals')]
+FILTER_STATE = [State('date-range', 'start_date'), State('date-range', 'end_date'), State('municipality-select', 'value')]
 
 # Карточка KPI
 def create_kpi_card(title, value, delta, icon, color="primary"):
@@ -58,6 +58,8 @@ def create_kpi_card(title, value, delta, icon, color="primary"):
 
 def create_layout(app):
     """Создание лейаута главной страницы"""
+    df_sample = get_sample_data()
+    archive = get_archive()
     
     return html.Div([
         # Заголовок
@@ -135,12 +137,25 @@ def create_layout(app):
                         ]),
                         dbc.Row([
                             dbc.Col([
+                                dbc.Switch(
+                                    id="auto-apply",
+                                    label="Применять автоматически",
+                                    value=False,
+                                    className="mt-3 d-inline-block me-3"
+                                ),
                                 dbc.Button(
                                     [html.I(className="fas fa-sync me-2"), "Применить"],
                                     color="primary",
                                     id="apply-filters",
                                     className="mt-3"
                                 ),
+                                # Таймер автоприменения: срабатывает один раз после паузы в изменениях
+                                dcc.Interval(
+                                    id="auto-apply-timer",
+                                    interval=AUTO_APPLY_DELAY_MS,
+                                    n_intervals=0,
+                                    max_intervals=0
+                                ),
                             ], className="text-end")
                         ])
                     ])
@@ -189,6 +204,37 @@ def create_layout(app):
                         html.H5("Сравнение с регионами ЦФО", className="mb-0"),
                     ]),
                     dbc.CardBody([
+                        dbc.Row([
+                            dbc.Col(
+                                dcc.Dropdown(
+                                    id='region-comparison-indicator',
+                                    options=[
+                                        {'label': params['label'], 'value': code}
+                                        for code, params in regions.INDICATORS.items()
+                                    ],
+                                    value='grp',
+                                    clearable=False
+                                ),
+                                md=6
+                            ),
+                            dbc.Col(
+                                dcc.Dropdown(
+                                    id='region-comparison-year',
+                                    options=[{'label': str(year), 'value': year} for year in regions.YEARS],
+                                    value=regions.YEARS[-1],
+                                    clearable=False
+                                ),
+                                md=3
+                            ),
+                            dbc.Col(
+                                dbc.Switch(
+                                    id='region-comparison-per-capita',
+                                    label="На душу населения",
+                                    value=False
+                                ),
+                                md=3
+                            ),
+                        ], align="center", className="mb-2"),
                         dcc.Graph(
                             id='region-comparison-chart',
                             figure=create_comparison_chart(),
@@ -206,7 +252,7 @@ def create_layout(app):
                     dbc.CardBody([
                         dcc.Graph(
                             id='heatmap-chart',
-                            figure=create_heatmap(df_sample),
+                            figure=shared_heatmap(df_sample),
                             config={'displayModeBar': True}
                         )
                     ])
@@ -214,12 +260,110 @@ def create_layout(app):
             ], md=6)
         ]),
         
+        # Карта муниципалитетов
+        dbc.Row([
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardHeader([
+                        dbc.Row([
+                            dbc.Col(html.H5("Карта муниципалитетов", className="mb-0")),
+                            dbc.Col(
+                                dcc.Dropdown(
+                                    id='map-indicator',
+                                    options=[
+                                        {'label': COLUMN_LABELS[name], 'value': name}
+                                        for name in archive.names if archive.is_numeric(name)
+                                    ],
+                                    value='salary',
+                                    clearable=False
+                                ),
+                                md=4
+                            ),
+                        ], align="center")
+                    ]),
+                    dbc.CardBody([
+                        dcc.Graph(
+                            id='municipality-map',
+                            figure=create_municipality_map(),
+                            config={'displayModeBar': True, 'scrollZoom': True}
+                        )
+                    ])
+                ], className="shadow-sm mb-4")
+            ])
+        ]),
+        
+        # Сравнение муниципалитетов (фоновый расчет)
+        dbc.Row([
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardHeader([
+                        html.H5("Сравнение муниципалитетов", className="mb-0"),
+                    ]),
+                    dbc.CardBody([
+                        dbc.Row([
+                            dbc.Col([
+                                dcc.Dropdown(
+                                    id='comparison-indicator',
+                                    options=[
+                                        {'label': COLUMN_LABELS[name], 'value': name}
+                                        for name in archive.names if archive.is_numeric(name)
+                                    ],
+                                    value='salary',
+                                    clearable=False
+                                ),
+                            ], md=4),
+                            dbc.Col([
+                                dbc.Button(
+                                    [html.I(className="fas fa-play me-2"), "Рассчитать"],
+                                    id="run-comparison",
+                                    color="primary",
+                                    className="me-2"
+                                ),
+                                dbc.Button(
+                                    [html.I(className="fas fa-stop me-2"), "Отменить"],
+                                    id="cancel-comparison",
+                                    color="secondary",
+                                    outline=True,
+                                    disabled=True
+                                ),
+                            ], md=4),
+                            dbc.Col([
+                                dbc.Progress(id='comparison-progress', value=0, label="", className="mt-2"),
+                            ], md=4),
+                        ], className="mb-3"),
+                        dcc.Graph(
+                            id='municipality-comparison-chart',
+                            figure=go.Figure(layout=dict(template='plotly_white', height=400)),
+                            config={'displayModeBar': True}
+                        )
+                    ])
+                ], className="shadow-sm mb-4")
+            ])
+        ]),
+        
         # Таблица с данными
         dbc.Row([
             dbc.Col([
                 dbc.Card([
                     dbc.CardHeader([
-                        html.H5("Детальные данные", className="mb-0"),
+                        dbc.Row([
+                            dbc.Col(html.H5("Детальные данные", className="mb-0")),
+                            dbc.Col(
+                                dbc.ButtonGroup([
+                                    dbc.Button(
+                                        [html.I(className="fas fa-download me-2"), label],
+                                        id=f"export-{fmt}",
+                                        href=build_export_url(fmt),
+                                        external_link=True,
+                                        color="secondary",
+                                        outline=True,
+                                        size="sm"
+                                    )
+                                    for fmt, label in EXPORT_FORMATS
+                                ]),
+                                width="auto"
+                            ),
+                        ], align="center", justify="between"),
                     ]),
                     dbc.CardBody([
                         dbc.Tabs([
@@ -228,9 +372,19 @@ def create_layout(app):
                                     html.H6("Основные показатели", className="mt-3"),
                                     dash.dash_table.DataTable(
                                         id='data-table',
-                                        columns=[{"name": i, "id": i} for i in df_sample.columns],
-                                        data=df_sample.tail(10).to_dict('records'),
-                                        page_size=10,
+                                        columns=[
+                                            {"name": COLUMN_LABELS.get(i, i), "id": i,
+                                             "type": 'numeric' if archive.is_numeric(i) else 'text'}
+                                            for i in archive.names
+                                        ],
+                                        page_current=0,
+                                        page_size=TABLE_PAGE_SIZE,
+                                        page_action='custom',
+                                        sort_action='custom',
+                                        sort_mode='multi',
+                                        sort_by=[],
+                                        filter_action='custom',
+                                        filter_query='',
                                         style_table={'overflowX': 'auto'},
                                         style_cell={
                                             'textAlign': 'left',
@@ -257,7 +411,7 @@ def create_layout(app):
                                             {"name": "Макс", "id": "max"},
                                             {"name": "Тренд", "id": "trend"}
                                         ],
-                                        data=calculate_stats(df_sample),
+                                        data=shared_stats(df_sample),
                                         style_table={'overflowX': 'auto'},
                                         style_cell={'textAlign': 'left', 'padding': '10px'}
                                     )
@@ -333,28 +487,44 @@ def create_sector_chart():
     
     return fig
 
-def create_comparison_chart():
-    """Создание графика сравнения с регионами"""
-    regions = ['Тульская', 'Московская', 'Калужская', 'Рязанская', 'Владимирская']
-    values = [542, 1250, 380, 295, 268]
+def create_comparison_chart(indicator='grp', year=regions.YEARS[-1], per_capita=False):
+    """График сравнения с регионами ЦФО: готовые места из services.regions"""
+    params = regions.INDICATORS[indicator]
+    measure = 'per_capita' if per_capita and params['per_capita'] else 'absolute'
+    comparison = regions.get_comparison().lookup(indicator, year, measure)
+    unit = regions.indicator_unit(indicator, measure)
+    names = [regions.REGION_NAMES[code] for code in comparison['regions']]
+    rank, percentile = regions.get_comparison().position(regions.HOME_REGION, indicator, year, measure)
     
     fig = go.Figure(data=[
         go.Bar(
-            x=regions,
-            y=values,
-            marker_color=['#1f77b4' if r == 'Тульская' else '#a9a9a9' for r in regions],
-            text=values,
-            textposition='outside',
-            hovertemplate='<b>%{x} область</b><br>ВРП: %{y} млрд ₽<extra></extra>'
+            x=names,
+            y=comparison['values'],
+            customdata=np.column_stack([comparison['ranks'], comparison['percentiles']]),
+            marker_color=['#1f77b4' if code == regions.HOME_REGION else '#a9a9a9' for code in comparison['regions']],
+            hovertemplate=(
+                f'<b>%{{x}}</b><br>{params["label"]}: %{{y:,.1f}} {unit}'
+                '<br>Место: %{customdata[0]:.0f}<br>Процентиль: %{customdata[1]:.0f}<extra></extra>'
+            )
         )
     ])
+    fig.add_hline(
+        y=comparison['median'], line_dash='dash', line_color='gray',
+        annotation_text='Медиана ЦФО', annotation_position='top right'
+    )
     
+    title = f'{params["label"]}{" на душу населения" if measure == "per_capita" else ""} ({year})'
+    if rank:
+        title += f': {rank}-е место из {comparison["count"]}'
     fig.update_layout(
-        title='Сравнение ВРП с регионами ЦФО (2023)',
-        xaxis_title='Регион',
-        yaxis_title='ВРП (млрд ₽)',
+        title=title,
+        xaxis_title='',
+        yaxis_title=unit,
+        xaxis_tickangle=-45,
+        yaxis_type='log' if comparison['values'].max() > 10 * comparison['median'] else 'linear',
         height=400,
-        template='plotly_white'
+        template='plotly_white',
+        margin=dict(b=100)
     )
     
     return fig
@@ -386,40 +556,140 @@ def create_heatmap(df):
     
     return fig
 
+def latest_municipality_values(indicator):
+    """Значения показателя по муниципалитетам за последний месяц в порядке municipalities.CODES"""
+    def build():
+        archive = get_archive()
+        last = str(np.datetime_as_string(archive.columns['date'].max(), unit='D'))
+        indices = archive.select(between={'date': (last, last)})
+        by_name = dict(zip(archive.values('municipality', indices), archive.values(indicator, indices)))
+        return [round(float(by_name[municipalities.NAMES[code]]), 2) for code in municipalities.CODES]
+    return cache.get_or_compute('map-values', (data_version(), indicator), build)
+
+def create_municipality_map(indicator='salary'):
+    """
+    Картограмма показателя по муниципалитетам.
+
+    Геометрия не входит в фигуру: Plotly загружает ее по адресу /geo,
+    браузер кэширует ответ, а смена показателя передает только значения.
+    """
+    label = COLUMN_LABELS.get(indicator, indicator)
+    fig = go.Figure(go.Choropleth(
+        geojson=geo.geojson_url(),
+        featureidkey='id',
+        locations=municipalities.CODES,
+        z=latest_municipality_values(indicator),
+        text=[municipalities.NAMES[code] for code in municipalities.CODES],
+        colorscale='Blues',
+        marker_line_color='white',
+        marker_line_width=0.7,
+        colorbar=dict(title=dict(text=label)),
+        hovertemplate='<b>%{text}</b><br>%{z:,.1f}<extra></extra>'
+    ))
+    
+    fig.update_geos(fitbounds='locations', visible=False)
+    fig.update_layout(
+        title=f'{label}: последний месяц',
+        height=500,
+        margin=dict(l=10, r=10, t=50, b=10),
+        template='plotly_white'
+    )
+    
+    return fig
+
+def calculate_municipality_growth(archive, indicator, names):
+    """Среднегодовой прирост показателя (% в год) по линейному тренду для муниципалитетов"""
+    series = {}
+    for name in names:
+        indices = archive.select(isin={'municipality': [name]})
+        indices = indices[np.argsort(archive.columns['date'][indices], kind='stable')]
+        series[name] = archive.values(indicator, indices).astype(float)
+    fitted = trends.get_trends(series)
+    return {
+        name: fitted[name]['slope'] * 12 / series[name].mean() * 100
+        for name in names
+    }
+
+def create_municipality_comparison_chart(growth, indicator):
+    """График прироста показателя по муниципалитетам"""
+    ordered = sorted(growth.items(), key=lambda x: x[1], reverse=True)
+    names, values = zip(*ordered) if ordered else ((), ())
+    
+    fig = go.Figure(data=[
+        go.Bar(
+            x=names,
+            y=values,
+            marker_color=['#1f77b4' if n == 'Тула' else '#a9a9a9' for n in names],
+            hovertemplate='<b>%{x}</b><br>Прирост: %{y:.2f}% в год<extra></extra>'
+        )
+    ])
+    
+    fig.update_layout(
+        title=f'Среднегодовой прирост: {COLUMN_LABELS.get(indicator, indicator)}',
+        xaxis_title='',
+        yaxis_title='% в год',
+        template='plotly_white',
+        height=400,
+        xaxis_tickangle=-45,
+        margin=dict(l=50, r=50, t=50, b=120)
+    )
+    
+    return fig
+
+def build_export_url(fmt, start_date=None, end_date=None, municipality='all', indicators='all'):
+    """Ссылка на выгрузку данных с учетом фильтров"""
+    if isinstance(indicators, str):
+        indicators = [indicators]
+    params = {
+        'format': fmt,
+        'indicators': ','.join(i for i in indicators or [] if i != 'all'),
+        'municipalities': '' if municipality in (None, 'all') else municipality,
+        'start': str(start_date)[:10] if start_date else '',
+        'end': str(end_date)[:10] if end_date else '',
+    }
+    return '/export?' + urlencode({k: v for k, v in params.items() if v})
+
+def format_stats_row(indicator, mean, min_value, max_value, slope):
+    """Строка таблицы статистики"""
+    return {
+        'indicator': indicator,
+        'mean': f"{mean:,.0f}".replace(',', ' '),
+        'min': f"{min_value:,.0f}".replace(',', ' '),
+        'max': f"{max_value:,.0f}".replace(',', ' '),
+        'trend': "↑" if slope > 0 else "↓"
+    }
+
 def calculate_stats(df):
     """Расчет статистики для таблицы"""
     stats = []
     numeric_cols = df.select_dtypes(include=[np.number]).columns
     
+    # Наклон линейного тренда сразу по всем показателям
+    fitted = trends.get_trends(df[numeric_cols])
+    
     for col in numeric_cols:
-        # Простой расчет тренда (положительный/отрицательный)
-        trend = df[col].iloc[-1] - df[col].iloc[0]
-        trend_icon = "↑" if trend > 0 else "↓"
-        
-        stats.append({
-            'indicator': col,
-            'mean': f"{df[col].mean():,.0f}".replace(',', ' '),
-            'min': f"{df[col].min():,.0f}".replace(',', ' '),
-            'max': f"{df[col].max():,.0f}".replace(',', ' '),
-            'trend': trend_icon
-        })
+        stats.append(format_stats_row(
+            col, df[col].mean(), df[col].min(), df[col].max(), fitted[col]['slope']
+        ))
     
     return stats
 
-# Callbacks для интерактивности
-@callback(
-    [Output('main-trend-chart', 'figure'),
-     Output('sector-pie-chart', 'figure')],
-    [Input('date-range', 'start_date'),
-     Input('date-range', 'end_date'),
-     Input('municipality-select', 'value'),
-     Input('apply-filters', 'n_clicks')]
-)
-def update_charts(start_date, end_date, municipality, n_clicks):
-    """Обновление графиков при изменении фильтров"""
-    # Фильтруем данные по датам
-    mask = (df_sample['date'] >= start_date) & (df_sample['date'] <= end_date)
-    filtered_df = df_sample[mask]
+def shared_heatmap(df):
+    """Тепловая карта: строится один раз на версию данных для всех воркеров"""
+    return cache.get_or_compute(
+        'overview-heatmap', frame_version(df), lambda: create_heatmap(df), maxsize=4, shared=True
+    )
+
+def shared_stats(df):
+    """Статистика по показателям: считается один раз на версию данных для всех воркеров"""
+    return cache.get_or_compute(
+        'overview-stats', frame_version(df), lambda: calculate_stats(df), maxsize=4, shared=True
+    )
+
+def build_charts(df, start_date, end_date, municipality):
+    """Графики обзора для выбранного периода и муниципалитета"""
+    mask = (df['date'] >= start_date) & (df['date'] <= end_date)
+    filtered_df = df[mask]
     
     # Обновляем графики
     trend_fig = create_trend_chart(filtered_df)
@@ -431,4 +701,179 @@ def update_charts(start_date, end_date, municipality, n_clicks):
             title=f"Динамика показателей - {municipality}"
         )
     
-    return trend_fig, sector_fig
\ No newline at end of file
+    return trend_fig, sector_fig
+
+def filter_state(start_date, end_date, municipality):
+    """Состояние фильтров обзора для session-store"""
+    return {'start_date': start_date, 'end_date': end_date, 'municipality': municipality}
+
+def restore_state(layout, state):
+    """Лейаут обзора с фильтрами из session-store"""
+    props = {
+        'date-range': {
+            name: state[name] for name in ('start_date', 'end_date') if state.get(name)
+        },
+        'municipality-select': {'value': state['municipality']} if state.get('municipality') else {},
+    }
+    return pages.set_props(layout, {k: v for k, v in props.items() if v})
+
+# Callbacks для интерактивности
+@callback(
+    [Output('main-trend-chart', 'figure'),
+     Output('sector-pie-chart', 'figure')],
+    APPLY_TRIGGERS,
+    FILTER_STATE
+)
+def update_charts(n_clicks, n_intervals, start_date, end_date, municipality):
+    """Обновление графиков при применении фильтров"""
+    df_sample = get_sample_data()
+    # Одинаковые фильтры у разных пользователей считаются один раз
+    return cache.get_or_compute(
+        'overview-charts', (frame_version(df_sample), start_date, end_date, municipality),
+        lambda: build_charts(df_sample, start_date, end_date, municipality),
+        maxsize=64, shared=True
+    )
+
+# Перезапуск таймера автоприменения при каждом изменении фильтра (в браузере).
+# Таймер срабатывает, когда n_intervals дойдет до max_intervals; смена interval
+# сбрасывает уже идущий отсчет, поэтому частые изменения дают одно применение.
+clientside_callback(
+    """
+    function(startDate, endDate, municipality, auto, nIntervals, interval) {
+        if (!auto) {
+            return [window.dash_clientside.no_update, window.dash_clientside.no_update];
+        }
+        var delay = %d;
+        return [(nIntervals || 0) + 1, interval === delay ? delay + 1 : delay];
+    }
+    """ % AUTO_APPLY_DELAY_MS,
+    [Output('auto-apply-timer', 'max_intervals'),
+     Output('auto-apply-timer', 'interval')],
+    [Input('date-range', 'start_date'),
+     Input('date-range', 'end_date'),
+     Input('municipality-select', 'value')],
+    [State('auto-apply', 'value'),
+     State('auto-apply-timer', 'n_intervals'),
+     State('auto-apply-timer', 'interval')],
+    prevent_initial_call=True
+)
+
+@callback(
+    Output('session-store', 'data'),
+    APPLY_TRIGGERS,
+    FILTER_STATE + [State('session-store', 'data')],
+    prevent_initial_call=True
+)
+def save_filters(n_clicks, n_intervals, start_date, end_date, municipality, session):
+    """
+    Сохранение примененных фильтров в session-store: при возврате на
+    страницу они подставляются в лейаут, и графики берутся из кэша по тем
+    же ключам.
+    """
+    state = filter_state(start_date, end_date, municipality)
+    session = dict(session or {})
+    if session.get('overview') == state:
+        raise dash.exceptions.PreventUpdate
+    session['overview'] = state
+    return session
+
+@callback(
+    Output('region-comparison-chart', 'figure'),
+    [Input('region-comparison-indicator', 'value'),
+     Input('region-comparison-year', 'value'),
+     Input('region-comparison-per-capita', 'value')],
+    prevent_initial_call=True
+)
+def update_comparison_chart(indicator, year, per_capita):
+    """Сравнение по выбранному показателю и году"""
+    return create_comparison_chart(indicator, year, per_capita)
+
+@callback(
+    Output('municipality-map', 'figure'),
+    [Input('map-indicator', 'value')],
+    prevent_initial_call=True
+)
+def update_map_indicator(indicator):
+    """Смена показателя на карте: передаются только значения и подписи"""
+    label = COLUMN_LABELS.get(indicator, indicator)
+    patch = dash.Patch()
+    patch['data'][0]['z'] = latest_municipality_values(indicator)
+    patch['data'][0]['colorbar']['title']['text'] = label
+    patch['layout']['title']['text'] = f'{label}: последний месяц'
+    return patch
+
+@callback(
+    Output('municipality-map', 'figure', allow_duplicate=True),
+    [Input('municipality-map', 'relayoutData')],
+    prevent_initial_call=True
+)
+def update_map_detail(relayout):
+    """Более детальные границы при приближении карты"""
+    if not relayout or 'geo.projection.scale' not in relayout:
+        raise dash.exceptions.PreventUpdate
+    patch = dash.Patch()
+    patch['data'][0]['geojson'] = geo.geojson_url(geo.choose_level(relayout['geo.projection.scale']))
+    return patch
+
+@callback(
+    [Output('data-table', 'data'),
+     Output('data-table', 'page_count')],
+    [Input('data-table', 'page_current'),
+     Input('data-table', 'page_size'),
+     Input('data-table', 'sort_by'),
+     Input('data-table', 'filter_query')]
+)
+def update_data_table(page_current, page_size, sort_by, filter_query):
+    """Серверная пагинация, сортировка и фильтрация архива показателей"""
+    return get_archive().page(page_current or 0, page_size or TABLE_PAGE_SIZE, filter_query, sort_by)
+
+@callback(
+    Output('stats-table', 'data'),
+    [Input('data-table', 'filter_query')],
+    prevent_initial_call=True
+)
+def update_stats_table(filter_query):
+    """Статистика по строкам архива, отобранным фильтром таблицы"""
+    if not filter_query:
+        return shared_stats(get_sample_data())
+    return [
+        format_stats_row(row['indicator'], row['mean'], row['min'], row['max'], row['slope'])
+        for row in get_archive().describe(filter_query)
+    ]
+
+@callback(
+    [Output(f'export-{fmt}', 'href') for fmt, _ in EXPORT_FORMATS],
+    APPLY_TRIGGERS,
+    FILTER_STATE + [State('indicators-select', 'value')]
+)
+def update_export_links(n_clicks, n_intervals, start_date, end_date, municipality, indicators):
+    """Ссылки на выгрузку по примененным фильтрам"""
+    return [
+        build_export_url(fmt, start_date, end_date, municipality, indicators)
+        for fmt, _ in EXPORT_FORMATS
+    ]
+
+@callback(
+    Output('municipality-comparison-chart', 'figure'),
+    Input('run-comparison', 'n_clicks'),
+    State('comparison-indicator', 'value'),
+    background=True,
+    running=[
+        (Output('run-comparison', 'disabled'), True, False),
+        (Output('cancel-comparison', 'disabled'), False, True),
+    ],
+    cancel=[Input('cancel-comparison', 'n_clicks')],
+    progress=[Output('comparison-progress', 'value'), Output('comparison-progress', 'label')],
+    prevent_initial_call=True
+)
+def run_municipality_comparison(set_progress, n_clicks, indicator):
+    """Фоновый расчет прироста показателя по всем муниципалитетам"""
+    archive = get_archive()
+    names = [municipalities.NAMES[code] for code in municipalities.CODES]
+    growth = {}
+    
+    for start in range(0, len(names), COMPARISON_CHUNK):
+        growth.update(calculate_municipality_growth(archive, indicator, names[start:start + COMPARISON_CHUNK]))
+        jobs.report_progress(set_progress, len(growth), len(names))
+    
+    return create_municipality_comparison_chart(growth, indicator)
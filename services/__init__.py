@@ -0,0 +1 @@
+# Сервисы данных и вычислений дашборда
@@ -0,0 +1,226 @@
+"""
+Колоночное хранилище архива показателей для серверных таблиц.
+
+Ранги и порядок сортировки каждой колонки считаются один раз при построении,
+поэтому запрос страницы сводится к векторной маске фильтра и срезу индекса:
+материализуются только строки видимой страницы.
+"""
+
+import math
+
+import numpy as np
+
+from services import cache
+from services.metrics import DB_QUERY_SECONDS
+
+# Операторы фильтров DataTable в порядке разбора
+FILTER_OPERATORS = [
+    ['ge ', '>='],
+    ['le ', '<='],
+    ['lt ', '<'],
+    ['gt ', '>'],
+    ['ne ', '!='],
+    ['eq ', '='],
+    ['contains '],
+    ['datestartswith '],
+]
+
+
+def split_filter_part(filter_part):
+    """Разбор одного условия фильтра DataTable: (колонка, оператор, значение)"""
+    for operator_type in FILTER_OPERATORS:
+        for operator in operator_type:
+            if operator in filter_part:
+                name_part, value_part = filter_part.split(operator, 1)
+                name = name_part[name_part.find('{') + 1: name_part.rfind('}')]
+
+                value_part = value_part.strip()
+                v0 = value_part[:1]
+                if v0 and v0 == value_part[-1] and v0 in ("'", '"', '`'):
+                    value = value_part[1:-1].replace('\\' + v0, v0)
+                else:
+                    try:
+                        value = float(value_part)
+                    except ValueError:
+                        value = value_part
+
+                return name, operator_type[0].strip(), value
+
+    return None, None, None
+
+
+class IndicatorArchive:
+    """Архив показателей: колонки numpy с предвычисленными рангами и сортировками"""
+
+    def __init__(self, columns):
+        self.columns = columns
+        self.names = list(columns)
+        self.size = len(next(iter(columns.values())))
+        self.version = cache.dataset_version(*columns.values())
+
+        # Текстовое представление дат и строк нужно и для фильтров, и для выдачи
+        self._text = {}
+        for name, array in columns.items():
+            if np.issubdtype(array.dtype, np.datetime64):
+                self._text[name] = np.datetime_as_string(array, unit='D')
+            elif not np.issubdtype(array.dtype, np.number):
+                self._text[name] = array.astype(str)
+
+        self._ranks = {}
+        self._orders = {}
+        for name, array in columns.items():
+            _, ranks = np.unique(array, return_inverse=True)
+            self._ranks[name] = ranks.astype(np.int64)
+            self._orders[name] = np.argsort(self._ranks[name], kind='stable')
+
+    @classmethod
+    def from_frame(cls, frame):
+        """Построение архива из DataFrame"""
+        return cls({name: frame[name].to_numpy() for name in frame.columns})
+
+    def is_numeric(self, name):
+        return name not in self._text
+
+    def _condition(self, name, operator, value):
+        """Векторная маска одного условия"""
+        if name not in self.columns:
+            return np.ones(self.size, dtype=bool)
+
+        if self.is_numeric(name):
+            column = self.columns[name]
+            if operator in ('contains', 'datestartswith') or not isinstance(value, float):
+                return np.zeros(self.size, dtype=bool)
+        else:
+            column = self._text[name]
+            value = str(value) if not isinstance(value, float) else f"{value:g}"
+            if operator == 'contains':
+                return np.char.find(np.char.lower(column), value.lower()) >= 0
+            if operator == 'datestartswith':
+                return np.char.startswith(column, value)
+
+        if operator == 'eq':
+            return column == value
+        if operator == 'ne':
+            return column != value
+        if operator == 'lt':
+            return column < value
+        if operator == 'le':
+            return column <= value
+        if operator == 'gt':
+            return column > value
+        if operator == 'ge':
+            return column >= value
+        return np.ones(self.size, dtype=bool)
+
+    def _mask(self, filter_query):
+        mask = np.ones(self.size, dtype=bool)
+        for part in (filter_query or '').split(' && '):
+            if not part.strip():
+                continue
+            name, operator, value = split_filter_part(part)
+            if name is not None:
+                mask &= self._condition(name, operator, value)
+        return mask
+
+    def _order(self, sort_by):
+        # Сортировки по неизвестным колонкам игнорируются
+        sort_by = [s for s in sort_by or () if s['column_id'] in self.columns]
+        if not sort_by:
+            return np.arange(self.size)
+        if len(sort_by) == 1:
+            order = self._orders[sort_by[0]['column_id']]
+            return order[::-1] if sort_by[0]['direction'] == 'desc' else order
+        # Многоколоночная сортировка по рангам: lexsort берёт главный ключ последним
+        keys = [
+            -self._ranks[s['column_id']] if s['direction'] == 'desc' else self._ranks[s['column_id']]
+            for s in reversed(sort_by)
+        ]
+        return np.lexsort(keys)
+
+    def query(self, filter_query='', sort_by=None):
+        """Индексы строк, прошедших фильтр, в порядке сортировки (кэшируется)"""
+        sort_key = tuple((s['column_id'], s['direction']) for s in sort_by or ())
+
+        def build():
+            order = self._order(sort_by)
+            if not filter_query:
+                return order
+            return order[self._mask(filter_query)[order]]
+
+        with DB_QUERY_SECONDS.time(query='archive.query'):
+            return cache.get_or_compute(
+                'archive-views', (self.version, filter_query or '', sort_key), build, maxsize=64
+            )
+
+    def values(self, name, indices):
+        """Значения колонки для выдачи: числа как есть, даты и строки текстом"""
+        if self.is_numeric(name):
+            return self.columns[name][indices]
+        return self._text[name][indices]
+
+    def rows(self, indices, names=None):
+        """Материализация строк в записи для DataTable"""
+        names = names or self.names
+        values = {}
+        for name in names:
+            if self.is_numeric(name):
+                values[name] = np.round(self.values(name, indices).astype(float), 2).tolist()
+            else:
+                values[name] = self.values(name, indices).tolist()
+        return [dict(zip(names, row)) for row in zip(*(values[name] for name in names))]
+
+    def select(self, isin=None, between=None):
+        """Индексы строк по спискам значений и диапазонам (границы включительно)"""
+        with DB_QUERY_SECONDS.time(query='archive.select'):
+            return self._select(isin, between)
+
+    def _select(self, isin, between):
+        mask = np.ones(self.size, dtype=bool)
+        for name, allowed in (isin or {}).items():
+            if allowed:
+                column = self.columns[name] if self.is_numeric(name) else self._text[name]
+                mask &= np.isin(column, list(allowed))
+        for name, (low, high) in (between or {}).items():
+            column = self.columns[name] if self.is_numeric(name) else self._text[name]
+            if low is not None:
+                mask &= column >= low
+            if high is not None:
+                mask &= column <= high
+        return np.flatnonzero(mask)
+
+    def page(self, page_current, page_size, filter_query='', sort_by=None):
+        """Одна страница таблицы (LIMIT/OFFSET по индексу) и число страниц"""
+        indices = self.query(filter_query, sort_by)
+        start = page_current * page_size
+        page_count = max(math.ceil(len(indices) / page_size), 1)
+        return self.rows(indices[start:start + page_size]), page_count
+
+    def describe(self, filter_query='', names=None):
+        """Среднее, минимум, максимум и знак тренда по отфильтрованным строкам"""
+        indices = self.query(filter_query)
+        names = names or [name for name in self.names if self.is_numeric(name)]
+        time = next(
+            (self.columns[name] for name in self.names
+             if np.issubdtype(self.columns[name].dtype, np.datetime64)),
+            None
+        )
+
+        stats = []
+        for name in names:
+            values = self.columns[name][indices].astype(float)
+            if not len(values):
+                continue
+            slope = 0.0
+            if time is not None and len(values) > 1:
+                t = time[indices].astype('datetime64[D]').astype(float)
+                t -= t.mean()
+                denominator = (t ** 2).sum()
+                slope = (t * (values - values.mean())).sum() / denominator if denominator else 0.0
+            stats.append({
+                'indicator': name,
+                'mean': values.mean(),
+                'min': values.min(),
+                'max': values.max(),
+                'slope': slope,
+            })
+        return stats
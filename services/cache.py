@@ -0,0 +1,84 @@
+"""
+Кэш результатов вычислений, привязанный к версии набора данных
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from services import singleflight
+
+# Максимальное число записей в одном пространстве имён
+DEFAULT_MAXSIZE = 128
+
+_lock = threading.RLock()
+_namespaces = {}
+_stats = {}
+
+
+def dataset_version(*parts):
+    """Версия набора данных: короткий хэш содержимого массивов"""
+    digest = hashlib.blake2b(digest_size=8)
+    for part in parts:
+        array = np.asarray(part)
+        digest.update(f"{array.dtype}{array.shape}".encode())
+        if array.dtype == object:
+            digest.update(repr(array.tolist()).encode())
+        else:
+            digest.update(np.ascontiguousarray(array).tobytes())
+    return digest.hexdigest()
+
+
+def get_or_compute(namespace, key, builder, maxsize=DEFAULT_MAXSIZE, shared=False):
+    """
+    Возвращает значение из кэша или вычисляет его через builder().
+
+    Одновременные промахи по одному ключу ждут одно вычисление; при
+    shared=True вычисление объединяется и между процессами через общий
+    кэш (services.singleflight), тогда key должен включать версию данных.
+    """
+    with _lock:
+        entries = _namespaces.setdefault(namespace, OrderedDict())
+        stats = _stats.setdefault(namespace, {'hits': 0, 'misses': 0})
+        if key in entries:
+            entries.move_to_end(key)
+            stats['hits'] += 1
+            return entries[key]
+        stats['misses'] += 1
+
+    def compute():
+        with _lock:
+            # Значение могло появиться, пока поток ждал чужое вычисление
+            if key in entries:
+                return entries[key]
+        if shared:
+            return singleflight.shared(namespace, key, builder)
+        return builder()
+
+    value = singleflight.do((namespace, key), compute)
+
+    with _lock:
+        entries[key] = value
+        while len(entries) > maxsize:
+            entries.popitem(last=False)
+    return value
+
+
+def cache_info():
+    """Статистика попаданий по пространствам имён"""
+    with _lock:
+        return {
+            namespace: dict(stats, size=len(_namespaces.get(namespace, ())))
+            for namespace, stats in _stats.items()
+        }
+
+
+def clear(namespace=None):
+    """Очистка одного пространства имён или всего кэша"""
+    with _lock:
+        if namespace is None:
+            _namespaces.clear()
+        else:
+            _namespaces.pop(namespace, None)
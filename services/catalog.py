@@ -0,0 +1,127 @@
+"""
+Каталог показателей: все ряды, которые дашборд может показать или
+выгрузить, с кодами, единицами, источниками и периодичностью.
+
+Каталог разворачивается из базовых показателей по разрезам
+(муниципалитеты, разделы ОКВЭД, пол, возраст) - несколько тысяч рядов.
+Поисковый индекс строится один раз на процесс.
+"""
+
+from services import cache, municipalities, okved
+from services.search import InvertedIndex
+
+# Базовые показатели: (код, название, единица, источник, периодичность, раздел дашборда, разрезы)
+BASE_INDICATORS = [
+    ('LAB.UNEMP', 'Уровень безработицы', '%', 'Росстат, обследование рабочей силы', 'месяц', '/labor', ('municipality', 'sex', 'age')),
+    ('LAB.REGUNEMP', 'Численность зарегистрированных безработных', 'чел.', 'Центр занятости населения', 'месяц', '/labor', ('municipality', 'sex', 'age')),
+    ('LAB.SAL', 'Среднемесячная начисленная заработная плата работников организаций', '₽', 'Росстат', 'месяц', '/labor', ('municipality', 'okved', 'municipality-okved', 'sex')),
+    ('LAB.EMP', 'Среднесписочная численность работников организаций', 'тыс. чел.', 'Росстат', 'месяц', '/labor', ('municipality', 'okved', 'municipality-okved')),
+    ('LAB.VAC', 'Число вакансий, заявленных работодателями', 'ед.', 'Работа России', 'день', '/labor', ('municipality', 'okved')),
+    ('LAB.ARREARS', 'Просроченная задолженность по заработной плате', 'тыс. ₽', 'Росстат', 'месяц', '/labor', ('okved',)),
+    ('DEM.POP', 'Численность постоянного населения', 'чел.', 'Росстат', 'год', '/demographics', ('municipality', 'sex', 'age')),
+    ('DEM.BIRTHS', 'Число родившихся', 'чел.', 'ЗАГС', 'месяц', '/demographics', ('municipality',)),
+    ('DEM.DEATHS', 'Число умерших', 'чел.', 'ЗАГС', 'месяц', '/demographics', ('municipality', 'sex', 'age')),
+    ('DEM.ARRIVALS', 'Число прибывших', 'чел.', 'МВД, миграционный учет', 'месяц', '/demographics', ('municipality', 'age')),
+    ('DEM.DEPARTURES', 'Число выбывших', 'чел.', 'МВД, миграционный учет', 'месяц', '/demographics', ('municipality', 'age')),
+    ('DEM.TFR', 'Суммарный коэффициент рождаемости', 'детей на женщину', 'Росстат', 'год', '/demographics', ('municipality',)),
+    ('DEM.LIFE', 'Ожидаемая продолжительность жизни при рождении', 'лет', 'Росстат', 'год', '/demographics', ('sex',)),
+    ('DEM.MARRIAGES', 'Число браков', 'ед.', 'ЗАГС', 'месяц', '/demographics', ('municipality',)),
+    ('ECO.GRP', 'Валовой региональный продукт', 'млрд ₽', 'Росстат', 'год', '/economy', ('okved',)),
+    ('ECO.IPI', 'Индекс промышленного производства', '%', 'Росстат', 'месяц', '/economy', ('okved',)),
+    ('ECO.SHIP', 'Объем отгруженных товаров собственного производства, выполненных работ и услуг', 'млн ₽', 'Росстат', 'месяц', '/economy', ('municipality', 'okved', 'municipality-okved')),
+    ('ECO.INV', 'Инвестиции в основной капитал', 'млн ₽', 'Росстат', 'квартал', '/economy', ('municipality', 'okved')),
+    ('ECO.RETAIL', 'Оборот розничной торговли', 'млн ₽', 'Росстат', 'месяц', '/economy', ('municipality',)),
+    ('ECO.CPI', 'Индекс потребительских цен', '%', 'Росстат', 'месяц', '/economy', ()),
+    ('ECO.ORGS', 'Число организаций по данным статистического регистра', 'ед.', 'Статрегистр Росстата', 'год', '/economy', ('municipality', 'okved', 'municipality-okved')),
+    ('ECO.PROFIT', 'Сальдированный финансовый результат организаций', 'млн ₽', 'Росстат', 'месяц', '/economy', ('okved',)),
+    ('FIN.REVENUE', 'Доходы консолидированного бюджета', 'млн ₽', 'Минфин', 'месяц', None, ('municipality',)),
+    ('FIN.EXPENSE', 'Расходы консолидированного бюджета', 'млн ₽', 'Минфин', 'месяц', None, ('municipality',)),
+    ('FIN.DEBT', 'Государственный долг субъекта', 'млн ₽', 'Минфин', 'месяц', None, ()),
+    ('SOC.INCOME', 'Среднедушевые денежные доходы населения', '₽', 'Росстат', 'квартал', None, ('municipality',)),
+    ('SOC.POVERTY', 'Доля населения с доходами ниже границы бедности', '%', 'Росстат', 'квартал', None, ()),
+    ('SOC.HOUSING', 'Ввод в действие жилых домов', 'тыс. м²', 'Росстат', 'месяц', None, ('municipality',)),
+    ('SOC.STUDENTS', 'Численность обучающихся в общеобразовательных организациях', 'чел.', 'Минпросвещения', 'год', None, ('municipality',)),
+    ('SOC.DOCTORS', 'Численность врачей всех специальностей', 'чел.', 'Минздрав', 'год', None, ('municipality',)),
+    ('AGR.GRAIN', 'Валовой сбор зерновых и зернобобовых культур', 'тыс. т', 'Росстат', 'год', None, ('municipality',)),
+    ('AGR.MILK', 'Производство молока в хозяйствах всех категорий', 'тыс. т', 'Росстат', 'месяц', None, ('municipality',)),
+    ('CON.WORKS', 'Объем работ по виду деятельности «Строительство»', 'млн ₽', 'Росстат', 'месяц', None, ('municipality',)),
+    ('TRN.CARGO', 'Грузооборот автомобильного транспорта', 'млн т-км', 'Росстат', 'месяц', None, ()),
+    ('ENV.EMISSIONS', 'Выбросы загрязняющих веществ в атмосферный воздух от стационарных источников', 'тыс. т', 'Росприроднадзор', 'год', None, ('municipality', 'okved')),
+]
+
+# Разговорные синонимы для поиска
+KEYWORDS = {
+    'LAB.SAL': 'зарплата зп оплата труда',
+    'LAB.UNEMP': 'безработные занятость',
+    'LAB.VAC': 'вакансии спрос на труд',
+    'DEM.POP': 'население жители',
+    'DEM.ARRIVALS': 'миграция',
+    'DEM.DEPARTURES': 'миграция',
+    'ECO.GRP': 'ВРП экономика',
+    'ECO.IPI': 'ИПП промышленность',
+    'ECO.CPI': 'ИПЦ инфляция цены',
+    'ECO.SHIP': 'промышленность отгрузка',
+    'SOC.INCOME': 'доходы',
+    'SOC.HOUSING': 'жилье строительство',
+    'ENV.EMISSIONS': 'экология',
+}
+
+# Коды пола не совпадают с буквами разделов ОКВЭД (M, F)
+SEXES = [('MALE', 'мужчины'), ('FEMALE', 'женщины')]
+AGE_GROUPS = [('0_14', '0-14 лет'), ('15_29', '15-29 лет'), ('30_49', '30-49 лет'), ('50_64', '50-64 лет'), ('65P', '65 лет и старше')]
+
+
+def _breakdown(kind):
+    """Элементы разреза: (суффикс кода, подпись)"""
+    if kind == 'municipality':
+        return [(code.upper(), municipalities.NAMES[code]) for code in municipalities.CODES]
+    if kind == 'okved':
+        return [(code, f"раздел {code} «{name}»") for code, name in okved.SECTION_NAMES.items()]
+    if kind == 'municipality-okved':
+        return [
+            (f"{m_code}.{s_code}", f"{m_name}, {s_name}")
+            for m_code, m_name in _breakdown('municipality')
+            for s_code, s_name in _breakdown('okved')
+        ]
+    if kind == 'sex':
+        return SEXES
+    return AGE_GROUPS
+
+
+def build_catalog():
+    """Все ряды каталога: словари с кодом, названием, единицей, источником"""
+    catalog = []
+    for code, name, unit, source, periodicity, page, breakdowns in BASE_INDICATORS:
+        entry = {'unit': unit, 'source': source, 'periodicity': periodicity, 'page': page, 'keywords': KEYWORDS.get(code, '')}
+        catalog.append(dict(entry, code=code, name=name, breakdown='Тульская область'))
+        for kind in breakdowns:
+            for suffix, label in _breakdown(kind):
+                catalog.append(dict(entry, code=f"{code}.{suffix}", name=f"{name}: {label}", breakdown=label))
+    return catalog
+
+
+class IndicatorCatalog:
+    """Каталог показателей с поисковым индексом"""
+
+    def __init__(self, entries):
+        self.entries = entries
+        self.index = InvertedIndex(entries, fields=('name', 'code', 'breakdown', 'unit', 'source', 'periodicity', 'keywords'), boost_field='name')
+        self._by_code = {entry['code']: i for i, entry in enumerate(entries)}
+        self.sources = sorted({entry['source'] for entry in entries})
+
+    def __len__(self):
+        return len(self.entries)
+
+    def search(self, query, limit=50):
+        """Найденные записи (не больше limit) и общее число совпадений"""
+        ids, total = self.index.search(query, limit)
+        return [self.entries[i] for i in ids.tolist()], total
+
+    def get(self, code):
+        position = self._by_code.get(code)
+        return None if position is None else self.entries[position]
+
+
+def get_catalog():
+    """Каталог процесса с индексом, построенный один раз"""
+    return cache.get_or_compute('indicator-catalog', 'all', lambda: IndicatorCatalog(build_catalog()), maxsize=1)
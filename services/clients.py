@@ -0,0 +1,57 @@
+"""
+Пулы соединений с внешними API.
+
+Колбэки и сервисы, которые ходят в HTTP-источники (Росстат, Минфин, лента
+вакансий), берут соединения из общего для процесса пула, а не открывают их
+на каждый запрос. Размер пула задается CLIENT_POOL_SIZE; gunicorn.conf.py
+выставляет его по числу потоков (gthread) или соединений (gevent) воркера.
+
+Пул создается при первом обращении, то есть уже в процессе воркера после
+fork, и не разделяется между процессами.
+"""
+
+import json
+import os
+import threading
+
+from services.metrics import HTTP_REQUEST_SECONDS
+
+CLIENT_POOL_SIZE = int(os.getenv('CLIENT_POOL_SIZE', 8))
+
+# Таймауты внешних запросов, секунд
+HTTP_CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', 3))
+HTTP_READ_TIMEOUT = float(os.getenv('HTTP_READ_TIMEOUT', 15))
+HTTP_RETRIES = int(os.getenv('HTTP_RETRIES', 2))
+
+_lock = threading.Lock()
+_http = None
+
+
+def get_http():
+    """Пул HTTP-соединений urllib3 (потокобезопасен) с повторами и таймаутами"""
+    global _http
+    if _http is None:
+        with _lock:
+            if _http is None:
+                import urllib3
+
+                _http = urllib3.PoolManager(
+                    num_pools=16,
+                    maxsize=CLIENT_POOL_SIZE,
+                    block=True,
+                    timeout=urllib3.Timeout(connect=HTTP_CONNECT_TIMEOUT, read=HTTP_READ_TIMEOUT),
+                    retries=urllib3.Retry(
+                        total=HTTP_RETRIES, backoff_factor=0.3,
+                        status_forcelist=(502, 503, 504), allowed_methods=('GET',)
+                    ),
+                )
+    return _http
+
+
+def fetch_json(url, params=None, label='http'):
+    """GET-запрос к внешнему API; RuntimeError при ответе с ошибкой"""
+    with HTTP_REQUEST_SECONDS.time(upstream=label):
+        response = get_http().request('GET', url, fields=params)
+    if response.status >= 400:
+        raise RuntimeError(f"{url}: HTTP {response.status}")
+    return json.loads(response.data.decode('utf-8'))
@@ -0,0 +1,110 @@
+"""
+Источники данных дашборда: региональные ряды и архив показателей по муниципалитетам
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from services import cache, municipalities
+from services.archive import IndicatorArchive
+
+SAMPLE_DATA_SEED = int(os.getenv('SAMPLE_DATA_SEED', 71))
+
+# Подписи колонок архива показателей
+COLUMN_LABELS = {
+    'date': 'Дата',
+    'municipality': 'Муниципалитет',
+    'unemployment': 'Безработица, %',
+    'salary': 'Зарплата, ₽',
+    'population': 'Население, чел.',
+    'investment': 'Инвестиции, ₽',
+    'gdp': 'ВРП, ₽',
+}
+
+# Генерация тестовых данных для демонстрации
+def generate_sample_data():
+    """Генерирует пример данных для демонстрации"""
+    dates = pd.date_range(start='2020-01-01', end='2024-12-31', freq='ME')
+    # Фиксированное зерно: данные должны совпадать во всех процессах,
+    # включая воркеры gunicorn и процессы фоновых заданий
+    rng = np.random.default_rng(SAMPLE_DATA_SEED)
+
+    # Сезонность: безработица выше зимой
+    month = dates.month.to_numpy() - 1
+    unemployment_season = 0.25 * np.cos(2 * np.pi * month / 12)
+
+    # Основные показатели
+    data = {
+        'date': dates,
+        'unemployment': 4.5 - 0.3 * np.sin(np.linspace(0, 4*np.pi, len(dates))) + unemployment_season + rng.normal(0, 0.1, len(dates)),
+        'salary': 35000 + 5000 * np.linspace(0, 1, len(dates)) + rng.normal(0, 500, len(dates)),
+        'population': 1.48e6 - 2000 * np.linspace(0, 1, len(dates)) + rng.normal(0, 1000, len(dates)),
+        'investment': 80e9 + 10e9 * np.linspace(0, 1, len(dates)) + rng.normal(0, 2e9, len(dates)),
+        'gdp': 500e9 + 30e9 * np.linspace(0, 1, len(dates)) + rng.normal(0, 5e9, len(dates))
+    }
+
+    df = pd.DataFrame(data)
+    return df
+
+
+def get_sample_data():
+    """Региональные ряды, сгенерированные один раз на процесс"""
+    return cache.get_or_compute('sample-data', 'region', generate_sample_data)
+
+
+def build_archive_frame(df, seed=71):
+    """Раскладывает региональные ряды по муниципалитетам (месяц × муниципалитет)"""
+    rng = np.random.default_rng(seed)
+    codes = municipalities.CODES
+    population = np.array([municipalities.POPULATION[code] for code in codes])
+    share = (population / population.sum())[:, None]
+
+    # Муниципальные отклонения от среднего по области
+    salary_factor = rng.uniform(0.8, 1.1, len(codes))[:, None]
+    salary_factor[codes.index('tula')] = 1.2
+    economy_factor = rng.uniform(0.7, 1.3, len(codes))[:, None]
+    unemployment_shift = rng.normal(0, 0.6, len(codes))[:, None]
+
+    n_dates = len(df)
+    frame = pd.DataFrame({
+        'date': np.tile(df['date'].to_numpy(), len(codes)),
+        'municipality': np.repeat([municipalities.NAMES[code] for code in codes], n_dates),
+        'unemployment': (df['unemployment'].to_numpy() + unemployment_shift).clip(0.5).ravel(),
+        'salary': (df['salary'].to_numpy() * salary_factor).ravel(),
+        'population': (df['population'].to_numpy() * share).ravel(),
+        'investment': (df['investment'].to_numpy() * share * economy_factor).ravel(),
+        'gdp': (df['gdp'].to_numpy() * share * economy_factor).ravel(),
+    })
+    return frame
+
+
+def frame_version(df):
+    """
+    Версия таблицы рядов по содержимому; считается один раз на объект.
+
+    Версия хранится в df.attrs вместе с id таблицы: pandas копирует attrs в
+    производные таблицы (срезы, копии), и у них версия считается заново.
+    """
+    owner, version = df.attrs.get('data_version', (None, None))
+    if owner != id(df):
+        version = cache.dataset_version(df['date'].to_numpy(), df.drop(columns='date').to_numpy())
+        df.attrs['data_version'] = (id(df), version)
+    return version
+
+
+def data_version():
+    """Версия региональных рядов: меняется при обновлении данных"""
+    return frame_version(get_sample_data())
+
+
+def get_archive():
+    """Архив показателей по муниципалитетам, построенный один раз на версию данных"""
+    df = get_sample_data()
+    version = data_version()
+    return cache.get_or_compute(
+        'archive', version,
+        lambda: IndicatorArchive.from_frame(build_archive_frame(df)),
+        maxsize=2
+    )
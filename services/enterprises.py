@@ -0,0 +1,167 @@
+"""
+Реестр предприятий области для рейтингов на странице экономики.
+
+Реестр хранится колонками NumPy: выручка, численность, код ОКВЭД,
+раздел и муниципалитет - по одному массиву на поле, названия - массивом
+строк. При построении один раз считаются порядки «по убыванию выручки»
+внутри каждого раздела, каждого муниципалитета и каждой пары
+раздел × муниципалитет; запрос топ-N для одной группы - срез готового
+индекса, для нескольких групп - отбор из голов их индексов через
+np.argpartition.
+"""
+
+import os
+
+import numpy as np
+
+from services import cache, municipalities, okved
+
+# Число предприятий в сгенерированном реестре
+ENTERPRISE_COUNT = int(os.getenv('ENTERPRISE_COUNT', 40000))
+
+# Крупнейшие предприятия: (название, группа ОКВЭД, муниципалитет, выручка млн ₽, работники)
+MAJOR_ENTERPRISES = [
+    ('Тулачермет', 2410, 'tula', 85200, 5200),
+    ('Щекиноазот', 2014, 'shchekino', 72500, 4100),
+    ('АК ТУЛАМАШЗАВОД', 3030, 'tula', 45800, 6800),
+    ('Новомосковская ГРЭС', 3511, 'novomoskovsk', 38200, 900),
+    ('ЕВРАЗ Ванадий Тула', 2410, 'tula', 32500, 1300),
+    ('Тульский патронный завод', 2540, 'tula', 28900, 3200),
+    ('Полипласт', 2059, 'novomoskovsk', 25400, 800),
+    ('Косогорский металлургический завод', 2410, 'tula', 22100, 1900),
+]
+
+_NAME_PREFIXES = ['ООО', 'АО', 'ПАО', 'ИП']
+_NAME_WORDS = [
+    'Тула', 'Ока', 'Упа', 'Заря', 'Прогресс', 'Альфа', 'Вектор', 'Сервис', 'Строй',
+    'Агро', 'Техно', 'Металл', 'Транс', 'Торг', 'Энерго', 'Инвест', 'Пром', 'Хим',
+]
+
+
+def _group_index(keys, values):
+    """
+    Порядок строк по группам и убыванию values внутри группы.
+
+    Возвращает (order, starts, group_keys): строки группы g - это
+    order[starts[g]:starts[g + 1]], уже отсортированные.
+    """
+    order = np.lexsort((-values, keys))
+    sorted_keys = keys[order]
+    boundaries = np.flatnonzero(np.diff(sorted_keys)) + 1
+    starts = np.concatenate([[0], boundaries, [len(order)]])
+    return order, starts, sorted_keys[starts[:-1]]
+
+
+class EnterpriseRegistry:
+    """Колоночный реестр предприятий с индексами для рейтингов"""
+
+    def __init__(self, names, okved_codes, municipality, revenue, employees):
+        self.names = np.asarray(names, dtype=object)
+        self.okved = np.asarray(okved_codes, dtype=np.int16)
+        self.sector = okved.section_index(self.okved)
+        self.municipality = np.asarray(municipality, dtype=np.int8)
+        self.revenue = np.asarray(revenue, dtype=np.float64)
+        self.employees = np.asarray(employees, dtype=np.int32)
+        self.size = len(self.names)
+
+        self._order = np.argsort(-self.revenue, kind='stable')
+        n_municipalities = len(municipalities.CODES)
+        self._indexes = {
+            'sector': self._build_index(self.sector.astype(np.int64)),
+            'municipality': self._build_index(self.municipality.astype(np.int64)),
+            'pair': self._build_index(self.sector.astype(np.int64) * n_municipalities + self.municipality),
+        }
+
+    def _build_index(self, keys):
+        order, starts, group_keys = _group_index(keys, self.revenue)
+        return order, {int(key): (starts[i], starts[i + 1]) for i, key in enumerate(group_keys)}
+
+    def _group(self, kind, key):
+        order, bounds = self._indexes[kind]
+        start, end = bounds.get(int(key), (0, 0))
+        return order[start:end]
+
+    def top(self, n=10, sectors=None, municipality_ids=None):
+        """
+        Индексы n предприятий с наибольшей выручкой.
+
+        sectors и municipality_ids - списки индексов разделов и муниципалитетов
+        (None или пустой список - без фильтра).
+        """
+        sectors, municipality_ids = list(sectors or []), list(municipality_ids or [])
+        if not sectors and not municipality_ids:
+            return self._order[:n]
+        if not municipality_ids:
+            heads = [self._group('sector', s)[:n] for s in sectors]
+        elif not sectors:
+            heads = [self._group('municipality', m)[:n] for m in municipality_ids]
+        else:
+            n_municipalities = len(municipalities.CODES)
+            heads = [
+                self._group('pair', s * n_municipalities + m)[:n]
+                for s in sectors for m in municipality_ids
+            ]
+        if len(heads) == 1:
+            return heads[0]
+
+        # Топ каждой группы уже отсортирован: общий топ - среди их голов
+        candidates = np.concatenate(heads)
+        if len(candidates) > n:
+            candidates = candidates[np.argpartition(-self.revenue[candidates], n - 1)[:n]]
+        return candidates[np.argsort(-self.revenue[candidates], kind='stable')]
+
+    def records(self, indices):
+        """Строки реестра для вывода"""
+        return [
+            {
+                'name': self.names[i],
+                'okved': okved.format_code(int(self.okved[i])),
+                'sector': okved.SECTION_CODES[self.sector[i]],
+                'municipality': municipalities.CODES[self.municipality[i]],
+                'revenue': float(self.revenue[i]),
+                'employees': int(self.employees[i]),
+            }
+            for i in indices
+        ]
+
+
+def generate_registry(count=ENTERPRISE_COUNT, seed=71):
+    """Реестр: крупнейшие предприятия и сгенерированные малые и средние"""
+    rng = np.random.default_rng(seed)
+    n = max(count - len(MAJOR_ENTERPRISES), 0)
+
+    # Группы ОКВЭД: класс из справочника, подкласс и группа случайно
+    classes = rng.choice(okved.CLASSES, n)
+    codes = classes * 100 + rng.integers(1, 10, n) * 10 + rng.integers(0, 10, n)
+
+    population = np.array([municipalities.POPULATION[code] for code in municipalities.CODES])
+    municipality = rng.choice(len(population), n, p=population / population.sum())
+
+    revenue = rng.lognormal(np.log(15), 1.8, n)
+    employees = np.maximum(1, np.rint(revenue * rng.uniform(0.3, 1.5, n))).astype(np.int32)
+
+    prefixes = rng.choice(_NAME_PREFIXES, n)
+    words = rng.choice(_NAME_WORDS, (n, 2))
+    names = [f"{p} «{a}{b.lower()}-{i + 1}»" for i, (p, (a, b)) in enumerate(zip(prefixes, words))]
+
+    major_names, major_codes, major_areas, major_revenue, major_employees = zip(*MAJOR_ENTERPRISES)
+    return EnterpriseRegistry(
+        list(major_names) + names,
+        np.concatenate([major_codes, codes]),
+        np.concatenate([[municipalities.CODES.index(code) for code in major_areas], municipality]),
+        np.concatenate([major_revenue, revenue]),
+        np.concatenate([major_employees, employees]),
+    )
+
+
+def get_registry():
+    """Реестр процесса, построенный один раз"""
+    return cache.get_or_compute('enterprises', ENTERPRISE_COUNT, generate_registry, maxsize=1)
+
+
+def get_sector_tree():
+    """Дерево ОКВЭД с числом предприятий, выручкой и численностью работников"""
+    def build():
+        registry = get_registry()
+        return okved.OkvedTree(registry.okved, revenue=registry.revenue, employees=registry.employees)
+    return cache.get_or_compute('okved-tree', ENTERPRISE_COUNT, build, maxsize=1)
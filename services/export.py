@@ -0,0 +1,326 @@
+"""
+Выгрузка данных архива показателей в CSV, XLSX и Parquet.
+
+Небольшие выгрузки CSV отдаются потоково: генератор формирует ответ порциями
+строк, и память не зависит от объёма выгрузки. XLSX и Parquet пишутся порциями
+во временный файл. Выгрузки больше порога собираются фоновым потоком,
+клиент получает идентификатор задания и забирает готовый файл позже.
+
+Состояние фоновых выгрузок - файлы-описания JSON рядом с готовыми файлами
+в каталоге EXPORT_JOB_DIR, общем для всех процессов gunicorn: статус
+задания виден любому процессу, в том числе после перезапуска воркера.
+"""
+
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from flask import Blueprint, Response, jsonify, request, send_file, stream_with_context, url_for
+
+from services import municipalities
+
+logger = logging.getLogger(__name__)
+
+# Формат: (MIME-тип, расширение, необязательная зависимость)
+FORMATS = {
+    'csv': ('text/csv', 'csv', None),
+    'xlsx': ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', 'xlsx', 'openpyxl'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet', 'pyarrow'),
+}
+
+# Строк в одной порции при записи
+CHUNK_ROWS = int(os.getenv('EXPORT_CHUNK_ROWS', 50000))
+
+# Выгрузки больше этого числа ячеек выполняются в фоне
+BACKGROUND_CELLS = int(os.getenv('EXPORT_BACKGROUND_CELLS', 2000000))
+
+# Время хранения готовых файлов фоновых выгрузок, секунд; задание, которое
+# столько же не завершается (процесс остановлен), считается устаревшим
+JOB_TTL = int(os.getenv('EXPORT_JOB_TTL', 3600))
+
+# Каталог описаний и файлов фоновых выгрузок
+JOB_DIR = os.getenv('EXPORT_JOB_DIR', os.path.join(tempfile.gettempdir(), 'tula-dashboard-exports'))
+
+_JOB_ID = re.compile(r'[0-9a-f]{32}')
+
+# Ограничение формата XLSX на число строк листа
+XLSX_MAX_ROWS = 1048575
+
+KEY_COLUMNS = ['date', 'municipality']
+
+blueprint = Blueprint('export', __name__, url_prefix='/export')
+
+_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv('EXPORT_WORKERS', 2)),
+    thread_name_prefix='export'
+)
+_cleanup_lock = threading.Lock()
+
+
+def _split(value):
+    return [part.strip() for part in (value or '').split(',') if part.strip()]
+
+
+def _parse_date(value):
+    if not value:
+        return None
+    return datetime.strptime(value[:10], '%Y-%m-%d').strftime('%Y-%m-%d')
+
+
+def parse_export_args(args, archive):
+    """Проверка параметров выгрузки; ValueError с описанием ошибки"""
+    fmt = args.get('format', 'csv').lower()
+    if fmt not in FORMATS:
+        raise ValueError(f"Неизвестный формат: {fmt}")
+
+    available = [name for name in archive.names if name not in KEY_COLUMNS]
+    indicators = [i for i in _split(args.get('indicators')) if i != 'all'] or available
+    unknown = set(indicators) - set(available)
+    if unknown:
+        raise ValueError(f"Неизвестные показатели: {', '.join(sorted(unknown))}")
+
+    codes = [c for c in _split(args.get('municipalities')) if c != 'all']
+    unknown = set(codes) - set(municipalities.NAMES)
+    if unknown:
+        raise ValueError(f"Неизвестные муниципалитеты: {', '.join(sorted(unknown))}")
+
+    try:
+        start, end = _parse_date(args.get('start')), _parse_date(args.get('end'))
+    except ValueError:
+        raise ValueError("Даты указываются в формате ГГГГ-ММ-ДД")
+
+    return {
+        'format': fmt,
+        'columns': KEY_COLUMNS + indicators,
+        'municipalities': [municipalities.NAMES[code] for code in codes],
+        'start': start,
+        'end': end,
+    }
+
+
+def iter_chunks(archive, indices, columns):
+    """Порции выгрузки в виде небольших DataFrame"""
+    import pandas as pd
+
+    for start in range(0, len(indices), CHUNK_ROWS):
+        part = indices[start:start + CHUNK_ROWS]
+        yield pd.DataFrame({name: archive.values(name, part) for name in columns})
+
+
+def iter_csv(archive, indices, columns):
+    """Генератор CSV: заголовок и строки порциями"""
+    yield ','.join(columns) + '\n'
+    for chunk in iter_chunks(archive, indices, columns):
+        yield chunk.to_csv(index=False, header=False)
+
+
+def _write_xlsx(path, archive, indices, columns):
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('data')
+    sheet.append(columns)
+    for chunk in iter_chunks(archive, indices, columns):
+        for row in chunk.itertuples(index=False):
+            sheet.append(list(row))
+    workbook.save(path)
+
+
+def _write_parquet(path, archive, indices, columns):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer = None
+    try:
+        for chunk in iter_chunks(archive, indices, columns):
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def _write_csv(path, archive, indices, columns):
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        for part in iter_csv(archive, indices, columns):
+            f.write(part)
+
+
+WRITERS = {'csv': _write_csv, 'xlsx': _write_xlsx, 'parquet': _write_parquet}
+
+
+def write_export(spec, archive, indices, directory=None):
+    """Запись выгрузки во временный файл (в каталоге directory); возвращает путь"""
+    _, extension, _ = FORMATS[spec['format']]
+    fd, path = tempfile.mkstemp(prefix='export-', suffix=f'.{extension}', dir=directory)
+    os.close(fd)
+    try:
+        WRITERS[spec['format']](path, archive, indices, spec['columns'])
+    except Exception:
+        os.remove(path)
+        raise
+    return path
+
+
+def _download_name(spec):
+    _, extension, _ = FORMATS[spec['format']]
+    return f"tula_indicators_{datetime.now():%Y%m%d_%H%M}.{extension}"
+
+
+def _manifest_path(job_id):
+    return os.path.join(JOB_DIR, f"{job_id}.json")
+
+
+def _save_job(job_id, job):
+    """Запись описания задания: через временный файл, чтобы читатели не видели его наполовину"""
+    os.makedirs(JOB_DIR, exist_ok=True)
+    fd, path = tempfile.mkstemp(dir=JOB_DIR, prefix=f'.{job_id}-', suffix='.json')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump(job, f, ensure_ascii=False)
+    os.replace(path, _manifest_path(job_id))
+
+
+def _expired(job, now):
+    started = job['finished'] or job['started']
+    return now - started > JOB_TTL
+
+
+def _remove_job(job_id, job):
+    for path in (job.get('path'), _manifest_path(job_id)):
+        if path and os.path.exists(path):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def _load_job(job_id):
+    """Описание задания или None; просроченное задание удаляется вместе с файлом"""
+    if not _JOB_ID.fullmatch(job_id):
+        return None
+    try:
+        with open(_manifest_path(job_id), encoding='utf-8') as f:
+            job = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if _expired(job, time.time()):
+        _remove_job(job_id, job)
+        return None
+    return job
+
+
+def _cleanup_jobs():
+    """Удаление просроченных заданий и их файлов"""
+    if not os.path.isdir(JOB_DIR) or not _cleanup_lock.acquire(blocking=False):
+        return
+    try:
+        for name in os.listdir(JOB_DIR):
+            job_id, extension = os.path.splitext(name)
+            if extension == '.json' and _JOB_ID.fullmatch(job_id):
+                _load_job(job_id)
+    finally:
+        _cleanup_lock.release()
+
+
+def _run_job(job_id, job, archive, indices):
+    spec = job['spec']
+    _, extension, _ = FORMATS[spec['format']]
+    try:
+        path = write_export(spec, archive, indices, directory=JOB_DIR)
+        target = os.path.join(JOB_DIR, f"{job_id}.{extension}")
+        os.replace(path, target)
+        update = {'status': 'done', 'path': target}
+    except Exception as e:
+        logger.exception(f"Export job {job_id} failed")
+        update = {'status': 'failed', 'error': str(e)}
+    _save_job(job_id, dict(job, finished=time.time(), **update))
+
+
+def submit_job(spec, archive, indices):
+    """Постановка выгрузки в фоновую очередь"""
+    _cleanup_jobs()
+    job_id = uuid.uuid4().hex
+    job = {'status': 'running', 'spec': spec, 'started': time.time(), 'finished': None, 'rows': len(indices)}
+    _save_job(job_id, job)
+    _executor.submit(_run_job, job_id, job, archive, indices)
+    logger.info(f"Export job {job_id} queued: {len(indices)} rows, {spec['format']}")
+    return job_id
+
+
+def _send_and_remove(path, spec):
+    mimetype, _, _ = FORMATS[spec['format']]
+    response = send_file(path, mimetype=mimetype, as_attachment=True, download_name=_download_name(spec))
+    response.call_on_close(lambda: os.path.exists(path) and os.remove(path))
+    return response
+
+
+@blueprint.route('')
+def export_data():
+    """Выгрузка показателей: /export?format=csv&indicators=gdp,salary&municipalities=tula&start=...&end=..."""
+    from services.data import get_archive
+
+    archive = get_archive()
+    try:
+        spec = parse_export_args(request.args, archive)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    dependency = FORMATS[spec['format']][2]
+    if dependency:
+        try:
+            __import__(dependency)
+        except ImportError:
+            return jsonify({'error': f"Формат {spec['format']} недоступен: не установлен {dependency}"}), 501
+
+    indices = archive.select(
+        isin={'municipality': spec['municipalities']},
+        between={'date': (spec['start'], spec['end'])}
+    )
+    if spec['format'] == 'xlsx' and len(indices) > XLSX_MAX_ROWS:
+        return jsonify({'error': "Слишком много строк для XLSX, выберите CSV или Parquet"}), 400
+
+    if len(indices) * len(spec['columns']) > BACKGROUND_CELLS:
+        job_id = submit_job(spec, archive, indices)
+        return jsonify({
+            'job_id': job_id,
+            'status': 'running',
+            'status_url': url_for('export.export_job', job_id=job_id),
+        }), 202
+
+    if spec['format'] == 'csv':
+        mimetype, _, _ = FORMATS['csv']
+        return Response(
+            stream_with_context(iter_csv(archive, indices, spec['columns'])),
+            mimetype=mimetype,
+            headers={'Content-Disposition': f'attachment; filename="{_download_name(spec)}"'}
+        )
+
+    return _send_and_remove(write_export(spec, archive, indices), spec)
+
+
+@blueprint.route('/jobs/<job_id>')
+def export_job(job_id):
+    """Статус фоновой выгрузки или готовый файл"""
+    _cleanup_jobs()
+    job = _load_job(job_id)
+    if not job or (job['status'] == 'done' and not os.path.exists(job['path'])):
+        return jsonify({'error': "Задание не найдено или устарело"}), 404
+    if job['status'] == 'running':
+        return jsonify({'job_id': job_id, 'status': 'running', 'rows': job['rows']}), 202
+    if job['status'] == 'failed':
+        return jsonify({'job_id': job_id, 'status': 'failed', 'error': job['error']}), 500
+
+    mimetype, _, _ = FORMATS[job['spec']['format']]
+    return send_file(
+        job['path'], mimetype=mimetype, as_attachment=True,
+        download_name=_download_name(job['spec'])
+    )
@@ -0,0 +1,401 @@
+"""
+Геометрия муниципальных образований для карты.
+
+Исходные границы лежат в data/geo/municipalities.geojson. На этапе сборки
+(python -m services.geo build) они переводятся в топологию: общие границы
+соседних муниципалитетов хранятся одной дугой, координаты квантуются
+в целые числа и кодируются приращениями (формат TopoJSON). Каждая дуга
+упрощается алгоритмом Дугласа-Пекера при нескольких допусках - по одному
+файлу data/geo/municipalities.<уровень>.topo.json на уровень детализации.
+Упрощаются дуги, а не полигоны, поэтому у соседей не появляется щелей.
+
+Воркер декодирует нужный уровень в GeoJSON один раз и отдает его по
+адресу /geo/<уровень>.geojson с долгим кэшированием в браузере; графики
+ссылаются на этот адрес и не несут геометрию в JSON фигуры.
+
+Реальные границы можно положить в municipalities.geojson (свойство code
+у каждого объекта) и пересобрать уровни. Для разработки схематичные
+границы строятся командой python -m services.geo generate: ячейки
+Вороного вокруг административных центров внутри контура области.
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+
+import numpy as np
+from flask import Blueprint, Response, abort, request
+
+from services import cache, municipalities
+
+GEO_DIR = os.getenv('GEO_DIR', os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'geo'))
+SOURCE_FILE = 'municipalities.geojson'
+
+# Уровни детализации: допуск упрощения в градусах
+LEVELS = {'high': 0.0005, 'medium': 0.003, 'low': 0.01}
+DEFAULT_LEVEL = 'medium'
+
+# Сетка квантования координат топологии
+QUANTIZATION = 100000
+
+# Знаков после запятой в отдаваемом GeoJSON (~1 м)
+GEOJSON_PRECISION = 5
+
+# Схематичный контур области (долгота, широта)
+OUTLINE = [
+    (36.00, 54.05), (36.30, 54.35), (36.60, 54.55), (37.00, 54.75), (37.35, 54.88),
+    (37.80, 54.78), (38.20, 54.62), (38.55, 54.40), (38.90, 54.25), (39.05, 53.95),
+    (38.95, 53.55), (39.00, 53.20), (38.75, 52.95), (38.35, 53.00), (37.95, 53.05),
+    (37.55, 53.20), (37.20, 53.30), (36.75, 53.30), (36.35, 53.50), (36.05, 53.75),
+]
+
+# Опорные точки муниципалитетов для схематичных границ (долгота, широта)
+CENTRES = {
+    'tula': (37.62, 54.19), 'novomoskovsk': (38.30, 54.12), 'aleksin': (37.10, 54.50),
+    'donskoy': (38.38, 53.90), 'efremov': (38.10, 53.20), 'novogurovsky': (37.35, 54.38),
+    'slavny': (36.85, 53.78), 'arsenyevo': (36.45, 53.60), 'belev': (36.15, 53.85),
+    'bogoroditsk': (38.10, 53.72), 'venev': (38.27, 54.38), 'volovo': (37.95, 53.50),
+    'dubna': (37.00, 54.20), 'zaoksky': (37.40, 54.73), 'kamenka': (38.75, 53.20),
+    'kimovsk': (38.62, 53.98), 'kireevsk': (37.85, 53.88), 'kurkino': (38.65, 53.45),
+    'odoev': (36.68, 53.94), 'plavsk': (37.30, 53.70), 'suvorov': (36.57, 54.15),
+    'teploe': (37.60, 53.55), 'uzlovaya': (38.05, 53.98), 'chern': (36.90, 53.45),
+    'shchekino': (37.50, 53.98), 'yasnogorsk': (37.72, 54.48),
+}
+
+
+# --- Схематичные границы ---
+
+def _clip(ring, point, other):
+    """Часть кольца, которая ближе к point, чем к other (отсечение полуплоскостью)"""
+    point, other = np.asarray(point), np.asarray(other)
+    normal = other - point
+    offset = normal @ (point + other) / 2
+    result = []
+    for a, b in zip(ring, ring[1:] + ring[:1]):
+        inside_a, inside_b = a @ normal <= offset, b @ normal <= offset
+        if inside_a:
+            result.append(a)
+        if inside_a != inside_b:
+            t = (offset - a @ normal) / ((b - a) @ normal)
+            result.append(a + t * (b - a))
+    return result
+
+
+def voronoi_cells(centres, outline):
+    """Ячейки Вороного опорных точек внутри контура: {код: кольцо}"""
+    outline = [np.asarray(p, dtype=float) for p in outline]
+    cells = {}
+    for code, point in centres.items():
+        ring = outline
+        for other_code, other in centres.items():
+            if other_code != code:
+                ring = _clip(ring, point, other)
+        cells[code] = ring
+    return cells
+
+
+def _wiggle(points, seed, spacing=0.01, amplitude=0.06):
+    """Уплотнение дуги и гладкое поперечное смещение, нулевое на концах"""
+    points = np.asarray(points, dtype=float)
+    segments = np.linalg.norm(np.diff(points, axis=0), axis=1)
+    distance = np.concatenate([[0], np.cumsum(segments)])
+    length = distance[-1]
+    if length == 0:
+        return points
+    t = np.linspace(0, length, max(int(length / spacing), 2) + 1)
+    dense = np.column_stack([np.interp(t, distance, points[:, 0]), np.interp(t, distance, points[:, 1])])
+
+    tangent = np.gradient(dense, axis=0)
+    tangent /= np.linalg.norm(tangent, axis=1, keepdims=True)
+    normal = np.column_stack([-tangent[:, 1], tangent[:, 0]])
+
+    rng = np.random.default_rng(seed)
+    u = t / length
+    harmonics = np.arange(1, 6)
+    weights = rng.normal(0, 1, len(harmonics)) / harmonics
+    offset = np.sin(np.pi * np.outer(u, harmonics)) @ weights * amplitude * length / 4
+    return dense + normal * offset[:, None]
+
+
+def generate():
+    """Схематичные границы: FeatureCollection с общими дугами у соседей"""
+    cells = voronoi_cells(CENTRES, OUTLINE)
+    rings = [np.round(np.asarray(ring) * 1e6).astype(np.int64) for ring in cells.values()]
+    arcs, geometries = build_arcs([[ring] for ring in rings])
+
+    # Одна и та же дуга смещается одинаково для обоих соседей
+    wiggled = []
+    for arc in arcs:
+        key = tuple(sorted([tuple(arc[0]), tuple(arc[-1])]))
+        seed = int.from_bytes(hashlib.blake2b(repr(key).encode(), digest_size=4).digest(), 'little')
+        wiggled.append(_wiggle(arc / 1e6, seed))
+
+    features = []
+    for code, polygon in zip(cells, geometries):
+        coordinates = [np.round(_assemble(ring, wiggled), 6).tolist() for ring in polygon]
+        features.append({
+            'type': 'Feature',
+            'id': code,
+            'properties': {'code': code, 'name': municipalities.NAMES[code]},
+            'geometry': {'type': 'Polygon', 'coordinates': coordinates},
+        })
+    return {'type': 'FeatureCollection', 'features': features}
+
+
+# --- Топология ---
+
+def _edge_key(a, b):
+    return (a, b) if a <= b else (b, a)
+
+
+def build_arcs(polygons):
+    """
+    Разбиение колец на общие дуги.
+
+    polygons - список полигонов, полигон - список колец из целочисленных
+    точек (N × 2, без повторения первой точки в конце). Кольца режутся
+    в узлах, где меняется набор соседей ребра; одинаковые дуги соседей
+    хранятся один раз. Возвращает (дуги, ссылки): ссылка на дугу i - i,
+    на обращенную дугу - ~i, как в TopoJSON.
+    """
+    rings = []
+    for polygon in polygons:
+        for ring in polygon:
+            points = [tuple(p) for p in np.asarray(ring).tolist()]
+            cleaned = [p for i, p in enumerate(points) if p != points[i - 1]]
+            rings.append(cleaned)
+
+    # Какие кольца используют каждое ребро
+    users = {}
+    for index, ring in enumerate(rings):
+        for a, b in zip(ring, ring[1:] + ring[:1]):
+            users.setdefault(_edge_key(a, b), set()).add(index)
+
+    junctions = set()
+    for ring in rings:
+        n = len(ring)
+        for i in range(n):
+            before = users[_edge_key(ring[i - 1], ring[i])]
+            after = users[_edge_key(ring[i], ring[(i + 1) % n])]
+            if before != after:
+                junctions.add(ring[i])
+
+    arcs, index_by_key, references = [], {}, []
+    for ring in rings:
+        cuts = [i for i, p in enumerate(ring) if p in junctions]
+        if not cuts:
+            # Кольцо без соседей - одна замкнутая дуга
+            cuts = [ring.index(min(ring))]
+        start = cuts[0]
+        rotated = ring[start:] + ring[:start]
+        cuts = [c - start if c >= start else c - start + len(ring) for c in cuts] + [len(ring)]
+        ring_refs = []
+        for a, b in zip(cuts, cuts[1:]):
+            piece = tuple(rotated[a:b + 1] if b < len(ring) else rotated[a:] + rotated[:1])
+            if piece in index_by_key:
+                ring_refs.append(index_by_key[piece])
+            elif piece[::-1] in index_by_key:
+                ring_refs.append(~index_by_key[piece[::-1]])
+            else:
+                index_by_key[piece] = len(arcs)
+                ring_refs.append(len(arcs))
+                arcs.append(np.array(piece))
+        references.append(ring_refs)
+
+    # Ссылки обратно по полигонам
+    geometries, position = [], 0
+    for polygon in polygons:
+        geometries.append(references[position:position + len(polygon)])
+        position += len(polygon)
+    return arcs, geometries
+
+
+def _assemble(ring_refs, arcs):
+    """Кольцо из дуг по ссылкам TopoJSON (замкнутое)"""
+    points = []
+    for ref in ring_refs:
+        arc = arcs[ref] if ref >= 0 else arcs[~ref][::-1]
+        points.extend(arc[1:] if points else arc)
+    return np.asarray(points)
+
+
+def simplify(points, tolerance):
+    """Упрощение дуги Дугласом-Пекером; концы дуги сохраняются"""
+    points = np.asarray(points, dtype=float)
+    n = len(points)
+    if n <= 2 or tolerance <= 0:
+        return points
+    keep = np.zeros(n, dtype=bool)
+    keep[[0, -1]] = True
+    closed = np.array_equal(points[0], points[-1])
+    stack = [(0, n - 1)]
+    if closed:
+        # У замкнутой дуги опорная хорда вырождена: делим по самой дальней точке
+        far = int(np.argmax(np.linalg.norm(points - points[0], axis=1)))
+        keep[far] = True
+        stack = [(0, far), (far, n - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        a, b = points[first], points[last]
+        chord = b - a
+        inner = points[first + 1:last] - a
+        length = np.hypot(*chord)
+        if length == 0:
+            distances = np.hypot(inner[:, 0], inner[:, 1])
+        else:
+            distances = np.abs(chord[0] * inner[:, 1] - chord[1] * inner[:, 0]) / length
+        index = int(np.argmax(distances))
+        if distances[index] > tolerance:
+            middle = first + 1 + index
+            keep[middle] = True
+            stack.extend([(first, middle), (middle, last)])
+    return points[keep]
+
+
+def encode_topology(collection, tolerance):
+    """FeatureCollection из полигонов в TopoJSON с упрощенными дугами"""
+    features = collection['features']
+    coordinates = np.concatenate([
+        np.asarray(ring, dtype=float)
+        for feature in features for ring in feature['geometry']['coordinates']
+    ])
+    low, high = coordinates.min(axis=0), coordinates.max(axis=0)
+    scale = (high - low) / (QUANTIZATION - 1)
+
+    def quantize(ring):
+        ring = np.asarray(ring, dtype=float)
+        if np.array_equal(ring[0], ring[-1]):
+            ring = ring[:-1]
+        return np.round((ring - low) / scale).astype(np.int64)
+
+    polygons = [[quantize(ring) for ring in f['geometry']['coordinates']] for f in features]
+    arcs, geometries = build_arcs(polygons)
+
+    encoded = []
+    for arc in arcs:
+        simplified = simplify(arc, tolerance / scale.min()).astype(np.int64)
+        # Приращения вместо абсолютных координат
+        encoded.append(np.vstack([simplified[:1], np.diff(simplified, axis=0)]).tolist())
+
+    return {
+        'type': 'Topology',
+        'transform': {'scale': scale.tolist(), 'translate': low.tolist()},
+        'objects': {'municipalities': {
+            'type': 'GeometryCollection',
+            'geometries': [
+                {
+                    'type': 'Polygon',
+                    'id': feature.get('id', feature['properties'].get('code')),
+                    'properties': feature['properties'],
+                    'arcs': refs,
+                }
+                for feature, refs in zip(features, geometries)
+            ],
+        }},
+        'arcs': encoded,
+    }
+
+
+def decode_topology(topology):
+    """TopoJSON в FeatureCollection GeoJSON"""
+    scale = np.asarray(topology['transform']['scale'])
+    translate = np.asarray(topology['transform']['translate'])
+    arcs = [
+        np.round(np.cumsum(np.asarray(arc), axis=0) * scale + translate, GEOJSON_PRECISION)
+        for arc in topology['arcs']
+    ]
+    features = []
+    for geometry in topology['objects']['municipalities']['geometries']:
+        features.append({
+            'type': 'Feature',
+            'id': geometry['id'],
+            'properties': geometry['properties'],
+            'geometry': {
+                'type': 'Polygon',
+                'coordinates': [_assemble(ring, arcs).tolist() for ring in geometry['arcs']],
+            },
+        })
+    return {'type': 'FeatureCollection', 'features': features}
+
+
+def topology_path(level):
+    return os.path.join(GEO_DIR, f'municipalities.{level}.topo.json')
+
+
+def build(source=None):
+    """Сборка уровней детализации из исходного GeoJSON"""
+    with open(source or os.path.join(GEO_DIR, SOURCE_FILE), encoding='utf-8') as f:
+        collection = json.load(f)
+    sizes = {}
+    for level, tolerance in LEVELS.items():
+        topology = encode_topology(collection, tolerance)
+        with open(topology_path(level), 'w', encoding='utf-8') as f:
+            json.dump(topology, f, ensure_ascii=False, separators=(',', ':'))
+        sizes[level] = os.path.getsize(topology_path(level))
+    return sizes
+
+
+# --- Отдача геометрии ---
+
+def _geojson_payload(level):
+    """GeoJSON уровня: тело, gzip-тело и ETag; собирается один раз на воркер"""
+    def load():
+        with open(topology_path(level), encoding='utf-8') as f:
+            body = json.dumps(decode_topology(json.load(f)), ensure_ascii=False, separators=(',', ':')).encode()
+        return body, gzip.compress(body, 6), hashlib.blake2b(body, digest_size=8).hexdigest()
+    return cache.get_or_compute('geometry', level, load, maxsize=len(LEVELS))
+
+
+def geojson_url(level=DEFAULT_LEVEL):
+    """Адрес геометрии уровня; версия в адресе сбрасывает кэш браузера после пересборки"""
+    _, _, etag = _geojson_payload(level)
+    return f'/geo/{level}.geojson?v={etag}'
+
+
+def choose_level(scale):
+    """Уровень детализации по масштабу карты (geo.projection.scale)"""
+    if scale is None or scale < 2:
+        return DEFAULT_LEVEL
+    return 'high'
+
+
+blueprint = Blueprint('geo', __name__, url_prefix='/geo')
+
+
+@blueprint.route('/<level>.geojson')
+def geojson(level):
+    if level not in LEVELS:
+        abort(404)
+    body, compressed, etag = _geojson_payload(level)
+    if request.if_none_match.contains(etag):
+        return Response(status=304)
+    use_gzip = 'gzip' in request.headers.get('Accept-Encoding', '')
+    response = Response(compressed if use_gzip else body, mimetype='application/geo+json')
+    if use_gzip:
+        response.headers['Content-Encoding'] = 'gzip'
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = 86400
+    return response
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Сборка геометрии муниципалитетов')
+    parser.add_argument('command', choices=['generate', 'build'])
+    args = parser.parse_args()
+
+    os.makedirs(GEO_DIR, exist_ok=True)
+    if args.command == 'generate':
+        with open(os.path.join(GEO_DIR, SOURCE_FILE), 'w', encoding='utf-8') as f:
+            json.dump(generate(), f, ensure_ascii=False)
+    for level, size in build().items():
+        print(f"{level}: {size / 1024:.1f} KB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""
+Очередь фоновых заданий для долгих колбэков Dash.
+
+Долгие вычисления (выгрузки, многолетние пересчеты, сравнение всех
+муниципалитетов) выполняются фоновыми колбэками Dash вне рабочего процесса
+gunicorn. Бэкенд выбирается переменной JOB_BACKEND:
+
+- diskcache (по умолчанию) - локальная очередь: задания запускаются отдельными
+  процессами, состояние и прогресс хранятся в каталоге JOB_CACHE_DIR;
+- redis - очередь Celery с брокером REDIS_URL, задания выполняет отдельный
+  воркер: celery -A app:celery_app worker
+"""
+
+import logging
+import os
+import tempfile
+
+logger = logging.getLogger(__name__)
+
+JOB_BACKEND = os.getenv('JOB_BACKEND', 'diskcache').lower()
+JOB_CACHE_DIR = os.getenv('JOB_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'tula-dashboard-jobs'))
+
+# Время хранения результатов заданий, секунд
+JOB_RESULT_TTL = int(os.getenv('JOB_RESULT_TTL', 3600))
+
+# Экземпляр Celery для воркера при бэкенде redis
+celery_app = None
+
+
+def create_manager():
+    """Менеджер фоновых колбэков для dash.Dash(background_callback_manager=...)"""
+    global celery_app
+
+    if JOB_BACKEND == 'redis':
+        from celery import Celery
+        from dash import CeleryManager
+
+        redis_url = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+        celery_app = Celery(__name__, broker=redis_url, backend=redis_url)
+        logger.info(f"Background jobs: Celery on {redis_url}")
+        return CeleryManager(celery_app, expire=JOB_RESULT_TTL)
+
+    if JOB_BACKEND != 'diskcache':
+        raise ValueError(f"Неизвестный бэкенд фоновых заданий: {JOB_BACKEND}")
+
+    import diskcache
+    from dash import DiskcacheManager
+
+    logger.info(f"Background jobs: diskcache in {JOB_CACHE_DIR}")
+    return DiskcacheManager(diskcache.Cache(JOB_CACHE_DIR), expire=JOB_RESULT_TTL)
+
+
+def report_progress(set_progress, done, total):
+    """Передача прогресса задания в индикатор: (процент, подпись)"""
+    percent = int(100 * done / total) if total else 100
+    set_progress((percent, f"{percent}%"))
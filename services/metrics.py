@@ -0,0 +1,247 @@
+"""
+Метрики производительности в формате Prometheus.
+
+Гистограммы времени сборки страниц, колбэков, построения и сериализации
+графиков, объема ответов и запросов к хранилищу отдаются эндпоинтом /metrics.
+Метрики хранятся в памяти процесса: при нескольких воркерах gunicorn
+каждый воркер отдает свои значения.
+"""
+
+import bisect
+import functools
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import Blueprint, Response, g, request
+
+from services import cache, profiling
+
+# Границы корзин по умолчанию, секунд
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Границы корзин для объема ответа, байт
+BYTES_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+_registry = []
+_collectors = []
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in list(zip(names, values)) + list(extra)]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value):
+    return repr(float(value)) if value != float('inf') else '+Inf'
+
+
+class Histogram:
+    """Гистограмма с метками"""
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(name, '')) for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.setdefault(key, [[0] * (len(self.buckets) + 1), 0.0, 0])
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            series = {key: (list(counts), total, count) for key, (counts, total, count) in self._series.items()}
+        for key, (counts, total, count) in sorted(series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, [('le', _format_value(bound))])
+                lines.append(f'{self.name}_bucket{labels} {cumulative}')
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f'{self.name}_sum{labels} {total}')
+            lines.append(f'{self.name}_count{labels} {count}')
+        return lines
+
+
+def collector(func):
+    """Регистрация функции, формирующей строки метрик в момент опроса"""
+    _collectors.append(func)
+    return func
+
+
+REQUEST_SECONDS = Histogram(
+    'dashboard_request_seconds', 'Время обработки HTTP-запроса', ['endpoint']
+)
+LAYOUT_SECONDS = Histogram(
+    'dashboard_layout_build_seconds', 'Время сборки лейаута страницы', ['page']
+)
+CALLBACK_SECONDS = Histogram(
+    'dashboard_callback_seconds', 'Время выполнения колбэка Dash', ['callback']
+)
+FIGURE_SECONDS = Histogram(
+    'dashboard_figure_build_seconds', 'Время построения графика или блока страницы', ['builder']
+)
+SERIALIZATION_SECONDS = Histogram(
+    'dashboard_serialization_seconds', 'Время сериализации ответа в JSON', ['target']
+)
+RESPONSE_BYTES = Histogram(
+    'dashboard_response_bytes', 'Объем ответа', ['endpoint'], buckets=BYTES_BUCKETS
+)
+DB_QUERY_SECONDS = Histogram(
+    'dashboard_db_query_seconds', 'Время запроса к хранилищу данных', ['query']
+)
+HTTP_REQUEST_SECONDS = Histogram(
+    'dashboard_http_request_seconds', 'Время запроса к внешнему API', ['upstream']
+)
+
+
+@collector
+def _cache_metrics():
+    """Попадания и промахи кэша по пространствам имен"""
+    info = cache.cache_info()
+    lines = [
+        '# HELP dashboard_cache_requests_total Обращения к кэшу вычислений',
+        '# TYPE dashboard_cache_requests_total counter',
+    ]
+    for namespace, stats in sorted(info.items()):
+        for result in ('hits', 'misses'):
+            labels = _format_labels(('namespace', 'result'), (namespace, result))
+            lines.append(f'dashboard_cache_requests_total{labels} {stats[result]}')
+    lines += [
+        '# HELP dashboard_cache_hit_ratio Доля попаданий в кэш',
+        '# TYPE dashboard_cache_hit_ratio gauge',
+    ]
+    for namespace, stats in sorted(info.items()):
+        total = stats['hits'] + stats['misses']
+        ratio = stats['hits'] / total if total else 0.0
+        lines.append(f'dashboard_cache_hit_ratio{_format_labels(("namespace",), (namespace,))} {ratio}')
+    return lines
+
+
+def render():
+    """Все метрики в текстовом формате Prometheus"""
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    for func in _collectors:
+        lines.extend(func())
+    return '\n'.join(lines) + '\n'
+
+
+def timed_builder(func, label):
+    """Обертка функции-построителя с замером времени"""
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with FIGURE_SECONDS.time(builder=label), profiling.span('builder', label):
+            return func(*args, **kwargs)
+
+    wrapper._instrumented = True
+    return wrapper
+
+
+def instrument_builders(module, prefix=None):
+    """
+    Оборачивает функции create_* модуля замером времени построения.
+
+    Функции модуля вызывают друг друга через глобальные имена, поэтому
+    замена атрибутов модуля покрывает и вложенные вызовы из create_layout.
+    """
+    prefix = prefix or module.__name__.rsplit('.', 1)[-1]
+    for name, func in list(vars(module).items()):
+        if not name.startswith('create_') or not callable(func) or getattr(func, '_instrumented', False):
+            continue
+        if getattr(func, '__module__', None) != module.__name__:
+            continue
+        setattr(module, name, timed_builder(func, f'{prefix}.{name}'))
+
+
+def _callback_label():
+    """
+    Метка колбэка - его output из запроса, только если такой колбэк
+    зарегистрирован: иначе любой клиент мог бы заводить новые ряды метрик.
+    """
+    import dash
+    from dash import _callback
+
+    payload = request.get_json(silent=True)
+    output = payload.get('output') if isinstance(payload, dict) else None
+    if isinstance(output, str) and (output in dash.get_app().callback_map or output in _callback.GLOBAL_CALLBACK_MAP):
+        return output
+    return 'unknown'
+
+
+def _instrument_serialization():
+    """Замер сериализации ответов колбэков: to_json в dash._callback"""
+    from dash import _callback
+
+    original = _callback.to_json
+    if getattr(original, '_instrumented', False):
+        return
+
+    def to_json(value):
+        label = getattr(g, 'metrics_callback', 'unknown')
+        with SERIALIZATION_SECONDS.time(target=label):
+            return original(value)
+
+    to_json._instrumented = True
+    _callback.to_json = to_json
+
+
+blueprint = Blueprint('metrics', __name__)
+
+
+@blueprint.route('/metrics')
+def metrics_endpoint():
+    return Response(render(), mimetype=None, content_type=CONTENT_TYPE)
+
+
+def init_app(server):
+    """Подключение /metrics и замеров запросов к Flask-серверу"""
+
+    @server.before_request
+    def _start_timer():
+        g.metrics_start = time.perf_counter()
+        if request.path.endswith('/_dash-update-component'):
+            g.metrics_callback = _callback_label()
+
+    @server.after_request
+    def _observe_request(response):
+        start = g.pop('metrics_start', None)
+        if start is None or request.path == '/metrics':
+            return response
+        elapsed = time.perf_counter() - start
+        endpoint = request.endpoint or 'unknown'
+        REQUEST_SECONDS.observe(elapsed, endpoint=endpoint)
+        if 'metrics_callback' in g:
+            CALLBACK_SECONDS.observe(elapsed, callback=g.metrics_callback)
+        if not response.is_streamed and response.content_length is not None:
+            RESPONSE_BYTES.observe(response.content_length, endpoint=endpoint)
+        return response
+
+    _instrument_serialization()
+    server.register_blueprint(blueprint)
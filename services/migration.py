@@ -0,0 +1,206 @@
+"""
+Матрица миграционных потоков «откуда - куда».
+
+Территории - муниципалитеты области и внешние регионы - пронумерованы
+в AREAS. Потоки каждого года хранятся разреженно (формат COO): массивы
+отправителей, получателей и числа переехавших только для ненулевых пар.
+Прибытие, выбытие и сальдо считаются np.bincount по этим массивам.
+
+Новые годовые данные добавляются через MigrationMatrix.add_year: меняются
+массивы одного года, производные величины пересчитываются только для него.
+"""
+
+import threading
+
+import numpy as np
+
+from services import cache, geo, municipalities
+
+# Внешние регионы: (код, название, население тыс. чел., долгота, широта)
+EXTERNAL_REGIONS = [
+    ('moscow', 'Москва', 13100, 37.62, 55.75),
+    ('moscow_oblast', 'Московская обл.', 8500, 37.90, 55.40),
+    ('kaluga', 'Калужская обл.', 1070, 36.26, 54.51),
+    ('ryazan', 'Рязанская обл.', 1080, 39.74, 54.63),
+    ('oryol', 'Орловская обл.', 700, 36.07, 52.97),
+    ('lipetsk', 'Липецкая обл.', 1120, 39.60, 52.61),
+    ('voronezh', 'Воронежская обл.', 2300, 39.20, 51.67),
+    ('bryansk', 'Брянская обл.', 1170, 34.36, 53.24),
+    ('other', 'Другие регионы', 100000, 45.00, 55.00),
+    ('abroad', 'Зарубежье', 50000, 60.00, 45.00),
+]
+
+AREAS = municipalities.CODES + [code for code, _, _, _, _ in EXTERNAL_REGIONS]
+AREA_NAMES = dict(municipalities.NAMES, **{code: name for code, name, _, _, _ in EXTERNAL_REGIONS})
+N_AREAS = len(AREAS)
+N_LOCAL = len(municipalities.CODES)
+
+YEARS = list(range(2019, 2025))
+
+# Подпись агрегата мелких потоков
+OTHER_LABEL = 'Прочие'
+
+
+class MigrationMatrix:
+    """Разреженные годовые матрицы потоков с инкрементальным обновлением"""
+
+    def __init__(self, n_areas=N_AREAS):
+        self.n_areas = n_areas
+        self.version = 0
+        self._years = {}
+        self._derived = {}
+        self._lock = threading.RLock()
+
+    @property
+    def years(self):
+        return sorted(self._years)
+
+    def add_year(self, year, origin, destination, count):
+        """
+        Потоки за год (заменяют прежние данные этого года).
+
+        Повторяющиеся пары суммируются, нулевые потоки и переезды внутри
+        одной территории отбрасываются.
+        """
+        origin = np.asarray(origin, dtype=np.int64)
+        destination = np.asarray(destination, dtype=np.int64)
+        count = np.asarray(count, dtype=np.int64)
+
+        keys = origin * self.n_areas + destination
+        unique, inverse = np.unique(keys, return_inverse=True)
+        totals = np.bincount(inverse, weights=count, minlength=len(unique)).astype(np.int32)
+        origin, destination = np.divmod(unique, self.n_areas)
+        keep = (totals > 0) & (origin != destination)
+
+        with self._lock:
+            self._years[year] = (origin[keep].astype(np.int32), destination[keep].astype(np.int32), totals[keep])
+            self._derived.pop(year, None)
+            self.version += 1
+
+    def flows(self, year):
+        """Ненулевые потоки года: (отправители, получатели, числа)"""
+        return self._years[year]
+
+    def balance(self, year):
+        """Прибытие, выбытие и сальдо по территориям за год"""
+        with self._lock:
+            if year not in self._derived:
+                origin, destination, count = self._years[year]
+                arrivals = np.bincount(destination, weights=count, minlength=self.n_areas)
+                departures = np.bincount(origin, weights=count, minlength=self.n_areas)
+                self._derived[year] = {
+                    'arrivals': arrivals,
+                    'departures': departures,
+                    'net': arrivals - departures,
+                }
+            return self._derived[year]
+
+    def external_totals(self, year):
+        """Прибывшие в область извне и выбывшие из нее за год"""
+        origin, destination, count = self._years[year]
+        arrived = count[(origin >= N_LOCAL) & (destination < N_LOCAL)].sum()
+        departed = count[(origin < N_LOCAL) & (destination >= N_LOCAL)].sum()
+        return int(arrived), int(departed)
+
+    def top_flows(self, year, scope='all', limit=15):
+        """
+        Крупнейшие потоки года; остальные сводятся в «Прочие».
+
+        scope: 'internal' - между муниципалитетами, 'external' - между
+        областью и другими регионами, 'all' - все. Возвращает список
+        (отправитель, получатель, число), где территория - индекс в AREAS
+        или None для агрегата «Прочие». Число узлов не больше 2 * (limit + 1).
+        """
+        origin, destination, count = self._years[year]
+        local_origin, local_destination = origin < N_LOCAL, destination < N_LOCAL
+        if scope == 'internal':
+            mask = local_origin & local_destination
+        elif scope == 'external':
+            mask = local_origin != local_destination
+        else:
+            mask = local_origin | local_destination
+        origin, destination, count = origin[mask], destination[mask], count[mask]
+        if len(count) == 0:
+            return []
+
+        # Частичная сортировка: порядок нужен только внутри верхних limit
+        if len(count) > limit:
+            top = np.argpartition(count, -limit)[-limit:]
+        else:
+            top = np.arange(len(count))
+        top = top[np.argsort(count[top])[::-1]]
+
+        kept_origins, kept_destinations = set(origin[top].tolist()), set(destination[top].tolist())
+        result = [(int(origin[i]), int(destination[i]), int(count[i])) for i in top]
+
+        rest = np.ones(len(count), dtype=bool)
+        rest[top] = False
+        if rest.any():
+            # Мелкие потоки: территории вне верхних потоков сводятся в «Прочие»
+            other_origin = np.where(np.isin(origin[rest], list(kept_origins)), origin[rest], -1)
+            other_destination = np.where(np.isin(destination[rest], list(kept_destinations)), destination[rest], -1)
+            keys = (other_origin + 1) * (self.n_areas + 1) + other_destination + 1
+            unique, inverse = np.unique(keys, return_inverse=True)
+            sums = np.bincount(inverse, weights=count[rest])
+            for key, value in zip(unique.tolist(), sums.tolist()):
+                o, d = divmod(key, self.n_areas + 1)
+                result.append((o - 1 if o else None, d - 1 if d else None, int(value)))
+        return result
+
+
+def _coordinates():
+    local = [geo.CENTRES[code] for code in municipalities.CODES]
+    external = [(lon, lat) for _, _, _, lon, lat in EXTERNAL_REGIONS]
+    return np.array(local + external, dtype=float)
+
+
+def _populations():
+    local = [municipalities.POPULATION[code] for code in municipalities.CODES]
+    external = [population for _, _, population, _, _ in EXTERNAL_REGIONS]
+    return np.array(local + external, dtype=float)
+
+
+def generate_flows(year, seed=71):
+    """
+    Потоки за год по гравитационной модели: поток пропорционален
+    численности обеих территорий и убывает с расстоянием.
+    Потоки между внешними регионами не моделируются.
+    """
+    rng = np.random.default_rng(seed * 10000 + year)
+    points = _coordinates()
+    population = _populations()
+
+    distance = np.hypot(*(points[:, None, :] - points[None, :, :]).transpose(2, 0, 1)) + 0.3
+    intensity = np.sqrt(population[:, None] * population[None, :]) / distance ** 2
+    np.fill_diagonal(intensity, 0)
+    intensity[N_LOCAL:, N_LOCAL:] = 0
+
+    # Внутриобластные и межрегиональные переезды калибруются отдельно
+    internal = np.zeros_like(intensity, dtype=bool)
+    internal[:N_LOCAL, :N_LOCAL] = True
+    trend = 1 + 0.04 * (year - YEARS[0])
+    intensity[internal] *= 22000 / intensity[internal].sum()
+    intensity[~internal] *= 58000 * trend / intensity[~internal].sum()
+    # Центр области и Москва притягивают сильнее, чем отдают
+    intensity[:, AREAS.index('tula')] *= 1.3
+    intensity[:, AREAS.index('moscow')] *= 1.2
+
+    counts = rng.poisson(intensity)
+    origin, destination = np.nonzero(counts)
+    return origin, destination, counts[origin, destination]
+
+
+def _build_matrix():
+    matrix = MigrationMatrix()
+    for year in YEARS:
+        matrix.add_year(year, *generate_flows(year))
+    return matrix
+
+
+def get_matrix():
+    """Матрица потоков процесса; новые годы добавляются в нее add_year"""
+    return cache.get_or_compute('migration-matrix', 'region', _build_matrix, maxsize=1)
+
+
+def area_label(index):
+    return OTHER_LABEL if index is None else AREA_NAMES[AREAS[index]]
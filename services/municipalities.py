@@ -0,0 +1,44 @@
+"""
+Справочник муниципальных образований Тульской области
+"""
+
+# (код, название, численность населения, тыс. чел.)
+MUNICIPALITIES = [
+    ('tula', 'Тула', 535.0),
+    ('novomoskovsk', 'Новомосковск', 120.0),
+    ('aleksin', 'Алексин', 66.0),
+    ('donskoy', 'Донской', 60.0),
+    ('efremov', 'Ефремов', 55.0),
+    ('novogurovsky', 'Новогуровский', 5.0),
+    ('slavny', 'Славный', 1.5),
+    ('arsenyevo', 'Арсеньевский район', 11.0),
+    ('belev', 'Белёв', 17.0),
+    ('bogoroditsk', 'Богородицк', 44.0),
+    ('venev', 'Венёв', 27.0),
+    ('volovo', 'Воловский район', 11.0),
+    ('dubna', 'Дубенский район', 12.0),
+    ('zaoksky', 'Заокский район', 20.0),
+    ('kamenka', 'Каменский район', 8.0),
+    ('kimovsk', 'Кимовск', 35.0),
+    ('kireevsk', 'Киреевск', 55.0),
+    ('kurkino', 'Куркинский район', 8.0),
+    ('odoev', 'Одоевский район', 11.0),
+    ('plavsk', 'Плавск', 22.0),
+    ('suvorov', 'Суворов', 28.0),
+    ('teploe', 'Тёпло-Огарёвский район', 12.0),
+    ('uzlovaya', 'Узловая', 75.0),
+    ('chern', 'Чернский район', 14.0),
+    ('shchekino', 'Щекино', 95.0),
+    ('yasnogorsk', 'Ясногорск', 24.0),
+]
+
+CODES = [code for code, _, _ in MUNICIPALITIES]
+NAMES = {code: name for code, name, _ in MUNICIPALITIES}
+POPULATION = {code: population for code, _, population in MUNICIPALITIES}
+
+
+def dropdown_options(include_all=True):
+    """Опции выпадающего списка муниципалитетов"""
+    options = [{'label': 'Все муниципалитеты', 'value': 'all'}] if include_all else []
+    options.extend({'label': name, 'value': code} for code, name, _ in MUNICIPALITIES)
+    return options
@@ -0,0 +1,217 @@
+"""
+Классификатор видов экономической деятельности (ОКВЭД 2).
+
+Код вида деятельности хранится целым числом: раздел определяется классом
+(две первые цифры кода), например 24.10 -> 2410 -> раздел C.
+
+Иерархия: раздел -> класс (24) -> подкласс (24.1) -> группа (24.10).
+OkvedTree хранит суммы показателей на каждом уровне массивами,
+упорядоченными по коду: потомки любого узла - непрерывный диапазон
+следующего уровня, поэтому поддерево на несколько уровней вниз -
+набор срезов без обхода дерева.
+"""
+
+import numpy as np
+
+# Разделы: (буква, название, первый и последний класс раздела)
+SECTIONS = [
+    ('A', 'Сельское и лесное хозяйство', 1, 3),
+    ('B', 'Добыча полезных ископаемых', 5, 9),
+    ('C', 'Обрабатывающие производства', 10, 33),
+    ('D', 'Энергетика', 35, 35),
+    ('E', 'Водоснабжение и утилизация отходов', 36, 39),
+    ('F', 'Строительство', 41, 43),
+    ('G', 'Торговля', 45, 47),
+    ('H', 'Транспорт и хранение', 49, 53),
+    ('I', 'Гостиницы и общепит', 55, 56),
+    ('J', 'Информация и связь', 58, 63),
+    ('K', 'Финансы и страхование', 64, 66),
+    ('L', 'Операции с недвижимостью', 68, 68),
+    ('M', 'Научная и техническая деятельность', 69, 75),
+    ('N', 'Административная деятельность', 77, 82),
+    ('O', 'Госуправление', 84, 84),
+    ('P', 'Образование', 85, 85),
+    ('Q', 'Здравоохранение', 86, 88),
+    ('R', 'Культура и спорт', 90, 93),
+    ('S', 'Прочие услуги', 94, 96),
+]
+
+SECTION_CODES = [code for code, _, _, _ in SECTIONS]
+SECTION_NAMES = {code: name for code, name, _, _ in SECTIONS}
+
+# Названия классов
+CLASS_NAMES = {
+    1: 'Растениеводство и животноводство', 2: 'Лесоводство и лесозаготовки',
+    3: 'Рыболовство и рыбоводство', 5: 'Добыча угля', 6: 'Добыча нефти и газа',
+    7: 'Добыча металлических руд', 8: 'Добыча прочих полезных ископаемых',
+    9: 'Услуги в области добычи', 10: 'Пищевые продукты', 11: 'Напитки',
+    12: 'Табачные изделия', 13: 'Текстильные изделия', 14: 'Одежда',
+    15: 'Кожа и изделия из кожи', 16: 'Обработка древесины', 17: 'Бумага',
+    18: 'Полиграфия', 19: 'Кокс и нефтепродукты', 20: 'Химические вещества',
+    21: 'Лекарственные средства', 22: 'Резиновые и пластмассовые изделия',
+    23: 'Неметаллическая минеральная продукция', 24: 'Металлургия',
+    25: 'Готовые металлические изделия', 26: 'Компьютеры и электроника',
+    27: 'Электрическое оборудование', 28: 'Машины и оборудование',
+    29: 'Автотранспортные средства', 30: 'Прочие транспортные средства',
+    31: 'Мебель', 32: 'Прочие готовые изделия', 33: 'Ремонт и монтаж оборудования',
+    35: 'Электроэнергия, газ и пар', 36: 'Водоснабжение', 37: 'Сточные воды',
+    38: 'Сбор и утилизация отходов', 39: 'Ликвидация загрязнений',
+    41: 'Строительство зданий', 42: 'Инженерные сооружения',
+    43: 'Специализированные строительные работы', 45: 'Торговля автомобилями',
+    46: 'Оптовая торговля', 47: 'Розничная торговля', 49: 'Сухопутный транспорт',
+    50: 'Водный транспорт', 51: 'Воздушный транспорт', 52: 'Складское хозяйство',
+    53: 'Почтовая и курьерская связь', 55: 'Гостиницы', 56: 'Общественное питание',
+    58: 'Издательская деятельность', 59: 'Кино- и видеопроизводство',
+    60: 'Теле- и радиовещание', 61: 'Телекоммуникации',
+    62: 'Разработка программного обеспечения', 63: 'Информационные технологии',
+    64: 'Финансовые услуги', 65: 'Страхование', 66: 'Вспомогательные финансовые услуги',
+    68: 'Операции с недвижимостью', 69: 'Право и бухгалтерский учет',
+    70: 'Управленческое консультирование', 71: 'Архитектура и инженерные изыскания',
+    72: 'Научные исследования', 73: 'Реклама и исследование рынка',
+    74: 'Прочая профессиональная деятельность', 75: 'Ветеринария',
+    77: 'Аренда и лизинг', 78: 'Подбор персонала', 79: 'Туристические агентства',
+    80: 'Охрана и расследования', 81: 'Обслуживание зданий',
+    82: 'Административно-хозяйственная деятельность', 84: 'Государственное управление',
+    85: 'Образование', 86: 'Здравоохранение', 87: 'Уход с проживанием',
+    88: 'Социальные услуги без проживания', 90: 'Творчество и искусство',
+    91: 'Библиотеки, архивы, музеи', 92: 'Азартные игры', 93: 'Спорт и отдых',
+    94: 'Общественные организации', 95: 'Ремонт бытовых предметов',
+    96: 'Прочие персональные услуги',
+}
+
+# Уровни иерархии сверху вниз
+LEVELS = ('section', 'class', 'subclass', 'group')
+
+# Раздел по классу: таблица на все двузначные классы, -1 - класса нет
+_SECTION_BY_CLASS = np.full(100, -1, dtype=np.int8)
+for _index, (_, _, _first, _last) in enumerate(SECTIONS):
+    _SECTION_BY_CLASS[_first:_last + 1] = _index
+
+# Существующие классы ОКВЭД
+CLASSES = np.flatnonzero(_SECTION_BY_CLASS >= 0)
+
+
+def section_index(codes):
+    """Индексы разделов в SECTIONS для массива кодов вида DDGC (например 2410)"""
+    return _SECTION_BY_CLASS[np.asarray(codes) // 100]
+
+
+def format_code(code):
+    """2410 -> '24.10'"""
+    return f"{code // 100:02d}.{code % 100:02d}"
+
+
+def _level_keys(codes, depth):
+    """Ключи узлов уровня depth для кодов DDGC: раздел, DD, DDG, DDGC"""
+    if depth == 0:
+        return section_index(codes).astype(np.int64)
+    return np.asarray(codes, dtype=np.int64) // 10 ** (3 - depth)
+
+
+def _node_ids(keys, depth):
+    if depth == 0:
+        return [SECTION_CODES[key] for key in keys]
+    if depth == 1:
+        return [f"{key:02d}" for key in keys]
+    if depth == 2:
+        return [f"{key // 10:02d}.{key % 10}" for key in keys]
+    return [format_code(key) for key in keys]
+
+
+def _node_labels(keys, ids, depth):
+    if depth == 0:
+        return [SECTION_NAMES[code] for code in ids]
+    if depth == 1:
+        return [f"{code} {CLASS_NAMES.get(key, '')}".rstrip() for code, key in zip(ids, keys)]
+    return list(ids)
+
+
+class OkvedTree:
+    """
+    Дерево ОКВЭД с суммами показателей по узлам каждого уровня.
+
+    Узлы уровня хранятся массивами в порядке кода; для каждого узла
+    известен ключ родителя, так что дети узла - диапазон, найденный
+    бинарным поиском.
+    """
+
+    def __init__(self, codes, **measures):
+        codes = np.asarray(codes)
+        self.measures = ['count'] + list(measures)
+        self._levels = []
+        self._positions = {}
+        for depth in range(len(LEVELS)):
+            unique, inverse = np.unique(_level_keys(codes, depth), return_inverse=True)
+            sums = {'count': np.bincount(inverse, minlength=len(unique))}
+            for name, values in measures.items():
+                sums[name] = np.bincount(inverse, weights=values, minlength=len(unique))
+            ids = _node_ids(unique.tolist(), depth)
+            if depth == 0:
+                parents = np.full(len(unique), -1)
+            elif depth == 1:
+                parents = section_index(unique * 100).astype(np.int64)
+            else:
+                parents = unique // 10
+            self._levels.append({
+                'keys': unique,
+                'parents': parents,
+                'ids': ids,
+                'labels': _node_labels(unique.tolist(), ids, depth),
+                'sums': sums,
+            })
+            self._positions.update((node_id, (depth, i)) for i, node_id in enumerate(ids))
+        self.size = len(self._positions)
+
+    def __contains__(self, node_id):
+        return node_id in self._positions
+
+    def total(self, measure='count'):
+        return self._levels[0]['sums'][measure].sum()
+
+    def _children_range(self, depth, start, stop):
+        """Дети узлов [start, stop) уровня depth - диапазон уровня depth + 1"""
+        level, below = self._levels[depth], self._levels[depth + 1]
+        if start >= stop:
+            return start, start
+        first = np.searchsorted(below['parents'], level['keys'][start], 'left')
+        last = np.searchsorted(below['parents'], level['keys'][stop - 1], 'right')
+        return int(first), int(last)
+
+    def subtree(self, node_id=None, depth=2, measure='count'):
+        """
+        Потомки узла на depth уровней вниз (корень None - разделы и ниже).
+
+        Возвращает списки ids, labels, parents, values и customdata со всеми
+        показателями узла в порядке self.measures - готовые поля трассы
+        go.Treemap.
+        """
+        if node_id is None:
+            level, start, stop = 0, 0, len(self._levels[0]['keys'])
+        else:
+            level, position = self._positions[node_id]
+            if level + 1 == len(LEVELS):
+                start = stop = 0
+            else:
+                start, stop = self._children_range(level, position, position + 1)
+            level += 1
+
+        result = {'ids': [], 'labels': [], 'parents': [], 'values': [], 'customdata': []}
+        while level < len(LEVELS) and depth > 0 and start < stop:
+            nodes = self._levels[level]
+            result['ids'].extend(nodes['ids'][start:stop])
+            result['labels'].extend(nodes['labels'][start:stop])
+            if level == 0:
+                result['parents'].extend([''] * (stop - start))
+            else:
+                above = self._levels[level - 1]
+                positions = np.searchsorted(above['keys'], nodes['parents'][start:stop])
+                result['parents'].extend(above['ids'][p] for p in positions.tolist())
+            result['values'].extend(nodes['sums'][measure][start:stop].tolist())
+            result['customdata'].extend(
+                np.column_stack([nodes['sums'][name][start:stop] for name in self.measures]).tolist()
+            )
+            if level + 1 < len(LEVELS):
+                start, stop = self._children_range(level, start, stop)
+            level += 1
+            depth -= 1
+        return result
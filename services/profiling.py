@@ -0,0 +1,236 @@
+"""
+Режим профилирования запросов без передеплоя.
+
+Включается переменной PROFILE=1 (каждый запрос с вероятностью
+PROFILE_SAMPLE_RATE) или заголовком X-Profile со значением PROFILE_TOKEN.
+Для профилируемого запроса записываются:
+
+- <имя>.prof - cProfile, открывается pstats/snakeviz;
+- <имя>.folded - семплированные стеки для flamegraph.pl/speedscope;
+- <имя>.json - время (wall/CPU) и выделения памяти по каждому create_*
+  и колбэку, а также крупнейшие места выделения памяти (tracemalloc).
+
+Файлы складываются в PROFILE_DIR, краткая сводка пишется в лог.
+"""
+
+import cProfile
+import json
+import logging
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+
+from flask import g, has_request_context, request
+
+logger = logging.getLogger(__name__)
+
+PROFILE_ENABLED = os.getenv('PROFILE', 'False').lower() in ('1', 'true')
+PROFILE_SAMPLE_RATE = float(os.getenv('PROFILE_SAMPLE_RATE', 1.0))
+PROFILE_TOKEN = os.getenv('PROFILE_TOKEN', '')
+PROFILE_DIR = os.getenv('PROFILE_DIR', os.path.join(tempfile.gettempdir(), 'tula-dashboard-profiles'))
+
+# Интервал семплирования стеков, секунд
+PROFILE_INTERVAL = float(os.getenv('PROFILE_INTERVAL_MS', 5)) / 1000
+
+# Сколько мест выделения памяти сохранять в сводке
+TOP_ALLOCATIONS = 20
+
+# cProfile допускает один активный профилировщик на процесс
+_cprofile_lock = threading.Lock()
+_tracemalloc_lock = threading.Lock()
+_tracemalloc_users = 0
+
+
+class StackSampler(threading.Thread):
+    """Семплирование стека одного потока в формате folded stacks"""
+
+    def __init__(self, thread_id, interval=PROFILE_INTERVAL):
+        super().__init__(daemon=True, name='profile-sampler')
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+    def folded(self):
+        return '\n'.join(f"{stack} {count}" for stack, count in self.stacks.most_common()) + '\n'
+
+
+def _start_tracemalloc():
+    global _tracemalloc_users
+    with _tracemalloc_lock:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        _tracemalloc_users += 1
+
+
+def _stop_tracemalloc():
+    global _tracemalloc_users
+    with _tracemalloc_lock:
+        _tracemalloc_users -= 1
+        snapshot = tracemalloc.take_snapshot()
+        if _tracemalloc_users == 0:
+            tracemalloc.stop()
+    return snapshot
+
+
+def _traced_memory():
+    return tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else 0
+
+
+def _requested():
+    """Профилировать ли текущий запрос"""
+    header = request.headers.get('X-Profile')
+    if header and PROFILE_TOKEN and header == PROFILE_TOKEN:
+        return True
+    return PROFILE_ENABLED and random.random() < PROFILE_SAMPLE_RATE
+
+
+def is_active():
+    return has_request_context() and 'profile' in g
+
+
+@contextmanager
+def span(kind, label):
+    """Замер wall/CPU времени и памяти участка кода внутри профилируемого запроса"""
+    if not is_active():
+        yield
+        return
+
+    wall, cpu = time.perf_counter(), time.thread_time()
+    memory = _traced_memory()
+    try:
+        yield
+    finally:
+        g.profile['spans'].append({
+            'kind': kind,
+            'label': label,
+            'wall_ms': round((time.perf_counter() - wall) * 1000, 3),
+            'cpu_ms': round((time.thread_time() - cpu) * 1000, 3),
+            'alloc_kb': round((_traced_memory() - memory) / 1024, 1),
+        })
+
+
+def _artifact_name(label):
+    slug = re.sub(r'[^A-Za-z0-9_.-]+', '_', label).strip('_')[:60] or 'request'
+    return f"{datetime.now():%Y%m%d-%H%M%S-%f}_{slug}"
+
+
+def _start_profile():
+    if not _requested():
+        return
+
+    label = request.path
+    payload = request.get_json(silent=True) if request.is_json else None
+    # Тело запроса присылает клиент: не словарь или output не строка - метка по пути
+    output = payload.get('output') if isinstance(payload, dict) else None
+    if isinstance(output, str) and output:
+        label = f"callback {output}"
+
+    profiler = cProfile.Profile() if _cprofile_lock.acquire(blocking=False) else None
+    _start_tracemalloc()
+    sampler = StackSampler(threading.get_ident())
+    sampler.start()
+
+    g.profile = {
+        'label': label,
+        'profiler': profiler,
+        'sampler': sampler,
+        'spans': [],
+        'wall': time.perf_counter(),
+        'cpu': time.thread_time(),
+    }
+    if profiler is not None:
+        profiler.enable()
+
+
+def _finish_profile(exc=None):
+    profile = g.pop('profile', None)
+    if profile is None:
+        return
+
+    profiler = profile['profiler']
+    if profiler is not None:
+        profiler.disable()
+        _cprofile_lock.release()
+    profile['sampler'].stop()
+    snapshot = _stop_tracemalloc()
+
+    wall_ms = (time.perf_counter() - profile['wall']) * 1000
+    cpu_ms = (time.thread_time() - profile['cpu']) * 1000
+    profile['spans'].append({
+        'kind': 'callback' if profile['label'].startswith('callback ') else 'request',
+        'label': profile['label'],
+        'wall_ms': round(wall_ms, 3),
+        'cpu_ms': round(cpu_ms, 3),
+    })
+
+    try:
+        _write_artifacts(profile, snapshot, wall_ms, cpu_ms)
+    except OSError:
+        logger.exception("Не удалось записать профиль запроса")
+
+
+def _write_artifacts(profile, snapshot, wall_ms, cpu_ms):
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    base = os.path.join(PROFILE_DIR, _artifact_name(profile['label']))
+
+    if profile['profiler'] is not None:
+        profile['profiler'].dump_stats(base + '.prof')
+    with open(base + '.folded', 'w', encoding='utf-8') as f:
+        f.write(profile['sampler'].folded())
+
+    allocations = [
+        {'where': str(stat.traceback), 'size_kb': round(stat.size / 1024, 1), 'count': stat.count}
+        for stat in snapshot.statistics('lineno')[:TOP_ALLOCATIONS]
+    ]
+    with open(base + '.json', 'w', encoding='utf-8') as f:
+        json.dump({
+            'label': profile['label'],
+            'wall_ms': round(wall_ms, 3),
+            'cpu_ms': round(cpu_ms, 3),
+            'spans': profile['spans'],
+            'allocations': allocations,
+        }, f, ensure_ascii=False, indent=2)
+
+    slowest = sorted(
+        (s for s in profile['spans'] if s['kind'] == 'builder'),
+        key=lambda s: s['wall_ms'], reverse=True
+    )[:3]
+    slowest = ', '.join(f"{s['label']} {s['wall_ms']:.1f} ms" for s in slowest) or '-'
+    logger.info(
+        f"Profile {profile['label']}: wall {wall_ms:.1f} ms, cpu {cpu_ms:.1f} ms; "
+        f"slowest builders: {slowest}; artifacts: {base}.*"
+    )
+
+
+def init_app(server):
+    """Подключение профилирования запросов к Flask-серверу"""
+    if not PROFILE_ENABLED and not PROFILE_TOKEN:
+        return
+    server.before_request(_start_profile)
+    # teardown выполняется и при исключении, поэтому профилировщик не остается включенным
+    server.teardown_request(_finish_profile)
+    logger.info(f"Profiling enabled, artifacts in {PROFILE_DIR}")
@@ -0,0 +1,198 @@
+"""
+Прогноз численности населения методом передвижки возрастов.
+
+Население хранится массивом (территория × пол × возраст) по однолетним
+возрастам 0..100+ сразу для всех муниципалитетов. Шаг прогноза на год -
+несколько векторных операций над всем массивом:
+
+- дожитие: население умножается на вероятности дожития и сдвигается на
+  год возраста, последняя группа накапливается;
+- рождения: возрастные коэффициенты рождаемости × женщины 15-49 лет,
+  делятся по полу и умножаются на дожитие до конца года;
+- миграция: сальдо на 1000 жителей территории, распределенное по
+  возрастному профилю мигрантов.
+
+Область - сумма муниципалитетов. Результат кэшируется по сценарию
+и горизонту.
+"""
+
+import numpy as np
+
+from services import cache, municipalities
+
+BASE_YEAR = 2024
+HORIZON = 20
+
+# Однолетние возрасты 0..MAX_AGE, последняя группа открытая
+MAX_AGE = 100
+AGES = np.arange(MAX_AGE + 1)
+
+SEXES = ('male', 'female')
+MALE, FEMALE = 0, 1
+
+# Доля мальчиков среди родившихся
+MALE_BIRTH_SHARE = 105 / 205
+
+# Возрасты материнства
+FERTILE_AGES = slice(15, 50)
+
+AREAS = ['region'] + municipalities.CODES
+AREA_NAMES = dict(region='Тульская область', **municipalities.NAMES)
+
+# Сценарии: суммарный коэффициент рождаемости, множитель смертности,
+# ежегодное снижение смертности, множитель миграционного сальдо
+SCENARIOS = {
+    'base': {'label': 'Базовый', 'tfr': 1.4, 'mortality': 1.0, 'improvement': 0.01, 'migration': 1.0},
+    'low': {'label': 'Пессимистичный', 'tfr': 1.2, 'mortality': 1.1, 'improvement': 0.0, 'migration': 0.5},
+    'high': {'label': 'Оптимистичный', 'tfr': 1.7, 'mortality': 0.9, 'improvement': 0.02, 'migration': 1.5},
+}
+
+# Возрастно-половая структура области на начало прогноза, тыс. чел.
+# по пятилетним группам 0-4 ... 80-84, 85+
+BASE_MALE = [35, 38, 40, 42, 45, 48, 52, 55, 58, 60, 58, 55, 50, 45, 38, 30, 20, 12]
+BASE_FEMALE = [33, 36, 38, 41, 44, 47, 51, 54, 57, 62, 62, 62, 60, 58, 55, 50, 45, 38]
+
+# Сальдо миграции на 1000 жителей: центр области притягивает, малые районы теряют
+MIGRATION_RATES = {'tula': 4.0, 'novomoskovsk': 1.0, 'novogurovsky': 2.0, 'zaoksky': 3.0}
+DEFAULT_MIGRATION_RATE = -3.0
+
+
+def _single_years(groups, width=5):
+    """Пятилетние группы в однолетние возрасты; 85+ убывает до 100+"""
+    groups = np.asarray(groups, dtype=float)
+    closed = np.repeat(groups[:-1] / width, width)
+    tail_ages = MAX_AGE + 1 - closed.size
+    decay = 0.8 ** np.arange(tail_ages)
+    return np.concatenate([closed, groups[-1] * decay / decay.sum()])
+
+
+def base_population():
+    """Население на начало прогноза: (территория без области × пол × возраст), человек"""
+    structure = np.stack([_single_years(BASE_MALE), _single_years(BASE_FEMALE)])
+    structure /= structure.sum()
+
+    population = np.array([municipalities.POPULATION[code] for code in municipalities.CODES]) * 1000
+    # Малые районы старше областного центра: сдвиг структуры к старшим возрастам
+    tilt = 0.15 * (1 - np.log(population) / np.log(population.max()))
+    weights = 1 + tilt[:, None] * (AGES / MAX_AGE * 2 - 1)[None, :]
+    shares = structure[None, :, :] * weights[:, None, :]
+    shares /= shares.sum(axis=(1, 2), keepdims=True)
+    return shares * population[:, None, None]
+
+
+def mortality_rates(multiplier=1.0):
+    """Вероятности смерти в течение года (пол × возраст), модель Гомперца-Мейкхема"""
+    makeham = np.array([0.0004, 0.0002])
+    gompertz = np.array([0.00009, 0.00003])
+    slope = np.array([0.085, 0.094])
+    q = makeham[:, None] + gompertz[:, None] * np.exp(slope[:, None] * AGES[None, :])
+    q[:, 0] = [0.0052, 0.0043]
+    return np.clip(q * multiplier, 0, 1)
+
+
+def fertility_rates(tfr):
+    """Возрастные коэффициенты рождаемости 15-49 лет с суммой tfr"""
+    ages = AGES[FERTILE_AGES]
+    shape = np.exp(-0.5 * ((ages - 29) / 6) ** 2)
+    return tfr * shape / shape.sum()
+
+
+def migration_profile():
+    """Возрастной профиль мигрантов: пик в 20-30 лет, дети с родителями"""
+    profile = np.exp(-0.5 * ((AGES - 24) / 7) ** 2) + 0.25 * np.exp(-AGES / 5)
+    return profile / profile.sum()
+
+
+def _project(scenario, horizon):
+    params = SCENARIOS[scenario]
+    population = base_population()
+    n_areas = population.shape[0]
+
+    rates = np.array([
+        MIGRATION_RATES.get(code, DEFAULT_MIGRATION_RATE) for code in municipalities.CODES
+    ]) / 1000 * params['migration']
+    profile = migration_profile()
+    fertility = fertility_rates(params['tfr'])
+
+    cube = np.empty((horizon + 1, n_areas, 2, MAX_AGE + 1))
+    births = np.empty((horizon, n_areas))
+    deaths = np.empty((horizon, n_areas))
+    migration = np.empty((horizon, n_areas))
+    cube[0] = population
+
+    for step in range(horizon):
+        q = mortality_rates(params['mortality'] * (1 - params['improvement']) ** step)
+        current = cube[step]
+
+        survivors = current * (1 - q)[None, :, :]
+        following = np.zeros_like(current)
+        following[:, :, 1:] = survivors[:, :, :-1]
+        following[:, :, MAX_AGE] += survivors[:, :, MAX_AGE]
+
+        # Женщины в среднем за год: начало и дожившие до конца
+        mothers = (current[:, FEMALE, FERTILE_AGES] + following[:, FEMALE, 16:51]) / 2
+        born = mothers @ fertility
+        newborns = born[:, None] * np.array([MALE_BIRTH_SHARE, 1 - MALE_BIRTH_SHARE])[None, :]
+        following[:, :, 0] = newborns * (1 - q[None, :, 0] / 2)
+
+        net = rates * current.sum(axis=(1, 2))
+        following += net[:, None, None] * profile[None, None, :] / 2
+        np.clip(following, 0, None, out=following)
+
+        births[step] = born
+        deaths[step] = current.sum(axis=(1, 2)) + born + net - following.sum(axis=(1, 2))
+        migration[step] = net
+        cube[step + 1] = following
+
+    # Область - сумма муниципалитетов, первой строкой
+    region = lambda values: np.concatenate([values.sum(axis=1, keepdims=True), values], axis=1)
+    return {
+        'scenario': scenario,
+        'years': np.arange(BASE_YEAR, BASE_YEAR + horizon + 1),
+        'areas': AREAS,
+        'population': region(cube),
+        'births': region(births),
+        'deaths': region(deaths),
+        'migration': region(migration),
+    }
+
+
+def project(scenario='base', horizon=HORIZON):
+    """
+    Прогноз по сценарию на horizon лет для области и всех муниципалитетов.
+
+    population - массив (год × территория × пол × возраст), человек;
+    births, deaths, migration - (год прогноза × территория).
+    Территории в порядке AREAS, первая - область.
+    """
+    if scenario not in SCENARIOS:
+        raise ValueError(f"Неизвестный сценарий: {scenario}")
+    return cache.get_or_compute('projection', (scenario, horizon, BASE_YEAR), lambda: _project(scenario, horizon), maxsize=8)
+
+
+def area_index(area):
+    return AREAS.index(area)
+
+
+def age_groups(population, width=5, open_age=85):
+    """Сумма по возрастным группам (последняя ось); подписи групп"""
+    starts = np.arange(0, open_age + 1, width)
+    grouped = np.add.reduceat(population, starts, axis=-1)
+    labels = [f"{a}-{a + width - 1}" for a in starts[:-1]] + [f"{open_age}+"]
+    return grouped, labels
+
+
+def totals(result, area='region'):
+    """Численность территории по годам прогноза, человек"""
+    return result['population'][:, area_index(area)].sum(axis=(1, 2))
+
+
+def pyramid_cube(scenario='base', horizon=HORIZON):
+    """
+    Численность по пятилетним группам для пирамиды: int32 массив
+    (год × территория × пол × группа), человек; подписи групп.
+    """
+    def build():
+        grouped, labels = age_groups(project(scenario, horizon)['population'])
+        return np.rint(grouped).astype(np.int32), labels
+    return cache.get_or_compute('pyramid-cube', (scenario, horizon, BASE_YEAR), build, maxsize=8)
@@ -0,0 +1,186 @@
+"""
+Сравнение с регионами Центрального федерального округа.
+
+Значения всех показателей хранятся одним массивом
+(показатель × год × регион). При построении RegionComparison один раз
+для всего массива считаются значения на душу населения, места регионов
+и процентили по каждому показателю и году; сравнение для графика -
+выборка готовых срезов, без сортировки на запрос.
+"""
+
+import numpy as np
+
+from services import cache
+
+# Регионы ЦФО: (код, название, население тыс. чел., ВРП млрд ₽ последнего года)
+REGIONS = [
+    ('belgorod', 'Белгородская', 1530, 630),
+    ('bryansk', 'Брянская', 1150, 230),
+    ('vladimir', 'Владимирская', 1340, 268),
+    ('voronezh', 'Воронежская', 2290, 680),
+    ('ivanovo', 'Ивановская', 980, 140),
+    ('kaluga', 'Калужская', 1070, 380),
+    ('kostroma', 'Костромская', 570, 115),
+    ('kursk', 'Курская', 1080, 320),
+    ('lipetsk', 'Липецкая', 1130, 500),
+    ('moscow_oblast', 'Московская', 8590, 1250),
+    ('oryol', 'Орловская', 700, 135),
+    ('ryazan', 'Рязанская', 1080, 295),
+    ('smolensk', 'Смоленская', 880, 200),
+    ('tambov', 'Тамбовская', 960, 200),
+    ('tver', 'Тверская', 1210, 290),
+    ('tula', 'Тульская', 1500, 542),
+    ('yaroslavl', 'Ярославская', 1190, 360),
+    ('moscow', 'Москва', 13150, 11000),
+]
+
+REGION_CODES = [code for code, _, _, _ in REGIONS]
+REGION_NAMES = {code: name for code, name, _, _ in REGIONS}
+
+# Регион дашборда, выделяемый на графиках
+HOME_REGION = 'tula'
+
+YEARS = list(range(2019, 2024))
+
+# Показатели: название, единица, единица на душу населения (None - не
+# нормируется), лучше ли большее значение
+INDICATORS = {
+    'grp': {'label': 'ВРП', 'unit': 'млрд ₽', 'per_capita': 'тыс. ₽ на жителя', 'higher_is_better': True},
+    'industry': {'label': 'Промышленное производство', 'unit': 'млрд ₽', 'per_capita': 'тыс. ₽ на жителя', 'higher_is_better': True},
+    'investment': {'label': 'Инвестиции в основной капитал', 'unit': 'млрд ₽', 'per_capita': 'тыс. ₽ на жителя', 'higher_is_better': True},
+    'retail': {'label': 'Оборот розничной торговли', 'unit': 'млрд ₽', 'per_capita': 'тыс. ₽ на жителя', 'higher_is_better': True},
+    'salary': {'label': 'Средняя зарплата', 'unit': '₽', 'per_capita': None, 'higher_is_better': True},
+    'unemployment': {'label': 'Уровень безработицы', 'unit': '%', 'per_capita': None, 'higher_is_better': False},
+    'population': {'label': 'Население', 'unit': 'тыс. чел.', 'per_capita': None, 'higher_is_better': True},
+}
+
+MEASURES = ('absolute', 'per_capita')
+
+# Динамика ВРП области по годам (индекс к последнему году)
+GROWTH_INDEX = np.array([485, 468, 502, 521, 542]) / 542
+
+
+class RegionComparison:
+    """
+    Показатели регионов с готовыми местами и процентилями.
+
+    values - массив (показатель × год × регион) в порядке indicators,
+    years и regions; population - (год × регион), тыс. чел. Пропуски - NaN:
+    регион без значения не получает места.
+    """
+
+    def __init__(self, regions, indicators, years, values, population):
+        self.regions = list(regions)
+        self.indicators = list(indicators)
+        self.years = list(years)
+        values = np.asarray(values, dtype=float)
+        population = np.asarray(population, dtype=float)
+
+        # На душу населения: млрд ₽ / тыс. чел. -> тыс. ₽ на жителя
+        normalized = np.array([INDICATORS.get(code, {}).get('per_capita') is not None for code in self.indicators])
+        per_capita = np.where(normalized[:, None, None], values * 1000 / population[None, :, :], values)
+
+        direction = np.array([INDICATORS.get(code, {}).get('higher_is_better', True) for code in self.indicators])
+        self._cubes = {}
+        for measure, cube in zip(MEASURES, (values, per_capita)):
+            self._cubes[measure] = (cube,) + self._rank(cube, direction)
+
+    @staticmethod
+    def _rank(cube, direction):
+        """Порядок регионов, места (1 - лучший, 0 - нет данных) и процентили"""
+        missing = np.isnan(cube)
+        keys = np.where(direction[:, None, None], -cube, cube)
+        keys[missing] = np.inf
+        order = np.argsort(keys, axis=-1, kind='stable')
+
+        ranks = np.empty(cube.shape, dtype=np.int32)
+        places = np.broadcast_to(np.arange(1, cube.shape[-1] + 1, dtype=np.int32), cube.shape)
+        np.put_along_axis(ranks, order, places, axis=-1)
+        ranks[missing] = 0
+
+        # Процентиль: доля регионов, у которых показатель хуже
+        counts = (~missing).sum(axis=-1, keepdims=True)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            percentiles = np.where(missing, np.nan, (counts - ranks) / np.maximum(counts - 1, 1) * 100)
+        medians = np.full(cube.shape[:-1], np.nan)
+        present = counts[..., 0] > 0
+        medians[present] = np.nanmedian(cube[present], axis=-1)
+        return order, ranks, percentiles, counts[..., 0], medians
+
+    def lookup(self, indicator, year, measure='absolute'):
+        """
+        Сравнение по показателю за год: регионы от лучшего к худшему
+        (без пропусков), их значения, места и процентили, медиана.
+        """
+        i, y = self.indicators.index(indicator), self.years.index(year)
+        cube, order, ranks, percentiles, counts, medians = self._cubes[measure]
+        order = order[i, y, :counts[i, y]]
+        return {
+            'regions': [self.regions[r] for r in order.tolist()],
+            'values': cube[i, y, order],
+            'ranks': ranks[i, y, order],
+            'percentiles': percentiles[i, y, order],
+            'count': int(counts[i, y]),
+            'median': float(medians[i, y]),
+        }
+
+    def position(self, region, indicator, year, measure='absolute'):
+        """Место и процентиль региона; (0, nan), если значения нет"""
+        i, y, r = self.indicators.index(indicator), self.years.index(year), self.regions.index(region)
+        _, _, ranks, percentiles, _, _ = self._cubes[measure]
+        return int(ranks[i, y, r]), float(percentiles[i, y, r])
+
+
+def generate_values(seed=71):
+    """
+    Показатели регионов по годам: ВРП последнего года из REGIONS,
+    остальные показатели - в долях ВРП с региональным разбросом,
+    прошлые годы - по индексу ВРП области с отклонениями.
+    """
+    rng = np.random.default_rng(seed)
+    n_regions, n_years = len(REGIONS), len(YEARS)
+    population = np.array([p for _, _, p, _ in REGIONS], dtype=float)
+    grp = np.array([g for _, _, _, g in REGIONS], dtype=float)
+
+    # Отклонения накапливаются назад от последнего года
+    steps = rng.normal(0, 0.015, (n_regions, n_years))
+    steps[:, 0] = 0
+    drift = np.exp(steps.cumsum(axis=1))[:, ::-1]
+    dynamics = (GROWTH_INDEX[None, :] * drift).T
+    population_dynamics = population[None, :] * (1 + 0.004 * (np.arange(n_years) - n_years + 1))[:, None]
+
+    shares = {
+        'industry': rng.uniform(0.6, 1.6, n_regions),
+        'investment': rng.uniform(0.18, 0.32, n_regions),
+        'retail': rng.uniform(0.35, 0.6, n_regions),
+    }
+    salary = 45000 + 20000 * (grp / population) / np.median(grp / population) * rng.uniform(0.9, 1.1, n_regions)
+
+    values = np.empty((len(INDICATORS), n_years, n_regions))
+    for i, code in enumerate(INDICATORS):
+        if code == 'grp':
+            values[i] = grp[None, :] * dynamics
+        elif code in shares:
+            values[i] = (grp * shares[code])[None, :] * dynamics * rng.normal(1, 0.03, (n_years, n_regions))
+        elif code == 'salary':
+            values[i] = salary[None, :] * GROWTH_INDEX[:, None] ** 1.5
+        elif code == 'unemployment':
+            values[i] = np.clip(rng.uniform(2.5, 5.5, n_regions)[None, :] * (2 - GROWTH_INDEX[:, None]), 1.5, None)
+        else:
+            values[i] = population_dynamics
+    return np.round(values, 1), population_dynamics
+
+
+def _build():
+    values, population = generate_values()
+    return RegionComparison(REGION_CODES, list(INDICATORS), YEARS, values, population)
+
+
+def get_comparison():
+    """Сравнение регионов ЦФО, построенное один раз на процесс"""
+    return cache.get_or_compute('region-comparison', 'cfo', _build, maxsize=1)
+
+
+def indicator_unit(indicator, measure='absolute'):
+    params = INDICATORS[indicator]
+    return params['per_capita'] if measure == 'per_capita' and params['per_capita'] else params['unit']
@@ -0,0 +1,189 @@
+"""
+Распределение зарплат: квантильные эскизы по муниципалитетам, разделам
+ОКВЭД и годам.
+
+Эскиз - счетчики логарифмических интервалов зарплаты (как DDSketch):
+интервал i покрывает (GAMMA^(i-1), GAMMA^i], так что любой квантиль
+восстанавливается с относительной ошибкой не больше RELATIVE_ACCURACY.
+Эскизы всех ячеек хранятся одним массивом (муниципалитет × раздел ×
+год × интервал) и строятся при загрузке записей np.bincount; объединение
+любого набора муниципалитетов или разделов - сумма счетчиков по оси,
+отдельные записи о зарплатах после загрузки не хранятся.
+"""
+
+import numpy as np
+
+from services import cache, municipalities, okved
+
+# Относительная ошибка квантилей
+RELATIVE_ACCURACY = 0.01
+GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+
+# Диапазон зарплат, ₽; значения вне него попадают в крайние интервалы
+MIN_SALARY = 5000
+MAX_SALARY = 2000000
+
+_OFFSET = int(np.ceil(np.log(MIN_SALARY) / np.log(GAMMA)))
+N_BINS = int(np.ceil(np.log(MAX_SALARY) / np.log(GAMMA))) - _OFFSET + 1
+
+YEARS = list(range(2020, 2025))
+
+# Средняя зарплата в области по годам
+REGION_MEAN = [42300, 45800, 49200, 52100, 54280]
+
+# Средняя зарплата муниципалитетов в последнем году; остальные - от численности
+MUNICIPALITY_MEAN = {
+    'tula': 58900, 'novomoskovsk': 51200, 'aleksin': 47800, 'shchekino': 49500,
+    'efremov': 44200, 'uzlovaya': 45800, 'donskoy': 42100, 'kimovsk': 43500,
+    'bogoroditsk': 44800, 'suvorov': 41200,
+}
+
+# Отношение зарплаты в разделе к средней
+SECTION_FACTORS = {
+    'A': 0.75, 'B': 1.3, 'C': 1.1, 'D': 1.3, 'E': 0.9, 'F': 1.0, 'G': 0.85, 'H': 1.05,
+    'I': 0.65, 'J': 1.45, 'K': 1.6, 'L': 0.85, 'M': 1.2, 'N': 0.8, 'O': 1.1, 'P': 0.8,
+    'Q': 0.9, 'R': 0.75, 'S': 0.7,
+}
+
+DECILES = np.arange(1, 10) / 10
+
+
+def bin_index(salaries):
+    """Номера интервалов эскиза для зарплат"""
+    index = np.ceil(np.log(np.asarray(salaries, dtype=float)) / np.log(GAMMA)).astype(np.int64) - _OFFSET
+    return np.clip(index, 0, N_BINS - 1)
+
+
+# Представитель интервала: значение с равной относительной ошибкой до границ
+BIN_VALUES = 2 * GAMMA ** (np.arange(N_BINS) + _OFFSET) / (GAMMA + 1)
+
+
+def quantiles(counts, q):
+    """
+    Квантили q по эскизам: counts - (..., N_BINS), результат - (..., len(q)).
+    Для пустых эскизов - NaN.
+    """
+    q = np.atleast_1d(q)
+    cumulative = np.cumsum(counts, axis=-1)
+    total = cumulative[..., -1:]
+    ranks = q * (total - 1)
+    # Первый интервал, где накопленное число превышает ранг
+    index = (cumulative[..., None, :] > ranks[..., :, None]).argmax(axis=-1)
+    return np.where(total > 0, BIN_VALUES[index], np.nan)
+
+
+def gini(counts):
+    """Индекс Джини по эскизам (..., N_BINS)"""
+    counts = np.asarray(counts, dtype=float)
+    total = counts.sum(axis=-1, keepdims=True)
+    amounts = counts * BIN_VALUES
+    income = amounts.sum(axis=-1, keepdims=True)
+    # Площадь под кривой Лоренца по трапециям
+    share_people = counts / np.where(total > 0, total, 1)
+    lorenz = np.cumsum(amounts, axis=-1) / np.where(income > 0, income, 1)
+    previous = np.concatenate([np.zeros_like(lorenz[..., :1]), lorenz[..., :-1]], axis=-1)
+    area = (share_people * (lorenz + previous) / 2).sum(axis=-1)
+    return np.where(total[..., 0] > 0, 1 - 2 * area, np.nan)
+
+
+def summarize(counts, sums, totals):
+    """
+    Показатели распределения по эскизам: средняя (точная, по суммам),
+    медиана, децили, децильный коэффициент P90/P10 и индекс Джини.
+    """
+    deciles = quantiles(counts, DECILES)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.where(totals > 0, sums / np.maximum(totals, 1), np.nan)
+        ratio = deciles[..., -1] / deciles[..., 0]
+    return {
+        'count': totals,
+        'mean': mean,
+        'median': deciles[..., 4],
+        'deciles': deciles,
+        'decile_ratio': ratio,
+        'gini': gini(counts),
+    }
+
+
+class SalarySketches:
+    """Эскизы зарплат (муниципалитет × раздел × год) с точными суммами и числом записей"""
+
+    def __init__(self, n_municipalities=len(municipalities.CODES), n_sections=len(okved.SECTIONS), n_years=len(YEARS)):
+        self.shape = (n_municipalities, n_sections, n_years)
+        self.counts = np.zeros(self.shape + (N_BINS,), dtype=np.int64)
+        self.sums = np.zeros(self.shape)
+        self.totals = np.zeros(self.shape, dtype=np.int64)
+
+    def add(self, municipality_ids, section_ids, year_ids, salaries):
+        """Пакет записей о зарплатах (массивы одной длины)"""
+        salaries = np.asarray(salaries, dtype=float)
+        cells = np.ravel_multi_index((municipality_ids, section_ids, year_ids), self.shape)
+        size = int(np.prod(self.shape))
+        self.counts += np.bincount(
+            cells * N_BINS + bin_index(salaries), minlength=size * N_BINS
+        ).reshape(self.counts.shape)
+        self.sums += np.bincount(cells, weights=salaries, minlength=size).reshape(self.shape)
+        self.totals += np.bincount(cells, minlength=size).reshape(self.shape)
+
+    def merge(self, other):
+        """Объединение с эскизами другого источника той же формы"""
+        self.counts += other.counts
+        self.sums += other.sums
+        self.totals += other.totals
+
+    def select(self, municipality_ids=None, section_ids=None, year_ids=None, keep=()):
+        """
+        Объединенный эскиз выборки: сумма по муниципалитетам, разделам и годам,
+        кроме осей из keep ('municipality', 'section', 'year'). None или
+        пустой список - все значения оси.
+        """
+        counts, sums, totals = self.counts, self.sums, self.totals
+        axes = []
+        for axis, (name, ids) in enumerate(zip(('municipality', 'section', 'year'), (municipality_ids, section_ids, year_ids))):
+            if ids:
+                counts, sums, totals = (np.take(a, ids, axis=axis) for a in (counts, sums, totals))
+            if name not in keep:
+                axes.append(axis)
+        axes = tuple(axes)
+        return counts.sum(axis=axes), sums.sum(axis=axes), totals.sum(axis=axes)
+
+    def summary(self, municipality_ids=None, section_ids=None, year_ids=None, keep=()):
+        """Показатели распределения для выборки (см. select и summarize)"""
+        return summarize(*self.select(municipality_ids, section_ids, year_ids, keep))
+
+
+def generate_records(year_index, count, rng):
+    """Сгенерированные записи о зарплатах за год: логнормальные внутри ячейки"""
+    population = np.array([municipalities.POPULATION[code] for code in municipalities.CODES])
+    # Средняя по муниципалитету: из справочника или по численности
+    base = np.array([
+        MUNICIPALITY_MEAN.get(code, 38000 + 1500 * np.log(population[i]))
+        for i, code in enumerate(municipalities.CODES)
+    ])
+    factors = np.array([SECTION_FACTORS[code] for code in okved.SECTION_CODES])
+
+    # Масштаб: средняя по области за год равна REGION_MEAN
+    weights = population / population.sum()
+    scale = REGION_MEAN[year_index] / (weights @ base * factors.mean())
+
+    municipality_ids = rng.choice(len(population), count, p=weights)
+    section_ids = rng.integers(0, len(factors), count)
+    # Неравенство медленно снижается
+    sigma = 0.47 - 0.005 * year_index
+    mean = base[municipality_ids] * factors[section_ids] * scale
+    # Среднее логнормального распределения - exp(mu + sigma^2 / 2)
+    salaries = rng.lognormal(np.log(mean) - sigma ** 2 / 2, sigma)
+    return municipality_ids, section_ids, np.full(count, year_index), np.round(salaries, -1)
+
+
+def _build(records_per_year=200000, seed=71):
+    rng = np.random.default_rng(seed)
+    sketches = SalarySketches()
+    for year_index in range(len(YEARS)):
+        sketches.add(*generate_records(year_index, records_per_year, rng))
+    return sketches
+
+
+def get_sketches():
+    """Эскизы зарплат процесса, построенные при первой загрузке"""
+    return cache.get_or_compute('salary-sketches', tuple(YEARS), _build, maxsize=1)
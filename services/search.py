@@ -0,0 +1,152 @@
+"""
+Полнотекстовый поиск по справочникам: инвертированный индекс в памяти.
+
+Тексты разбиваются на слова, слова приводятся к основе облегченным
+стеммером для русского языка (отсечение окончаний в духе Snowball), и
+для каждой основы хранится отсортированный массив номеров документов.
+Основы лежат в отсортированном списке, так что поиск по префиксу - это
+бинарный поиск диапазона основ и объединение их списков документов;
+каждое слово запроса ищется как префикс, что дает подсказки по мере
+набора. Слова запроса объединяются по И.
+"""
+
+import bisect
+import functools
+import re
+
+import numpy as np
+
+_TOKEN = re.compile(r'[0-9a-zа-я]+')
+
+STOPWORDS = frozenset('в во и из к на о об от по при с со у для за до'.split())
+
+_VOWELS = 'аеиоуыэюя'
+
+_REFLEXIVE = ('ся', 'сь')
+
+# Окончания глаголов и деепричастий первой группы: отсекаются только после «а» или «я»
+_AFTER_A = 'ла на ете йте ли й л ем н ло но ет ют ны ть ешь нно вшись вши в'.split()
+
+# Окончания прилагательных, причастий, глаголов второй группы и существительных
+_ENDINGS = '''
+    ими ыми его ого ему ому ее ие ые ое ей ий ый ой ем им ым ом их ых ую юю ая яя ою ею
+    ившись ывшись ивши ывши ив ыв
+    ила ыла ена ейте уйте ите или ыли ило ыло ено ует уют ены ить ыть ишь ят ит ыт
+    иями ями ами ией иям ием иях ев ов ие ье еи ии ям ам ах ях ию ью ия ья
+    ейше ейш
+    а е и й о у ы ь ю я
+'''.split()
+
+# Словообразовательные суффиксы: отсекаются после окончания («численност-и» -> «численн»)
+_DERIVATIONAL = ('ость', 'ост')
+
+# Все окончания, длинные - первыми: (окончание, нужна ли перед ним «а»/«я»)
+_SUFFIXES = sorted(
+    [(ending, True) for ending in _AFTER_A] + [(ending, False) for ending in _ENDINGS],
+    key=lambda item: len(item[0]), reverse=True
+)
+
+
+@functools.lru_cache(maxsize=65536)
+def stem(word):
+    """Основа русского слова: окончание и суффикс -ость отсекаются после первой гласной"""
+    start = next((i + 1 for i, ch in enumerate(word) if ch in _VOWELS), len(word))
+    if start >= len(word) - 1:
+        return word
+    for ending in _REFLEXIVE:
+        if word.endswith(ending) and len(word) - len(ending) >= start:
+            word = word[:-len(ending)]
+            break
+    for ending, after_a in _SUFFIXES:
+        rest = len(word) - len(ending)
+        if not word.endswith(ending) or rest < max(start, 2):
+            continue
+        if after_a and word[rest - 1] not in 'ая':
+            continue
+        word = word[:rest]
+        break
+    for suffix in _DERIVATIONAL:
+        if word.endswith(suffix) and len(word) - len(suffix) >= max(start, 2):
+            return word[:-len(suffix)]
+    return word
+
+
+def tokenize(text):
+    """Основы слов текста без служебных слов; латиница и числа - как есть"""
+    words = _TOKEN.findall(str(text).lower().replace('ё', 'е'))
+    return [stem(word) for word in words if word not in STOPWORDS]
+
+
+class InvertedIndex:
+    """
+    Индекс документов - словарей с текстовыми полями.
+
+    fields - поля для поиска; совпадения в boost_field (обычно название)
+    поднимают документ в выдаче.
+    """
+
+    def __init__(self, documents, fields, boost_field=None):
+        postings, boosted = {}, {}
+        lengths = np.zeros(len(documents), dtype=np.int32)
+        for doc_id, document in enumerate(documents):
+            for field in fields:
+                terms = set(tokenize(document.get(field, '')))
+                for term in terms:
+                    postings.setdefault(term, []).append(doc_id)
+                if field == boost_field:
+                    lengths[doc_id] = len(document.get(field, ''))
+                    for term in terms:
+                        boosted.setdefault(term, []).append(doc_id)
+
+        self.size = len(documents)
+        self.terms = sorted(postings)
+        # Номера документов добавлялись по возрастанию; повторы полей схлопываются
+        self._postings = [np.unique(np.array(postings[term], dtype=np.int32)) for term in self.terms]
+        self._boosted = [np.array(boosted.get(term, []), dtype=np.int32) for term in self.terms]
+        self._lengths = lengths
+
+    def _prefix(self, prefix):
+        """Документы и документы с совпадением в названии для всех основ с префиксом"""
+        start = bisect.bisect_left(self.terms, prefix)
+        stop = bisect.bisect_right(self.terms, prefix + '￿')
+        if start == stop:
+            empty = np.empty(0, dtype=np.int32)
+            return empty, empty
+        if stop - start == 1:
+            return self._postings[start], self._boosted[start]
+        return (
+            np.unique(np.concatenate(self._postings[start:stop])),
+            np.unique(np.concatenate(self._boosted[start:stop])),
+        )
+
+    def search(self, query, limit=50):
+        """
+        Номера документов по запросу (лучшие первыми, не больше limit)
+        и общее число найденных. Пустой запрос ничего не находит.
+        """
+        terms = tokenize(query)
+        if not terms:
+            return np.empty(0, dtype=np.int32), 0
+
+        found, boosts = None, []
+        for term in dict.fromkeys(terms):
+            documents, boosted = self._prefix(term)
+            found = documents if found is None else np.intersect1d(found, documents, assume_unique=True)
+            if len(found) == 0:
+                return found, 0
+            boosts.append(boosted)
+
+        # Больше слов в названии, затем короче название, затем порядок справочника
+        score = np.zeros(len(found), dtype=np.int32)
+        for boosted in boosts:
+            score += np.isin(found, boosted, assume_unique=True)
+        total = len(found)
+        if total > limit:
+            # Отбор кандидатов до полной сортировки: лучшие по числу совпадений
+            keep = np.argpartition(-score, limit - 1)[:limit]
+            threshold = score[keep].min()
+            candidates = np.flatnonzero(score >= threshold)
+        else:
+            candidates = np.arange(total)
+        order = np.lexsort((found[candidates], self._lengths[found[candidates]], -score[candidates]))
+        return found[candidates[order[:limit]]], total
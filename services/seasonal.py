@@ -0,0 +1,124 @@
+"""
+Сезонная корректировка месячных показателей рынка труда.
+
+Разложение в духе X-11 считается пакетно сразу для всех рядов (область и
+все муниципалитеты) - ряды складываются в матрицу (ряд × месяц), а
+скользящие средние и сезонные индексы считаются векторно по всей матрице:
+
+1. предварительный тренд - центрированная скользящая средняя 2×12;
+2. сезонная составляющая - средние отклонения от тренда по месяцам года,
+   нормированные к нулевой сумме за год;
+3. итоговый тренд - 13-членная средняя Хендерсона по ряду без сезонности;
+4. остаток - ряд без сезонности минус тренд.
+
+На краях ряда веса скользящих средних усекаются и перенормируются.
+Мультипликативные показатели раскладываются в логарифмах.
+Компоненты считаются один раз на версию данных, переключение «с
+сезонностью / без» на странице - выбор готового массива.
+"""
+
+import numpy as np
+
+from services import cache, municipalities
+from services.data import build_archive_frame, data_version, get_sample_data
+
+PERIOD = 12
+
+# Показатели и вид разложения: аддитивное или мультипликативное
+INDICATORS = {
+    'unemployment': 'additive',
+}
+
+AREAS = ['region'] + municipalities.CODES
+
+COMPONENTS = ('observed', 'trend', 'seasonal', 'residual', 'adjusted')
+
+# 13-членная средняя Хендерсона
+HENDERSON_13 = np.array([
+    -0.01935, -0.02786, 0.0, 0.06549, 0.14736, 0.21434, 0.24006,
+    0.21434, 0.14736, 0.06549, 0.0, -0.02786, -0.01935,
+])
+
+# Центрированная средняя 2×12
+MOVING_2X12 = np.concatenate([[0.5], np.ones(PERIOD - 1), [0.5]]) / PERIOD
+
+
+def _smooth(values, weights):
+    """
+    Симметричная скользящая средняя по последней оси для всех рядов.
+    У краев используются доступные точки с перенормированными весами.
+    """
+    half = len(weights) // 2
+    padded = np.pad(values, [(0, 0)] * (values.ndim - 1) + [(half, half)])
+    mask = np.pad(np.ones(values.shape[-1]), (half, half))
+    windows = np.lib.stride_tricks.sliding_window_view(padded, len(weights), axis=-1)
+    norm = np.lib.stride_tricks.sliding_window_view(mask, len(weights)) @ weights
+    return windows @ weights / norm
+
+
+def decompose(values, period=PERIOD, multiplicative=False):
+    """
+    Разложение рядов (ряд × месяц; первый месяц - январь) на тренд,
+    сезонность и остаток. Для мультипликативных рядов сезонность и
+    остаток - множители, для аддитивных - слагаемые.
+    """
+    values = np.asarray(values, dtype=float)
+    series = np.log(values) if multiplicative else values
+
+    trend = _smooth(series, MOVING_2X12)
+    detrended = series - trend
+
+    # Средние отклонения по месяцам года для всех рядов: матрица месяц × календарный месяц
+    months = np.arange(series.shape[-1]) % period
+    onehot = np.eye(period)[months]
+    seasonal_index = detrended @ onehot / onehot.sum(axis=0)
+    seasonal_index -= seasonal_index.mean(axis=-1, keepdims=True)
+    seasonal = seasonal_index[..., months]
+
+    adjusted = series - seasonal
+    trend = _smooth(adjusted, HENDERSON_13)
+    residual = adjusted - trend
+
+    if multiplicative:
+        return {
+            'observed': values,
+            'trend': np.exp(trend),
+            'seasonal': np.exp(seasonal),
+            'residual': np.exp(residual),
+            'adjusted': np.exp(adjusted),
+        }
+    return {
+        'observed': values,
+        'trend': trend,
+        'seasonal': seasonal,
+        'residual': residual,
+        'adjusted': adjusted,
+    }
+
+
+def _build(indicator):
+    df = get_sample_data()
+    frame = build_archive_frame(df)
+    n_dates = len(df)
+    # Архив упорядочен по муниципалитетам, внутри - по датам
+    local = frame[indicator].to_numpy().reshape(len(municipalities.CODES), n_dates)
+    values = np.vstack([df[indicator].to_numpy()[None, :], local])
+    result = decompose(values, multiplicative=INDICATORS[indicator] == 'multiplicative')
+    result['dates'] = df['date'].to_numpy()
+    return result
+
+
+def get_components(indicator):
+    """
+    Компоненты разложения показателя для области и всех муниципалитетов:
+    массивы (территория × месяц) в порядке AREAS и даты.
+    """
+    if indicator not in INDICATORS:
+        raise ValueError(f"Нет сезонной корректировки для показателя: {indicator}")
+    return cache.get_or_compute('seasonal', (indicator, data_version()), lambda: _build(indicator), maxsize=4)
+
+
+def series(indicator, area='region', component='observed'):
+    """Даты и значения компоненты для территории"""
+    components = get_components(indicator)
+    return components['dates'], components[component][AREAS.index(area)]
@@ -0,0 +1,212 @@
+"""
+Объединение одинаковых одновременных вычислений (single-flight).
+
+После обновления данных многие пользователи одновременно открывают обзор,
+и каждый запрос в каждом воркере начинает одно и то же построение. Здесь
+одинаковые вычисления объединяются на двух уровнях:
+
+- в процессе: потоки с тем же ключом ждут одно выполняющееся вычисление;
+- между процессами: вычисляет тот воркер, который первым взял блокировку
+  в общем кэше, остальные ждут и забирают его результат оттуда.
+
+Общий кэш задается SHARED_CACHE: diskcache (по умолчанию, каталог
+SHARED_CACHE_DIR - для воркеров на одной машине), redis (REDIS_URL - для
+нескольких машин) или none. Если общий кэш недоступен или держатель
+блокировки не успел за SHARED_LOCK_TIMEOUT, воркер вычисляет сам.
+"""
+
+import hashlib
+import logging
+import os
+import pickle
+import tempfile
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+SHARED_CACHE = os.getenv('SHARED_CACHE', 'diskcache').lower()
+SHARED_CACHE_DIR = os.getenv('SHARED_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'tula-dashboard-shared'))
+
+# Время хранения результатов в общем кэше, секунд
+SHARED_CACHE_TTL = int(os.getenv('SHARED_CACHE_TTL', 3600))
+
+# Сколько ждать чужое вычисление, прежде чем считать самому, секунд
+SHARED_LOCK_TIMEOUT = float(os.getenv('SHARED_LOCK_TIMEOUT', 30))
+
+# Период опроса общего кэша ожидающими воркерами, секунд
+POLL_INTERVAL = 0.05
+
+
+class _Call:
+    """Выполняющееся вычисление, которого ждут другие потоки"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+_lock = threading.Lock()
+_calls = {}
+
+
+def do(key, fn):
+    """
+    Результат fn() для ключа key; одновременные вызовы с тем же ключом
+    в процессе ждут первый и получают его результат (или его исключение).
+    """
+    with _lock:
+        call = _calls.get(key)
+        leader = call is None
+        if leader:
+            call = _calls[key] = _Call()
+
+    if not leader:
+        call.done.wait()
+        if call.error is not None:
+            raise call.error
+        return call.value
+
+    try:
+        call.value = fn()
+    except BaseException as e:
+        call.error = e
+        raise
+    finally:
+        with _lock:
+            del _calls[key]
+        call.done.set()
+    return call.value
+
+
+class DiskStore:
+    """Общий кэш на diskcache: процессы одной машины"""
+
+    def __init__(self, directory):
+        import diskcache
+        self.cache = diskcache.Cache(directory)
+
+    def get(self, key):
+        return self.cache.get(key)
+
+    def set(self, key, value, ttl):
+        self.cache.set(key, value, expire=ttl)
+
+    def acquire(self, key, ttl):
+        return self.cache.add(key, os.getpid(), expire=ttl)
+
+    def locked(self, key):
+        return key in self.cache
+
+    def release(self, key):
+        self.cache.delete(key)
+
+
+class RedisStore:
+    """Общий кэш на Redis: воркеры на нескольких машинах"""
+
+    def __init__(self, url):
+        import redis
+        self.client = redis.Redis.from_url(url)
+
+    def get(self, key):
+        data = self.client.get(key)
+        return None if data is None else pickle.loads(data)
+
+    def set(self, key, value, ttl):
+        self.client.set(key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), ex=ttl)
+
+    def acquire(self, key, ttl):
+        return bool(self.client.set(key, os.getpid(), nx=True, ex=max(int(ttl), 1)))
+
+    def locked(self, key):
+        return bool(self.client.exists(key))
+
+    def release(self, key):
+        self.client.delete(key)
+
+
+_store = None
+_store_ready = False
+
+
+def get_store():
+    """Общий кэш процесса или None, если он выключен или недоступен"""
+    global _store, _store_ready
+    if not _store_ready:
+        with _lock:
+            if not _store_ready:
+                try:
+                    if SHARED_CACHE == 'redis':
+                        _store = RedisStore(os.getenv('REDIS_URL', 'redis://localhost:6379/0'))
+                    elif SHARED_CACHE == 'diskcache':
+                        _store = DiskStore(SHARED_CACHE_DIR)
+                    elif SHARED_CACHE != 'none':
+                        raise ValueError(f"Неизвестный общий кэш: {SHARED_CACHE}")
+                except ImportError as e:
+                    logger.warning(f"Shared cache disabled: {e}")
+                _store_ready = True
+    return _store
+
+
+def _shared_key(namespace, key):
+    digest = hashlib.blake2b(repr((namespace, key)).encode(), digest_size=16).hexdigest()
+    return f"singleflight:{namespace}:{digest}"
+
+
+def _wait(store, value_key, lock_key):
+    """Результат чужого вычисления из общего кэша или None, если блокировку сняли или время вышло"""
+    deadline = time.monotonic() + SHARED_LOCK_TIMEOUT
+    while time.monotonic() < deadline:
+        time.sleep(POLL_INTERVAL)
+        found = store.get(value_key)
+        if found is not None:
+            return found
+        if not store.locked(lock_key):
+            break
+    return None
+
+
+def shared(namespace, key, fn, ttl=SHARED_CACHE_TTL):
+    """
+    Результат fn() через общий кэш: считает один воркер, остальные ждут.
+
+    Ключ должен однозначно описывать входные данные (например, включать
+    версию набора данных), результат - сериализоваться pickle.
+    """
+    store = get_store()
+    if store is None:
+        return fn()
+
+    value_key = _shared_key(namespace, key)
+    lock_key = value_key + ':lock'
+    # В try только обращения к общему кэшу: ошибки fn() не выдаются за его недоступность
+    holder = False
+    try:
+        found = store.get(value_key)
+        if found is not None:
+            return found
+        holder = store.acquire(lock_key, SHARED_LOCK_TIMEOUT)
+        if not holder:
+            found = _wait(store, value_key, lock_key)
+            if found is not None:
+                return found
+            logger.info(f"Single-flight {namespace}: computing without shared lock")
+    except Exception:
+        logger.exception(f"Shared cache unavailable for {namespace}")
+    if not holder:
+        return fn()
+
+    try:
+        value = fn()
+        try:
+            store.set(value_key, value, ttl)
+        except Exception:
+            logger.exception(f"Не удалось сохранить {namespace} в общий кэш")
+        return value
+    finally:
+        try:
+            store.release(lock_key)
+        except Exception:
+            logger.exception(f"Не удалось снять блокировку {namespace}")
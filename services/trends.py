@@ -0,0 +1,180 @@
+"""
+Сервис трендов и прогнозов.
+
+Модели подгоняются пакетно сразу для всех рядов: ряды складываются в матрицу
+(ряд × наблюдение) и решаются одним вызовом np.linalg.lstsq, экспоненциальное
+сглаживание считается векторно по всем рядам. Коэффициенты кэшируются
+по версии набора данных.
+"""
+
+import numpy as np
+import plotly.graph_objects as go
+
+from services import cache
+
+MODELS = ('linear', 'seasonal', 'holt')
+
+# Квантиль нормального распределения для 95% интервала
+Z_95 = 1.96
+
+# Сетка параметров сглаживания уровня для модели Холта
+HOLT_ALPHAS = np.linspace(0.1, 0.9, 9)
+HOLT_BETA = 0.1
+
+
+def _design_matrix(n_total, model, period, harmonics):
+    """Матрица регрессоров: константа, время и гармоники сезонности"""
+    t = np.arange(n_total, dtype=float)
+    columns = [np.ones(n_total), t]
+    if model == 'seasonal':
+        phase = 2 * np.pi * t / period
+        for k in range(1, harmonics + 1):
+            columns.extend([np.sin(k * phase), np.cos(k * phase)])
+    return np.column_stack(columns)
+
+
+def _fit_regression(values, model, horizon, period, harmonics):
+    """Линейная или сезонная регрессия для всех рядов одним решением МНК"""
+    n_obs = values.shape[1]
+    design = _design_matrix(n_obs + horizon, model, period, harmonics)
+    observed = design[:n_obs]
+
+    coef, _, _, _ = np.linalg.lstsq(observed, values.T, rcond=None)
+    trend = (design @ coef).T
+
+    dof = max(n_obs - design.shape[1], 1)
+    residuals = values - trend[:, :n_obs]
+    sigma = np.sqrt((residuals ** 2).sum(axis=1) / dof)
+
+    # Рычаг точки прогноза одинаков для всех рядов: x0 (X'X)^-1 x0'
+    leverage = np.einsum(
+        'ij,jk,ik->i', design[n_obs:], np.linalg.pinv(observed.T @ observed), design[n_obs:]
+    )
+    spread = Z_95 * sigma[:, None] * np.sqrt(1 + leverage)[None, :]
+
+    return {
+        'fitted': trend[:, :n_obs],
+        'forecast': trend[:, n_obs:],
+        'lower': trend[:, n_obs:] - spread,
+        'upper': trend[:, n_obs:] + spread,
+        'slope': coef[1],
+        'sigma': sigma,
+    }
+
+
+def _holt_pass(values, alpha, beta):
+    """Один проход линейного метода Холта, векторно по всем рядам"""
+    n_obs = values.shape[1]
+    level = values[:, 0].copy()
+    slope = values[:, 1] - values[:, 0] if n_obs > 1 else np.zeros(len(values))
+    fitted = np.empty_like(values)
+    fitted[:, 0] = values[:, 0]
+    for t in range(1, n_obs):
+        prediction = level + slope
+        fitted[:, t] = prediction
+        new_level = alpha * values[:, t] + (1 - alpha) * prediction
+        slope = beta * (new_level - level) + (1 - beta) * slope
+        level = new_level
+    return fitted, level, slope
+
+
+def _fit_holt(values, horizon):
+    """Экспоненциальное сглаживание Холта с подбором alpha по сетке"""
+    n_series, n_obs = values.shape
+    best_sse = np.full(n_series, np.inf)
+    best = {}
+    for alpha in HOLT_ALPHAS:
+        fitted, level, slope = _holt_pass(values, alpha, HOLT_BETA)
+        sse = ((values - fitted) ** 2).sum(axis=1)
+        better = sse < best_sse
+        best_sse = np.where(better, sse, best_sse)
+        for key, array in (('fitted', fitted), ('level', level), ('slope', slope)):
+            current = best.get(key, array)
+            mask = better[:, None] if array.ndim == 2 else better
+            best[key] = np.where(mask, array, current)
+        best['alpha'] = np.where(better, alpha, best.get('alpha', alpha))
+
+    steps = np.arange(1, horizon + 1)
+    forecast = best['level'][:, None] + best['slope'][:, None] * steps[None, :]
+
+    # Дисперсия ошибки прогноза на h шагов: sigma^2 (1 + sum alpha^2 (1 + j beta)^2)
+    sigma = np.sqrt(best_sse / max(n_obs - 2, 1))
+    j = np.arange(horizon)
+    growth = (best['alpha'][:, None] ** 2) * (1 + j[None, :] * HOLT_BETA) ** 2
+    growth[:, 0] = 0
+    spread = Z_95 * sigma[:, None] * np.sqrt(1 + np.cumsum(growth, axis=1))
+
+    return {
+        'fitted': best['fitted'],
+        'forecast': forecast,
+        'lower': forecast - spread,
+        'upper': forecast + spread,
+        'slope': best['slope'],
+        'sigma': sigma,
+    }
+
+
+def fit_models(values, model='linear', horizon=0, period=12, harmonics=2):
+    """Пакетная подгонка модели для матрицы рядов (ряд × наблюдение)"""
+    if model not in MODELS:
+        raise ValueError(f"Неизвестная модель тренда: {model}")
+    values = np.atleast_2d(np.asarray(values, dtype=float))
+    if model == 'holt':
+        return _fit_holt(values, horizon)
+    return _fit_regression(values, model, horizon, period, harmonics)
+
+
+def get_trends(series, model='linear', horizon=0, period=12, harmonics=2):
+    """
+    Тренды и прогнозы для набора рядов одинаковой длины.
+
+    series - словарь {имя: значения} или DataFrame с числовыми колонками.
+    Возвращает {имя: {'fitted', 'forecast', 'lower', 'upper', 'slope', 'sigma'}}.
+    """
+    names = list(series)
+    values = np.vstack([np.asarray(series[name], dtype=float) for name in names])
+    version = cache.dataset_version(values)
+
+    fit = cache.get_or_compute(
+        'trends',
+        (version, model, horizon, period, harmonics),
+        lambda: fit_models(values, model, horizon, period, harmonics)
+    )
+    return {
+        name: {key: array[i] for key, array in fit.items()}
+        for i, name in enumerate(names)
+    }
+
+
+def add_forecast_traces(fig, x, x_future, trend, color='red', name='Тренд', unit='', yaxis=None):
+    """Добавляет на график линию тренда, прогноз и его доверительный интервал"""
+    x = list(x)
+    x_future = list(x_future)
+    axis = {'yaxis': yaxis} if yaxis else {}
+
+    if x_future:
+        fig.add_trace(go.Scatter(
+            x=x_future + x_future[::-1],
+            y=list(trend['upper']) + list(trend['lower'][::-1]),
+            fill='toself',
+            # Цвет линии тренда с прозрачностью: подходит любой цвет CSS
+            fillcolor=color,
+            opacity=0.1,
+            line=dict(width=0),
+            name='Интервал прогноза',
+            hoverinfo='skip',
+            showlegend=False,
+            **axis
+        ))
+
+    fig.add_trace(go.Scatter(
+        x=x + x_future,
+        y=list(trend['fitted']) + list(trend['forecast']),
+        mode='lines',
+        line=dict(color=color, width=2, dash='dash'),
+        name=name,
+        hovertemplate=f'{name}: %{{y:.0f}}{unit}<extra></extra>',
+        **axis
+    ))
+
+    return fig
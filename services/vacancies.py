@@ -0,0 +1,296 @@
+"""
+Поток вакансий: загрузка, дедупликация и скользящие счетчики.
+
+Вакансии поступают пакетами из ленты VACANCY_FEED:
+
+- путь к файлу JSON Lines - читаются новые строки с места прошлого чтения;
+- URL http(s) - JSON-список через пул services.clients, параметр since -
+  дата последней загруженной вакансии;
+- пусто - сгенерированная лента за последние HISTORY_DAYS дней.
+
+Запись вакансии: id, title, employer, sphere, municipality, published
+(YYYY-MM-DD). Повторные публикации одной вакансии (тот же заголовок,
+работодатель и муниципалитет) отсекаются по 64-битному хэшу.
+
+Счетчики - кольцевой буфер дневных количеств (день × сфера ×
+муниципалитет) на HISTORY_DAYS дней и суммы за окна 7/30/90 дней,
+которые обновляются при добавлении вакансий и сдвиге дня. График
+страницы рынка труда читает готовые суммы и не просматривает вакансии.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from datetime import date
+
+import numpy as np
+
+from services import cache, clients, municipalities
+
+logger = logging.getLogger(__name__)
+
+VACANCY_FEED = os.getenv('VACANCY_FEED', '')
+
+# Не чаще одного чтения ленты за столько секунд
+VACANCY_POLL_SECONDS = int(os.getenv('VACANCY_POLL_SECONDS', 300))
+
+# Вакансий в сутки в сгенерированной ленте
+VACANCY_DAILY = int(os.getenv('VACANCY_DAILY', 10000))
+
+# Окна скользящих сумм, дней; буфер хранит самое длинное
+WINDOWS = (7, 30, 90)
+HISTORY_DAYS = max(WINDOWS)
+
+# Сферы: (код, название, относительная частота в сгенерированной ленте)
+SPHERES = [
+    ('sales', 'Продажи', 2450),
+    ('workers', 'Рабочие', 2100),
+    ('it', 'IT', 1850),
+    ('manufacturing', 'Производство', 1650),
+    ('construction', 'Строительство', 1200),
+    ('transport', 'Транспорт', 980),
+    ('medicine', 'Медицина', 750),
+    ('education', 'Образование', 620),
+]
+
+SPHERE_CODES = [code for code, _, _ in SPHERES]
+SPHERE_NAMES = {code: name for code, name, _ in SPHERES}
+
+# Доля повторных публикаций в сгенерированной ленте
+DUPLICATE_SHARE = 0.15
+
+
+def posting_key(title, employer, municipality):
+    """64-битный хэш вакансии по нормализованным заголовку, работодателю и муниципалитету"""
+    text = '\x1f'.join(' '.join(str(part).lower().split()) for part in (title, employer, municipality))
+    return int.from_bytes(hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+class VacancyCounters:
+    """Кольцевой буфер дневных количеств вакансий и суммы за окна"""
+
+    def __init__(self, n_spheres=len(SPHERES), n_municipalities=len(municipalities.CODES)):
+        self.days = np.zeros((HISTORY_DAYS, n_spheres, n_municipalities), dtype=np.int32)
+        self.totals = np.zeros((len(WINDOWS), n_spheres, n_municipalities), dtype=np.int64)
+        self.latest = None
+
+    def advance(self, day):
+        """Сдвиг текущего дня: дни, вышедшие из окон, вычитаются из сумм"""
+        if self.latest is None or day - self.latest >= HISTORY_DAYS:
+            self.days[:] = 0
+            self.totals[:] = 0
+            self.latest = day
+            return
+        while self.latest < day:
+            self.latest += 1
+            for w, window in enumerate(WINDOWS):
+                self.totals[w] -= self.days[(self.latest - window) % HISTORY_DAYS]
+            self.days[self.latest % HISTORY_DAYS] = 0
+
+    def add(self, days, spheres, municipality_ids):
+        """Добавление вакансий (массивы дня, сферы, муниципалитета); старые дни пропускаются"""
+        days = np.asarray(days, dtype=np.int64)
+        if len(days) == 0:
+            return 0
+        self.advance(int(days.max()))
+        age = self.latest - days
+        keep = age < HISTORY_DAYS
+        days, age = days[keep], age[keep]
+        spheres, municipality_ids = np.asarray(spheres)[keep], np.asarray(municipality_ids)[keep]
+
+        np.add.at(self.days, (days % HISTORY_DAYS, spheres, municipality_ids), 1)
+        for w, window in enumerate(WINDOWS):
+            recent = age < window
+            np.add.at(self.totals[w], (spheres[recent], municipality_ids[recent]), 1)
+        return int(keep.sum())
+
+    def window(self, days):
+        """Количества за последние days дней (одно из WINDOWS): сфера × муниципалитет"""
+        return self.totals[WINDOWS.index(days)]
+
+
+class VacancyStream:
+    """Счетчики вакансий с дедупликацией и позицией чтения ленты"""
+
+    def __init__(self, feed=VACANCY_FEED):
+        self.feed = feed
+        self.counters = VacancyCounters()
+        self.ingested = 0
+        self.duplicates = 0
+        # Хэши вакансий за HISTORY_DAYS дней: отсортированы, с днем публикации
+        self._keys = np.empty(0, dtype=np.uint64)
+        self._key_days = np.empty(0, dtype=np.int64)
+        self._offset = 0
+        self._since = None
+        self._polled = None
+        self._lock = threading.Lock()
+        self._poll_lock = threading.Lock()
+
+    def ingest(self, days, spheres, municipality_ids, keys):
+        """Пакет вакансий в виде массивов; возвращает число новых (не повторных)"""
+        keys = np.asarray(keys, dtype=np.uint64)
+        days = np.asarray(days, dtype=np.int64)
+        with self._lock:
+            # Повторы внутри пакета и с уже загруженными вакансиями
+            keys, first = np.unique(keys, return_index=True)
+            position = np.searchsorted(self._keys, keys)
+            known = np.zeros(len(keys), dtype=bool)
+            inside = position < len(self._keys)
+            known[inside] = self._keys[position[inside]] == keys[inside]
+            fresh = first[~known]
+            self.duplicates += len(days) - len(fresh)
+
+            added = self.counters.add(days[fresh], np.asarray(spheres)[fresh], np.asarray(municipality_ids)[fresh])
+            self.ingested += added
+            self._remember(position[~known], keys[~known], days[fresh])
+            return added
+
+    def _remember(self, positions, keys, days):
+        """Новые хэши - вставкой в отсортированный массив; хэши старше буфера удаляются"""
+        self._keys = np.insert(self._keys, positions, keys)
+        self._key_days = np.insert(self._key_days, positions, days)
+        alive = self._key_days > self.counters.latest - HISTORY_DAYS
+        if not alive.all():
+            self._keys, self._key_days = self._keys[alive], self._key_days[alive]
+
+    def ingest_records(self, records):
+        """
+        Пакет вакансий-словарей ленты; записи с неизвестной сферой или
+        муниципалитетом и без корректной даты публикации пропускаются.
+        """
+        days, spheres, municipality_ids, keys = [], [], [], []
+        skipped = 0
+        for record in records:
+            if not isinstance(record, dict):
+                skipped += 1
+                continue
+            sphere, municipality = record.get('sphere'), record.get('municipality')
+            try:
+                day = date.fromisoformat(str(record['published'])[:10]).toordinal()
+            except (KeyError, ValueError):
+                day = None
+            if day is None or sphere not in SPHERE_NAMES or municipality not in municipalities.NAMES:
+                skipped += 1
+                continue
+            days.append(day)
+            spheres.append(SPHERE_CODES.index(sphere))
+            municipality_ids.append(municipalities.CODES.index(municipality))
+            keys.append(posting_key(record.get('title', ''), record.get('employer', ''), municipality))
+        if skipped:
+            logger.warning(f"Vacancy feed: {skipped} records skipped (unknown sphere, municipality or date)")
+        if days:
+            latest = date.fromordinal(max(days)).isoformat()
+            self._since = max(self._since or '', latest)
+        return self.ingest(days, spheres, municipality_ids, keys)
+
+    def poll(self):
+        """Загрузка новых вакансий из ленты; возвращает число новых"""
+        if not self.feed:
+            return 0
+        self._polled = time.monotonic()
+        if self.feed.startswith(('http://', 'https://')):
+            params = {'since': self._since} if self._since else None
+            records = clients.fetch_json(self.feed, params, label='vacancies')
+            return self.ingest_records(records if isinstance(records, list) else [])
+
+        with open(self.feed, 'rb') as f:
+            # Файл ленты пересоздан заново - чтение с начала
+            if os.fstat(f.fileno()).st_size < self._offset:
+                self._offset = 0
+            f.seek(self._offset)
+            data = f.read()
+        # Недописанная последняя строка остается до следующего чтения
+        complete = data.rfind(b'\n') + 1
+        records, malformed = [], 0
+        for line in data[:complete].splitlines():
+            if not line.strip():
+                continue
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                malformed += 1
+        if malformed:
+            logger.warning(f"Vacancy feed {self.feed}: {malformed} malformed lines skipped")
+        added = self.ingest_records(records)
+        self._offset += complete
+        return added
+
+    def refresh(self, force=False):
+        """
+        Сдвиг окон к сегодняшнему дню и poll(), если с прошлого чтения ленты
+        прошло больше VACANCY_POLL_SECONDS (или force). Ошибки ленты
+        пишутся в лог, счетчики остаются прежними.
+        """
+        self.roll()
+        if not self.feed:
+            return
+        if not force and self._polled is not None and time.monotonic() - self._polled <= VACANCY_POLL_SECONDS:
+            return
+        # Ленту читает один поток, остальные берут текущие счетчики
+        if not self._poll_lock.acquire(blocking=False):
+            return
+        try:
+            self.poll()
+        except (OSError, RuntimeError, ValueError) as e:
+            logger.warning(f"Vacancy feed {self.feed}: {e}")
+        finally:
+            self._poll_lock.release()
+
+    def roll(self, day=None):
+        """Сдвиг окон к дню day (по умолчанию - сегодня), даже если новых вакансий не было"""
+        day = date.today().toordinal() if day is None else day
+        with self._lock:
+            if self.counters.latest is None or self.counters.latest < day:
+                self.counters.advance(day)
+
+    @property
+    def version(self):
+        """Версия счетчиков: меняется с новыми вакансиями и сдвигом дня"""
+        return self.counters.latest, self.ingested
+
+    def counts(self, window=30, municipality_ids=None):
+        """Вакансии по сферам за окно; municipality_ids - фильтр муниципалитетов"""
+        self.roll()
+        totals = self.counters.window(window)
+        if municipality_ids:
+            totals = totals[:, municipality_ids]
+        return totals.sum(axis=1)
+
+
+def generate_batch(day, count, rng, previous_keys=None):
+    """Сгенерированные вакансии за день в виде массивов; часть - повторы прошлых"""
+    weights = np.array([weight for _, _, weight in SPHERES], dtype=float)
+    population = np.array([municipalities.POPULATION[code] for code in municipalities.CODES])
+    spheres = rng.choice(len(SPHERES), count, p=weights / weights.sum())
+    municipality_ids = rng.choice(len(population), count, p=population / population.sum())
+    keys = rng.integers(0, 2 ** 63, count, dtype=np.int64).astype(np.uint64)
+    if previous_keys is not None and len(previous_keys):
+        repeated = rng.random(count) < DUPLICATE_SHARE
+        keys[repeated] = rng.choice(previous_keys, repeated.sum())
+    return np.full(count, day), spheres, municipality_ids, keys
+
+
+def _build():
+    stream = VacancyStream()
+    if stream.feed:
+        stream.refresh(force=True)
+    else:
+        rng = np.random.default_rng(71)
+        today = date.today().toordinal()
+        previous = None
+        for day in range(today - HISTORY_DAYS + 1, today + 1):
+            batch = generate_batch(day, VACANCY_DAILY, rng, previous)
+            stream.ingest(*batch)
+            previous = batch[3]
+    logger.info(f"Vacancies: {stream.ingested} postings, {stream.duplicates} duplicates skipped")
+    return stream
+
+
+def get_stream():
+    """Поток вакансий процесса; новые пакеты ленты подгружаются при обращении"""
+    stream = cache.get_or_compute('vacancies', VACANCY_FEED or 'generated', _build, maxsize=1)
+    stream.refresh()
+    return stream
@@ -0,0 +1,13 @@
+"""
+Тесты сервисов дашборда: инварианты структур данных, которые проверяются
+сравнением с прямым расчетом.
+
+Запуск из корня репозитория:
+
+    python -m pytest tests
+"""
+
+import os
+
+# Тесты работают с объектами напрямую, без общего кэша воркеров
+os.environ.setdefault('SHARED_CACHE', 'none')
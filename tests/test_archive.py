@@ -0,0 +1,95 @@
+"""Архив показателей: фильтры, сортировки и страницы против расчета pandas"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.archive import IndicatorArchive, split_filter_part
+from services.data import build_archive_frame, get_sample_data
+
+
+@pytest.fixture(scope='module')
+def frame():
+    return build_archive_frame(get_sample_data())
+
+
+@pytest.fixture(scope='module')
+def archive(frame):
+    return IndicatorArchive.from_frame(frame)
+
+
+def test_split_filter_part():
+    assert split_filter_part('{salary} ge 50000') == ('salary', 'ge', 50000.0)
+    assert split_filter_part('{municipality} contains "Тул"') == ('municipality', 'contains', 'Тул')
+    assert split_filter_part('{date} datestartswith 2023') == ('date', 'datestartswith', 2023.0)
+    assert split_filter_part('no operator') == (None, None, None)
+
+
+@pytest.mark.parametrize('filter_query, expected', [
+    ('{salary} > 50000', lambda f: f['salary'] > 50000),
+    ('{unemployment} <= 4 && {salary} ge 40000', lambda f: (f['unemployment'] <= 4) & (f['salary'] >= 40000)),
+    ('{municipality} contains "тул"', lambda f: f['municipality'].str.lower().str.contains('тул')),
+    ('{municipality} eq "Тула"', lambda f: f['municipality'] == 'Тула'),
+    ('{date} datestartswith "2023"', lambda f: f['date'].dt.year == 2023),
+    ('{salary} contains "5"', lambda f: pd.Series(False, index=f.index)),
+    ('{unknown} > 1', lambda f: pd.Series(True, index=f.index)),
+])
+def test_filters_match_pandas(archive, frame, filter_query, expected):
+    indices = archive.query(filter_query)
+    np.testing.assert_array_equal(np.sort(indices), np.flatnonzero(expected(frame).to_numpy()))
+
+
+@pytest.mark.parametrize('sort_by', [
+    [{'column_id': 'salary', 'direction': 'asc'}],
+    [{'column_id': 'salary', 'direction': 'desc'}],
+    [{'column_id': 'municipality', 'direction': 'asc'}, {'column_id': 'date', 'direction': 'desc'}],
+    [{'column_id': 'date', 'direction': 'desc'}, {'column_id': 'unemployment', 'direction': 'asc'}],
+])
+def test_sort_matches_pandas(archive, frame, sort_by):
+    indices = archive.query('{salary} > 40000', sort_by)
+    names = [s['column_id'] for s in sort_by]
+    expected = frame[frame['salary'] > 40000].sort_values(
+        names, ascending=[s['direction'] == 'asc' for s in sort_by]
+    )
+    actual = frame.iloc[indices]
+    pd.testing.assert_frame_equal(actual[names].reset_index(drop=True), expected[names].reset_index(drop=True))
+
+
+@pytest.mark.parametrize('sort_by', [
+    None,
+    [],
+    [{'column_id': 'unknown', 'direction': 'asc'}],
+    [{'column_id': 'unknown', 'direction': 'asc'}, {'column_id': 'other', 'direction': 'desc'}],
+])
+def test_unknown_sort_columns_keep_natural_order(archive, sort_by):
+    np.testing.assert_array_equal(archive.query('', sort_by), np.arange(archive.size))
+
+
+def test_unknown_sort_column_is_ignored_next_to_known(archive, frame):
+    sort_by = [{'column_id': 'unknown', 'direction': 'asc'}, {'column_id': 'salary', 'direction': 'desc'}]
+    indices = archive.query('', sort_by)
+    np.testing.assert_array_equal(frame['salary'].to_numpy()[indices], np.sort(frame['salary'].to_numpy())[::-1])
+
+
+def test_page_slices_sorted_rows(archive, frame):
+    sort_by = [{'column_id': 'salary', 'direction': 'desc'}]
+    rows, page_count = archive.page(2, 25, '{municipality} eq "Тула"', sort_by)
+    expected = frame[frame['municipality'] == 'Тула'].sort_values('salary', ascending=False)
+    assert page_count == int(np.ceil(len(expected) / 25))
+    assert [row['salary'] for row in rows] == np.round(expected['salary'].to_numpy()[50:75], 2).tolist()
+    assert all(row['municipality'] == 'Тула' for row in rows)
+    assert len(rows[0]['date']) == 10
+
+    rows, page_count = archive.page(0, 25, '{salary} > 1e12')
+    assert rows == [] and page_count == 1
+
+
+def test_select_matches_pandas(archive, frame):
+    indices = archive.select(
+        isin={'municipality': ['Тула', 'Алексин']},
+        between={'date': ('2022-01-01', '2022-12-31')}
+    )
+    expected = frame['municipality'].isin(['Тула', 'Алексин']) & (frame['date'].dt.year == 2022)
+    np.testing.assert_array_equal(indices, np.flatnonzero(expected.to_numpy()))
+    # Пустой список и открытая граница не ограничивают выборку
+    assert len(archive.select(isin={'municipality': []}, between={'date': (None, None)})) == archive.size
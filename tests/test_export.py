@@ -0,0 +1,111 @@
+"""Выгрузка: проверка параметров и жизненный цикл фоновых заданий"""
+
+import os
+import time
+
+import pytest
+
+from services import export
+from services.data import get_archive
+
+
+@pytest.fixture(scope='module')
+def archive():
+    return get_archive()
+
+
+@pytest.fixture
+def job_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(export, 'JOB_DIR', str(tmp_path))
+    return tmp_path
+
+
+def test_parse_export_args_defaults(archive):
+    spec = export.parse_export_args({}, archive)
+    assert spec['format'] == 'csv'
+    assert spec['columns'] == archive.names
+    assert spec['municipalities'] == [] and spec['start'] is None and spec['end'] is None
+
+
+def test_parse_export_args_selection(archive):
+    spec = export.parse_export_args({
+        'format': 'XLSX', 'indicators': 'salary, gdp', 'municipalities': 'tula,aleksin',
+        'start': '2022-01-15T00:00', 'end': '2023-06-30',
+    }, archive)
+    assert spec['format'] == 'xlsx'
+    assert spec['columns'] == export.KEY_COLUMNS + ['salary', 'gdp']
+    assert spec['municipalities'] == ['Тула', 'Алексин']
+    assert (spec['start'], spec['end']) == ('2022-01-15', '2023-06-30')
+
+
+@pytest.mark.parametrize('args, message', [
+    ({'format': 'pdf'}, 'Неизвестный формат'),
+    ({'indicators': 'salary,bogus'}, 'Неизвестные показатели: bogus'),
+    ({'indicators': 'date'}, 'Неизвестные показатели: date'),
+    ({'municipalities': 'tula,atlantis'}, 'Неизвестные муниципалитеты: atlantis'),
+    ({'start': '15.01.2022'}, 'ГГГГ-ММ-ДД'),
+])
+def test_parse_export_args_errors(archive, args, message):
+    with pytest.raises(ValueError, match=message):
+        export.parse_export_args(args, archive)
+
+
+def _wait_done(job_id, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = export._load_job(job_id)
+        if job is None or job['status'] != 'running':
+            return job
+        time.sleep(0.02)
+    raise AssertionError('export job did not finish')
+
+
+def test_job_runs_and_writes_manifest(archive, job_dir):
+    spec = export.parse_export_args({'indicators': 'salary', 'municipalities': 'tula'}, archive)
+    indices = archive.select(isin={'municipality': spec['municipalities']})
+    job_id = export.submit_job(spec, archive, indices)
+
+    job = _wait_done(job_id)
+    assert job['status'] == 'done' and job['rows'] == len(indices)
+    assert os.path.dirname(job['path']) == str(job_dir)
+    with open(job['path'], encoding='utf-8') as f:
+        lines = f.read().splitlines()
+    assert lines[0] == 'date,municipality,salary'
+    assert len(lines) == len(indices) + 1
+
+
+def test_expired_job_is_removed_on_read(job_dir, monkeypatch):
+    monkeypatch.setattr(export, 'JOB_TTL', 60)
+    job_id = 'a' * 32
+    path = job_dir / f'{job_id}.csv'
+    path.write_text('date\n', encoding='utf-8')
+    job = {'status': 'done', 'spec': {'format': 'csv'}, 'started': time.time(), 'finished': time.time(), 'rows': 0, 'path': str(path)}
+
+    export._save_job(job_id, job)
+    assert export._load_job(job_id)['path'] == str(path)
+
+    export._save_job(job_id, dict(job, finished=time.time() - 61))
+    assert export._load_job(job_id) is None
+    assert not path.exists() and not (job_dir / f'{job_id}.json').exists()
+
+
+def test_stale_running_job_expires(job_dir, monkeypatch):
+    monkeypatch.setattr(export, 'JOB_TTL', 60)
+    job_id = 'b' * 32
+    export._save_job(job_id, {'status': 'running', 'spec': {'format': 'csv'}, 'started': time.time() - 61, 'finished': None, 'rows': 0})
+    assert export._load_job(job_id) is None
+
+
+def test_cleanup_removes_only_expired_jobs(job_dir, monkeypatch):
+    monkeypatch.setattr(export, 'JOB_TTL', 60)
+    now = time.time()
+    fresh, old = 'c' * 32, 'd' * 32
+    export._save_job(fresh, {'status': 'failed', 'error': 'x', 'started': now, 'finished': now, 'rows': 0})
+    export._save_job(old, {'status': 'failed', 'error': 'x', 'started': now - 120, 'finished': now - 61, 'rows': 0})
+    export._cleanup_jobs()
+    assert sorted(os.listdir(job_dir)) == [f'{fresh}.json']
+
+
+@pytest.mark.parametrize('job_id', ['../../etc/passwd', 'ABC', 'e' * 31])
+def test_invalid_job_id(job_dir, job_id):
+    assert export._load_job(job_id) is None
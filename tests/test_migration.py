@@ -0,0 +1,84 @@
+"""Матрица миграционных потоков: обновление года, крупнейшие потоки, сальдо"""
+
+import numpy as np
+import pytest
+
+from services import migration
+from services.migration import N_AREAS, N_LOCAL, MigrationMatrix
+
+
+@pytest.fixture(scope='module')
+def matrix():
+    matrix = MigrationMatrix()
+    for year in (2022, 2023):
+        matrix.add_year(year, *migration.generate_flows(year))
+    return matrix
+
+
+def _dense(matrix, year):
+    origin, destination, count = matrix.flows(year)
+    dense = np.zeros((N_AREAS, N_AREAS), dtype=np.int64)
+    np.add.at(dense, (origin, destination), count)
+    return dense
+
+
+def test_add_year_sums_pairs_and_drops_empty_flows():
+    matrix = MigrationMatrix()
+    matrix.add_year(2024, [0, 0, 1, 2, 3], [1, 1, 0, 2, 4], [5, 7, 3, 9, 0])
+    origin, destination, count = matrix.flows(2024)
+    assert sorted(zip(origin.tolist(), destination.tolist(), count.tolist())) == [(0, 1, 12), (1, 0, 3)]
+    assert matrix.years == [2024]
+
+
+def test_add_year_replaces_year_and_bumps_version():
+    matrix = MigrationMatrix()
+    matrix.add_year(2024, [0], [1], [10])
+    version = matrix.version
+    assert matrix.balance(2024)['arrivals'][1] == 10
+
+    matrix.add_year(2024, [0, 2], [1, 1], [4, 6])
+    assert matrix.version == version + 1
+    # Производные величины года пересчитываются
+    balance = matrix.balance(2024)
+    assert balance['arrivals'][1] == 10 and balance['departures'][2] == 6
+    assert matrix.flows(2024)[2].sum() == 10
+
+    matrix.add_year(2025, [1], [0], [1])
+    assert matrix.years == [2024, 2025] and matrix.version == version + 2
+
+
+@pytest.mark.parametrize('scope', ['all', 'internal', 'external'])
+@pytest.mark.parametrize('limit', [1, 5, 15, 10000])
+def test_top_flows_keep_total_and_largest(matrix, scope, limit):
+    dense = _dense(matrix, 2023)
+    local = np.arange(N_AREAS) < N_LOCAL
+    if scope == 'internal':
+        mask = local[:, None] & local[None, :]
+    elif scope == 'external':
+        mask = local[:, None] != local[None, :]
+    else:
+        mask = local[:, None] | local[None, :]
+
+    flows = matrix.top_flows(2023, scope, limit)
+    assert sum(count for _, _, count in flows) == dense[mask].sum()
+
+    top = flows[:min(limit, np.count_nonzero(dense[mask]))]
+    largest = np.sort(dense[mask][dense[mask] > 0])[::-1][:len(top)]
+    assert [count for _, _, count in top] == largest.tolist()
+    assert all(o is not None and d is not None for o, d, _ in top)
+    # Узлов не больше 2 * (limit + 1): по limit + «Прочие» с каждой стороны
+    assert len({o for o, _, _ in flows}) <= limit + 1
+    assert len({d for _, d, _ in flows}) <= limit + 1
+
+
+def test_balance_sums_to_zero(matrix):
+    for year in matrix.years:
+        balance = matrix.balance(year)
+        dense = _dense(matrix, year)
+        np.testing.assert_array_equal(balance['arrivals'], dense.sum(axis=0))
+        np.testing.assert_array_equal(balance['departures'], dense.sum(axis=1))
+        assert balance['net'].sum() == 0
+
+        # Сальдо муниципалитетов - это внешнее сальдо области
+        arrived, departed = matrix.external_totals(year)
+        assert balance['net'][:N_LOCAL].sum() == arrived - departed
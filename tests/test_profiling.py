@@ -0,0 +1,38 @@
+"""Профилирование запросов: метки и артефакты"""
+
+import json
+
+import pytest
+from flask import Flask
+
+from services import profiling
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, 'PROFILE_ENABLED', True)
+    monkeypatch.setattr(profiling, 'PROFILE_SAMPLE_RATE', 1.0)
+    monkeypatch.setattr(profiling, 'PROFILE_DIR', str(tmp_path))
+    server = Flask(__name__)
+
+    @server.route('/_dash-update-component', methods=['POST'])
+    def update():
+        return 'ok'
+
+    profiling.init_app(server)
+    return server.test_client()
+
+
+def _labels(directory):
+    return sorted(json.loads(path.read_text(encoding='utf-8'))['label'] for path in directory.glob('*.json'))
+
+
+def test_callback_label_from_output(client, tmp_path):
+    assert client.post('/_dash-update-component', json={'output': 'chart.figure'}).status_code == 200
+    assert _labels(tmp_path) == ['callback chart.figure']
+
+
+@pytest.mark.parametrize('payload', [['chart.figure'], 'chart.figure', 42, {'output': ['a', 'b']}, {}])
+def test_unexpected_payload_uses_path(client, tmp_path, payload):
+    assert client.post('/_dash-update-component', json=payload).status_code == 200
+    assert _labels(tmp_path) == ['/_dash-update-component']
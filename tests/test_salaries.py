@@ -0,0 +1,73 @@
+"""Квантильные эскизы зарплат: точность квантилей, Джини и объединение"""
+
+import numpy as np
+
+from services import salaries
+from services.salaries import RELATIVE_ACCURACY, SalarySketches
+
+
+def _exact_gini(values):
+    values = np.sort(values)
+    n = len(values)
+    return 2 * np.sum(np.arange(1, n + 1) * values) / (n * values.sum()) - (n + 1) / n
+
+
+def _records(seed, count=50000):
+    rng = np.random.default_rng(seed)
+    return salaries.generate_records(2, count, rng)
+
+
+def test_quantiles_within_relative_accuracy():
+    rng = np.random.default_rng(3)
+    values = rng.lognormal(np.log(45000), 0.5, 100000).clip(salaries.MIN_SALARY, salaries.MAX_SALARY)
+    counts = np.bincount(salaries.bin_index(values), minlength=salaries.N_BINS)
+
+    q = np.linspace(0.01, 0.99, 99)
+    estimated = salaries.quantiles(counts, q)
+    exact = np.sort(values)[np.floor(q * (len(values) - 1)).astype(int)]
+    assert np.max(np.abs(estimated / exact - 1)) <= RELATIVE_ACCURACY + 1e-9
+
+
+def test_gini_matches_exact():
+    rng = np.random.default_rng(4)
+    values = rng.lognormal(np.log(45000), 0.45, 100000)
+    counts = np.bincount(salaries.bin_index(values), minlength=salaries.N_BINS)
+    assert abs(salaries.gini(counts) - _exact_gini(values)) < 0.005
+
+
+def test_merge_equals_single_load():
+    first, second = _records(1), _records(2)
+    merged = SalarySketches()
+    merged.add(*first)
+    other = SalarySketches()
+    other.add(*second)
+    merged.merge(other)
+
+    single = SalarySketches()
+    single.add(*(np.concatenate(parts) for parts in zip(first, second)))
+    np.testing.assert_array_equal(merged.counts, single.counts)
+    np.testing.assert_array_equal(merged.totals, single.totals)
+    np.testing.assert_allclose(merged.sums, single.sums)
+
+
+def test_select_sums_cells_and_keeps_exact_mean():
+    municipality_ids, section_ids, year_ids, values = _records(5)
+    sketches = SalarySketches()
+    sketches.add(municipality_ids, section_ids, year_ids, values)
+
+    chosen = [0, 3]
+    mask = np.isin(municipality_ids, chosen)
+    counts, sums, totals = sketches.select(municipality_ids=chosen)
+    assert totals == mask.sum()
+    assert counts.sum() == mask.sum()
+    summary = sketches.summary(municipality_ids=chosen)
+    assert np.isclose(summary['mean'], values[mask].mean())
+
+    by_section = sketches.summary(keep=('section',))
+    assert by_section['median'].shape == (sketches.shape[1],)
+    np.testing.assert_array_equal(by_section['count'], np.bincount(section_ids, minlength=sketches.shape[1]))
+
+
+def test_empty_sketch_gives_nan():
+    summary = salaries.summarize(np.zeros(salaries.N_BINS, dtype=np.int64), 0.0, 0)
+    assert np.isnan(summary['median']) and np.isnan(summary['mean']) and np.isnan(summary['gini'])
@@ -0,0 +1,76 @@
+"""Полнотекстовый поиск: стеммер, инвертированный индекс и каталог показателей"""
+
+import numpy as np
+import pytest
+
+from services import catalog, search
+from services.search import InvertedIndex, stem, tokenize
+
+FIELDS = ('name', 'code', 'breakdown', 'unit', 'source', 'periodicity', 'keywords')
+
+
+@pytest.fixture(scope='module')
+def entries():
+    return catalog.build_catalog()
+
+
+@pytest.fixture(scope='module')
+def index(entries):
+    return InvertedIndex(entries, fields=FIELDS, boost_field='name')
+
+
+@pytest.mark.parametrize('words', [
+    ('безработица', 'безработицы', 'безработице'),
+    ('тульская', 'тульской', 'тульскую'),
+    ('заработная', 'заработной'),
+    ('численность', 'численности'),
+])
+def test_word_forms_share_stem(words):
+    assert len({stem(word) for word in words}) == 1
+
+
+def test_short_words_keep_stem():
+    assert stem('тула') == 'тул'
+    assert stem('ввп') == 'ввп'
+
+
+def test_tokenize_drops_stopwords_and_yo():
+    assert tokenize('Ввод в действие жилья') == tokenize('ввод действие жилья')
+    assert tokenize('ЁЛКА') == tokenize('елка')
+
+
+def _brute_force(entries, query):
+    """Документы, где каждая основа запроса - префикс основы какого-либо поля, в порядке выдачи"""
+    terms = tokenize(query)
+    found = []
+    for doc_id, entry in enumerate(entries):
+        document = {token for field in FIELDS for token in tokenize(entry.get(field, ''))}
+        if all(any(token.startswith(term) for token in document) for term in terms):
+            name = set(tokenize(entry['name']))
+            score = sum(any(token.startswith(term) for token in name) for term in dict.fromkeys(terms))
+            found.append((-score, len(entry['name']), doc_id))
+    return [doc_id for _, _, doc_id in sorted(found)]
+
+
+@pytest.mark.parametrize('query', ['безраб', 'зарплата тула', 'численность женщины', 'lab.sal', 'п', 'ипц', 'нет такого'])
+@pytest.mark.parametrize('limit', [5, 50, 5000])
+def test_search_matches_brute_force(entries, index, query, limit):
+    expected = _brute_force(entries, query)
+    ids, total = index.search(query, limit)
+    assert total == len(expected)
+    assert ids.tolist() == expected[:limit]
+
+
+def test_empty_query_finds_nothing(index):
+    ids, total = index.search('   в  и ', 10)
+    assert total == 0 and len(ids) == 0
+
+
+def test_catalog_search_and_lookup():
+    indicators = catalog.IndicatorCatalog(catalog.build_catalog())
+    results, total = indicators.search('зарплата тула', 3)
+    assert total > len(results)
+    assert results[0]['code'] == 'LAB.SAL.TULA'
+    assert indicators.get('ECO.CPI')['name'] == 'Индекс потребительских цен'
+    assert indicators.get('NO.SUCH.CODE') is None
+    assert len(indicators) == len({entry['code'] for entry in indicators.entries})
@@ -0,0 +1,62 @@
+"""Сезонная корректировка: сумма компонент, восстановление сезонности"""
+
+import numpy as np
+import pytest
+
+from services import seasonal
+from services.seasonal import PERIOD
+
+SEASON = np.cos(2 * np.pi * np.arange(PERIOD) / PERIOD)
+
+
+def _series(n_years=6, n_series=3, multiplicative=False, seed=2):
+    rng = np.random.default_rng(seed)
+    months = np.arange(n_years * PERIOD)
+    trend = 10 + 0.05 * months + rng.normal(0, 1, (n_series, 1))
+    noise = rng.normal(0, 0.05, (n_series, len(months)))
+    if multiplicative:
+        return 100 * trend * np.exp(0.1 * SEASON[months % PERIOD] + 0.01 * noise)
+    return trend + SEASON[months % PERIOD] + noise
+
+
+def test_additive_components_add_up():
+    values = _series()
+    result = seasonal.decompose(values)
+    np.testing.assert_allclose(result['trend'] + result['seasonal'] + result['residual'], values)
+    np.testing.assert_allclose(result['adjusted'], values - result['seasonal'])
+
+
+def test_multiplicative_components_multiply_up():
+    values = _series(multiplicative=True)
+    result = seasonal.decompose(values, multiplicative=True)
+    np.testing.assert_allclose(result['trend'] * result['seasonal'] * result['residual'], values)
+    np.testing.assert_allclose(result['adjusted'], values / result['seasonal'])
+
+
+def test_seasonal_pattern_is_recovered():
+    values = _series()
+    result = seasonal.decompose(values)
+    # Сезонность повторяется каждый год и в сумме за год равна нулю
+    year = result['seasonal'][:, :PERIOD]
+    np.testing.assert_allclose(result['seasonal'][:, PERIOD:2 * PERIOD], year)
+    np.testing.assert_allclose(year.sum(axis=1), 0, atol=1e-9)
+    # Усеченные у краев средние немного смещают оценку при амплитуде 1
+    assert np.abs(year - SEASON).max() < 0.15
+
+
+def test_batch_matches_single_series():
+    values = _series()
+    batch = seasonal.decompose(values)
+    for i, row in enumerate(values):
+        single = seasonal.decompose(row[None, :])
+        for component in seasonal.COMPONENTS:
+            np.testing.assert_allclose(batch[component][i], single[component][0])
+
+
+def test_components_cover_all_areas():
+    components = seasonal.get_components('unemployment')
+    assert components['adjusted'].shape == (len(seasonal.AREAS), len(components['dates']))
+    dates, values = seasonal.series('unemployment', 'tula', 'trend')
+    assert len(dates) == len(values)
+    with pytest.raises(ValueError):
+        seasonal.get_components('salary')
@@ -0,0 +1,144 @@
+"""Single-flight: одно вычисление на ключ в процессе и между воркерами"""
+
+import threading
+import time
+
+import pytest
+
+from services import singleflight
+
+
+class MemoryStore:
+    """Общий кэш в памяти с интерфейсом DiskStore/RedisStore"""
+
+    def __init__(self):
+        self.data = {}
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ttl):
+        self.data[key] = value
+
+    def acquire(self, key, ttl):
+        with self.lock:
+            if key in self.data:
+                return False
+            self.data[key] = 'pid'
+            return True
+
+    def locked(self, key):
+        return key in self.data
+
+    def release(self, key):
+        self.data.pop(key, None)
+
+
+class BrokenStore(MemoryStore):
+    def get(self, key):
+        raise ConnectionError('store is down')
+
+
+@pytest.fixture
+def store(monkeypatch):
+    store = MemoryStore()
+    monkeypatch.setattr(singleflight, 'get_store', lambda: store)
+    monkeypatch.setattr(singleflight, 'POLL_INTERVAL', 0.005)
+    return store
+
+
+def _counted(value, delay=0.05, error=None):
+    """fn для вычисления со счетчиком вызовов"""
+    calls = []
+
+    def fn():
+        calls.append(1)
+        time.sleep(delay)
+        if error is not None:
+            raise error
+        return value
+
+    return fn, calls
+
+
+def _run_concurrently(target, n=8):
+    results, errors = [None] * n, [None] * n
+
+    def worker(i):
+        try:
+            results[i] = target()
+        except Exception as e:
+            errors[i] = e
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(n)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, errors
+
+
+def test_do_runs_once_for_concurrent_callers():
+    fn, calls = _counted('value')
+    results, errors = _run_concurrently(lambda: singleflight.do('key', fn))
+    assert calls == [1]
+    assert results == ['value'] * 8 and errors == [None] * 8
+
+    # После завершения ключ свободен: следующий вызов считает заново
+    assert singleflight.do('key', fn) == 'value'
+    assert len(calls) == 2
+
+
+def test_do_shares_the_error():
+    fn, calls = _counted(None, error=ValueError('bad data'))
+    _, errors = _run_concurrently(lambda: singleflight.do('failing', fn))
+    assert calls == [1]
+    assert all(isinstance(e, ValueError) for e in errors)
+
+
+def test_shared_runs_once_for_concurrent_callers(store):
+    fn, calls = _counted({'rows': 3})
+    results, errors = _run_concurrently(lambda: singleflight.shared('ns', 'key', fn))
+    assert calls == [1]
+    assert results == [{'rows': 3}] * 8 and errors == [None] * 8
+    # Результат лежит в общем кэше, блокировка снята
+    assert singleflight.shared('ns', 'key', fn) == {'rows': 3} and calls == [1]
+    assert not any(key.endswith(':lock') for key in store.data)
+
+
+def test_shared_computes_locally_after_lock_timeout(store, monkeypatch):
+    monkeypatch.setattr(singleflight, 'SHARED_LOCK_TIMEOUT', 0.05)
+    lock_key = singleflight._shared_key('ns', 'key') + ':lock'
+    store.acquire(lock_key, 1)
+
+    fn, calls = _counted('value', delay=0)
+    assert singleflight.shared('ns', 'key', fn) == 'value'
+    assert calls == [1]
+    # Чужая блокировка не снимается
+    assert store.locked(lock_key)
+
+
+def test_shared_error_after_lock_timeout_is_not_retried(store, monkeypatch):
+    monkeypatch.setattr(singleflight, 'SHARED_LOCK_TIMEOUT', 0.05)
+    store.acquire(singleflight._shared_key('ns', 'key') + ':lock', 1)
+
+    fn, calls = _counted(None, delay=0, error=ValueError('bad data'))
+    with pytest.raises(ValueError, match='bad data'):
+        singleflight.shared('ns', 'key', fn)
+    assert calls == [1]
+
+
+def test_shared_error_releases_lock(store):
+    fn, calls = _counted(None, delay=0, error=ValueError('bad data'))
+    with pytest.raises(ValueError):
+        singleflight.shared('ns', 'key', fn)
+    assert calls == [1]
+    assert store.data == {}
+
+
+def test_shared_falls_back_when_store_fails(monkeypatch):
+    monkeypatch.setattr(singleflight, 'get_store', lambda: BrokenStore())
+    fn, calls = _counted('value', delay=0)
+    assert singleflight.shared('ns', 'key', fn) == 'value'
+    assert calls == [1]
@@ -0,0 +1,127 @@
+"""Счетчики вакансий: окна, дедупликация и чтение ленты"""
+
+import json
+from datetime import date
+
+import numpy as np
+
+from services import municipalities, vacancies
+from services.vacancies import HISTORY_DAYS, WINDOWS, VacancyCounters, VacancyStream
+
+TODAY = date.today().toordinal()
+
+
+def _postings(rng, n_days=120, per_day=200, duplicate_share=0.2):
+    """Вакансии по дням (по возрастанию дня) с повторами прошлых ключей"""
+    batches, seen = [], np.empty(0, dtype=np.uint64)
+    for day in range(TODAY - n_days + 1, TODAY + 1):
+        keys = rng.integers(0, 2 ** 63, per_day, dtype=np.int64).astype(np.uint64)
+        if len(seen):
+            repeated = rng.random(per_day) < duplicate_share
+            keys[repeated] = rng.choice(seen, repeated.sum())
+        spheres = rng.integers(0, len(vacancies.SPHERES), per_day)
+        municipality_ids = rng.integers(0, len(municipalities.CODES), per_day)
+        batches.append((np.full(per_day, day), spheres, municipality_ids, keys))
+        seen = np.concatenate([seen, keys])
+    return batches
+
+
+def _brute_force(batches, latest, window):
+    """
+    Количества за окно по вакансиям, не повторяющим уже загруженные:
+    сфера × муниципалитет. Ключ помнится, пока его день в буфере.
+    """
+    counts = np.zeros((len(vacancies.SPHERES), len(municipalities.CODES)), dtype=np.int64)
+    first_day = {}
+    for days, spheres, municipality_ids, keys in batches:
+        day = days[0]
+        batch_keys = set()
+        for sphere, municipality, key in zip(spheres, municipality_ids, keys.tolist()):
+            if key in batch_keys:
+                continue
+            batch_keys.add(key)
+            # До пакета буфер сдвинут на предыдущий день
+            if key in first_day and first_day[key] > day - 1 - HISTORY_DAYS:
+                continue
+            first_day[key] = day
+            if latest - day < window:
+                counts[sphere, municipality] += 1
+    return counts
+
+
+def test_windows_match_brute_force():
+    rng = np.random.default_rng(5)
+    batches = _postings(rng)
+    stream = VacancyStream(feed='')
+    for batch in batches:
+        stream.ingest(*batch)
+
+    for window in WINDOWS:
+        expected = _brute_force(batches, TODAY, window)
+        np.testing.assert_array_equal(stream.counters.window(window), expected)
+
+
+def test_totals_equal_sum_of_day_slots():
+    rng = np.random.default_rng(7)
+    counters = VacancyCounters()
+    for day in range(TODAY - 150, TODAY + 1, 3):
+        n = rng.integers(0, 50)
+        counters.add(np.full(n, day), rng.integers(0, len(vacancies.SPHERES), n), rng.integers(0, len(municipalities.CODES), n))
+        for w, window in enumerate(WINDOWS):
+            slots = [(counters.latest - age) % HISTORY_DAYS for age in range(window)]
+            np.testing.assert_array_equal(counters.totals[w], counters.days[slots].sum(axis=0))
+
+
+def test_roll_moves_windows_without_postings():
+    stream = VacancyStream(feed='')
+    stream.ingest([TODAY, TODAY - 25], [0, 1], [0, 0], [1, 2])
+    assert stream.counts(7).sum() == 1 and stream.counts(30).sum() == 2
+
+    stream.roll(TODAY + 8)
+    assert stream.counts(7).sum() == 0
+    assert stream.counts(30).sum() == 1
+    assert stream.counts(90).sum() == 2
+
+
+def test_duplicates_are_skipped():
+    stream = VacancyStream(feed='')
+    key = vacancies.posting_key('Токарь', 'ООО «Завод»', 'tula')
+    assert key == vacancies.posting_key('  токарь ', 'ооо  «завод»', 'TULA')
+    assert stream.ingest([TODAY, TODAY], [0, 0], [0, 0], [key, key]) == 1
+    assert stream.ingest([TODAY], [0], [0], [key]) == 0
+    assert stream.duplicates == 2
+
+
+def _record(title, published=None, sphere='it', municipality='tula'):
+    record = {'title': title, 'employer': 'e', 'sphere': sphere, 'municipality': municipality}
+    if published:
+        record['published'] = published
+    return record
+
+
+def test_poll_keeps_partial_line_and_skips_bad_records(tmp_path):
+    today = date.today().isoformat()
+    feed = tmp_path / 'feed.jsonl'
+    lines = [
+        json.dumps(_record('a', today)),
+        json.dumps(_record('b')),
+        json.dumps(_record('c', today, sphere='unknown')),
+        json.dumps(_record('d', 'not a date')),
+        '{not json}',
+    ]
+    partial = json.dumps(_record('e', today))
+    feed.write_text('\n'.join(lines) + '\n' + partial[:10], encoding='utf-8')
+
+    stream = VacancyStream(feed=str(feed))
+    assert stream.poll() == 1
+
+    with open(feed, 'a', encoding='utf-8') as f:
+        f.write(partial[10:] + '\n')
+    assert stream.poll() == 1
+    assert stream.ingested == 2
+
+
+def test_refresh_logs_broken_feed(tmp_path):
+    stream = VacancyStream(feed=str(tmp_path / 'missing.jsonl'))
+    stream.refresh(force=True)
+    assert stream.ingested == 0